@@ -13,6 +13,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from apps.accounts.api.serializers.user_serializer import UserSerializer
 from apps.accounts.utils import set_auth_cookies
+from apps.cart.anonymous import merge_anonymous_cart
 
 User = get_user_model()
 
@@ -58,6 +59,8 @@ class GoogleAuthView(APIView):
                 str(refresh)
             )
 
+            merge_anonymous_cart(request, response, user)
+
             return response
 
         except ValueError:
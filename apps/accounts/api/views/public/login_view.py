@@ -7,6 +7,7 @@ from apps.accounts.api.serializers.login_serializer import LoginSerializer
 from apps.accounts.api.serializers.user_serializer import UserSerializer
 import logging
 from apps.accounts.utils import set_auth_cookies
+from apps.cart.anonymous import merge_anonymous_cart
 
 logger = logging.getLogger(__name__)
 
@@ -42,4 +43,6 @@ class LoginView(APIView):
             str(refresh.access_token),
             str(refresh)
         )
+
+        merge_anonymous_cart(request, response, user)
         return response
\ No newline at end of file
@@ -0,0 +1,217 @@
+import logging
+import re
+from decimal import Decimal
+
+from django.core import signing
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.products.models import Inventory, ProductVariant
+
+from .models import CartItem
+from .services import CartService
+from .store import CartSnapshot, get_cart_store
+
+
+logger = logging.getLogger(__name__)
+
+
+class AnonymousCart:
+    """
+    Cart of a visitor who isn't logged in, held entirely in a signed
+    cookie of "variant-quantity" pairs ("12-2.40-1" plus timestamp and
+    signature). Anonymous browsing never writes to the database: prices
+    come from one variant lookup when the cart is rendered, and the
+    lines are merged into the user's Cart at login.
+
+    Bounded to max_lines lines of at most max_quantity each, i.e. well
+    under the 4 KB browsers allow per cookie.
+    """
+
+    cookie_name = "guest_cart"
+    salt = "apps.cart.anonymous"
+    max_age = 60 * 60 * 24 * 30
+    max_lines = 50
+    max_quantity = 99
+
+    LINE_RE = re.compile(r"^(\d{1,10})-(\d{1,3})$")
+
+    def __init__(self, lines=None):
+        # variant id -> quantity, in the order the lines were added
+        self.lines = dict(lines or {})
+
+    @property
+    def item_count(self):
+        return sum(self.lines.values())
+
+    # ----------------------------------------------------------------------
+    # COOKIE
+    # ----------------------------------------------------------------------
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        The cart of the request's cookie; empty if missing, tampered
+        with or expired.
+        """
+        value = request.COOKIES.get(cls.cookie_name)
+        if not value:
+            return cls()
+
+        try:
+            payload = signing.TimestampSigner(salt=cls.salt).unsign(
+                value, max_age=cls.max_age
+            )
+        except signing.BadSignature:
+            return cls()
+
+        lines = {}
+        for part in payload.split(".")[:cls.max_lines]:
+            match = cls.LINE_RE.match(part)
+            if match and int(match[2]):
+                lines[int(match[1])] = min(int(match[2]), cls.max_quantity)
+
+        return cls(lines)
+
+    def encode(self):
+        return signing.TimestampSigner(salt=self.salt).sign(
+            ".".join(f"{variant_id}-{quantity}" for variant_id, quantity in self.lines.items())
+        )
+
+    def save(self, response):
+        """
+        Write the cart to the response's cookie (removed when empty).
+        Same attributes as the auth cookies.
+        """
+        if not self.lines:
+            response.delete_cookie(self.cookie_name, path="/", samesite="None")
+            return response
+
+        response.set_cookie(
+            key=self.cookie_name,
+            value=self.encode(),
+            httponly=True,
+            secure=True,
+            samesite="None",
+            path="/",
+            max_age=self.max_age,
+        )
+        return response
+
+    # ----------------------------------------------------------------------
+    # READ / WRITE
+    # ----------------------------------------------------------------------
+
+    def apply(self, operations):
+        """
+        Run add / set / remove operations (CartService.apply_operations)
+        with one read of the variants. Returns the results.
+        """
+        inventories = {
+            inventory.variant_id: inventory
+            for inventory in Inventory.objects.select_related("variant__product").filter(
+                variant_id__in={operation["variant_id"] for operation in operations}
+            )
+        }
+
+        lines = {
+            variant_id: CartItem(variant_id=variant_id, quantity=quantity)
+            for variant_id, quantity in self.lines.items()
+        }
+
+        results = CartService.apply_operations(
+            operations,
+            inventories,
+            lines,
+            lambda variant: CartItem(variant=variant, quantity=0),
+        )
+
+        lines = {
+            variant_id: item.quantity
+            for variant_id, item in lines.items()
+            if item.quantity
+        }
+
+        if len(lines) > self.max_lines:
+            raise ValidationError(
+                f"A guest cart holds at most {self.max_lines} products, log in to add more."
+            )
+        if any(quantity > self.max_quantity for quantity in lines.values()):
+            raise ValidationError(
+                f"A guest cart holds at most {self.max_quantity} of each product."
+            )
+
+        self.lines = lines
+        return results
+
+    def render(self):
+        """
+        The cart for CartSerializer, priced now. Lines of variants no
+        longer for sale are left out.
+        """
+        variants = (
+            ProductVariant.objects
+            .select_related("product", "inventory")
+            .prefetch_related("product__images")
+            .filter(is_active=True, product__is_active=True)
+            .in_bulk(list(self.lines))
+        ) if self.lines else {}
+
+        items = [
+            CartItem(
+                variant=variants[variant_id],
+                quantity=quantity,
+                unit_price=variants[variant_id].selling_price,
+                discount_percent=variants[variant_id].discount_percent,
+                total_price=variants[variant_id].selling_price * quantity,
+            )
+            for variant_id, quantity in self.lines.items()
+            if variant_id in variants
+        ]
+
+        return CartSnapshot(
+            None,
+            sum((item.total_price for item in items), Decimal("0.00")),
+            sum(item.quantity for item in items),
+            items,
+        )
+
+    # ----------------------------------------------------------------------
+    # LOGIN
+    # ----------------------------------------------------------------------
+
+    def merge_into(self, user):
+        """
+        Add the lines to the user's cart (one upsert, see
+        CartService.merge_lines). Returns the number of lines merged.
+        """
+        if not self.lines:
+            return 0
+
+        # Writes the cart tables directly, like checkout
+        store = get_cart_store()
+        store.flush(user)
+
+        merged = CartService.merge_lines(user, self.lines)
+
+        transaction.on_commit(lambda: store.invalidate(user))
+        return merged
+
+
+def merge_anonymous_cart(request, response, user):
+    """
+    At login: merge the request's guest cart into the user's cart and
+    clear the cookie. A failed merge never fails the login; the cookie
+    is then kept for the next one.
+    """
+    cart = AnonymousCart.from_request(request)
+    if not cart.lines:
+        return response
+
+    try:
+        cart.merge_into(user)
+    except Exception:
+        logger.exception("Merging the guest cart of user %s failed", user.pk)
+        return response
+
+    return AnonymousCart().save(response)
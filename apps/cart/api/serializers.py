@@ -1,7 +1,20 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from ..models import CartItem,Cart
 
 
+# What CartSerializer reads from the items, in a fixed number of queries
+CART_ITEMS_PREFETCH = Prefetch(
+    "items",
+    queryset=CartItem.objects.select_related(
+        "variant__product",
+        "variant__inventory",
+    ).prefetch_related(
+        "variant__product__images"
+    )
+)
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source="variant.product.name", read_only=True)
     product_slug = serializers.CharField(source="variant.product.slug", read_only=True)
@@ -29,14 +42,19 @@ class CartItemSerializer(serializers.ModelSerializer):
         ]
 
     def get_product_image(self, obj):
-        image = obj.variant.product.images.filter(is_primary=True).first()
-        return image.image.url if image and image.image else None
+        # In Python, so the images prefetched with CART_ITEMS_PREFETCH serve it
+        image = next(
+            (image for image in obj.variant.product.images.all() if image.is_primary),
+            None,
+        )
+        return image.url_for() if image and image.image else None
     
 
 
-class CartSerializer(serializers.ModelSerializer):
-    items = CartItemSerializer(many=True, read_only=True)
-    item_count = serializers.SerializerMethodField()
+class CartTotalsSerializer(serializers.ModelSerializer):
+    tax_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    shipping_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    total_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
     class Meta:
         model = Cart
@@ -47,11 +65,14 @@ class CartSerializer(serializers.ModelSerializer):
             "tax_amount",
             "shipping_amount",
             "total_amount",
-            "items",
         ]
 
-    def get_item_count(self, obj):
-        return sum(item.quantity for item in obj.items.all())
+
+class CartSerializer(CartTotalsSerializer):
+    items = CartItemSerializer(many=True, read_only=True)
+
+    class Meta(CartTotalsSerializer.Meta):
+        fields = CartTotalsSerializer.Meta.fields + ["items"]
     
 
 
@@ -62,4 +83,29 @@ class UpdateCartItemSerializer(serializers.Serializer):
         if value < 0:
             raise serializers.ValidationError("Quantity cannot be negative.")
         return value
-    
\ No newline at end of file
+
+
+
+class CartBatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=["add", "set", "remove"])
+    variant_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] == "add":
+            attrs.setdefault("quantity", 1)
+            if attrs["quantity"] < 1:
+                raise serializers.ValidationError({"quantity": "Must be at least 1 to add."})
+
+        elif attrs["op"] == "set" and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "This field is required."})
+
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=CartBatchOperationSerializer(),
+        allow_empty=False,
+        max_length=100,
+    )
@@ -6,8 +6,10 @@ from .views.cart_write_views import (
     UpdateCartItemView,
     RemoveCartItemView,
     ClearCartView,
+    BatchCartView,
 )
 from .views.cart_validation_views import ValidateCartView
+from .views.cart_guest_views import GuestCartView, GuestCartCountView
 
 urlpatterns = [
     # Read
@@ -19,7 +21,12 @@ urlpatterns = [
     path("items/<int:item_id>/", UpdateCartItemView.as_view(), name="cart-update"),
     path("items/<int:item_id>/remove/", RemoveCartItemView.as_view(), name="cart-remove"),
     path("clear/", ClearCartView.as_view(), name="cart-clear"),
+    path("batch/", BatchCartView.as_view(), name="cart-batch"),
 
     # Validation
     path("validate/", ValidateCartView.as_view(), name="cart-validate"),
+
+    # Guest (signed cookie, merged at login)
+    path("guest/", GuestCartView.as_view(), name="cart-guest"),
+    path("guest/count/", GuestCartCountView.as_view(), name="cart-guest-count"),
 ]
\ No newline at end of file
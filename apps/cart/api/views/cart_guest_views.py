@@ -0,0 +1,75 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+
+from ...anonymous import AnonymousCart
+from ..serializers import CartBatchSerializer, CartSerializer
+
+
+@extend_schema(tags=["cart"])
+class GuestCartView(APIView):
+    """
+    Cart of a visitor who isn't logged in, kept in a signed cookie.
+    Never writes to the database; merged into the user's cart at login.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    @extend_schema(
+        summary="Get the guest cart",
+        responses={200: CartSerializer},
+    )
+    def get(self, request):
+        cart = AnonymousCart.from_request(request)
+        return Response(CartSerializer(cart.render()).data)
+
+    @extend_schema(
+        summary="Apply cart changes to the guest cart",
+        description=(
+            "Same operations as /api/cart/batch/. The cart comes back in "
+            "the guest_cart cookie."
+        ),
+        request=CartBatchSerializer,
+        responses={
+            200: OpenApiResponse(description="Per-operation results and the cart"),
+            400: OpenApiResponse(description="Malformed operations or guest cart full"),
+        },
+    )
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cart = AnonymousCart.from_request(request)
+        results = cart.apply(serializer.validated_data["operations"])
+
+        response = Response({
+            "success": True,
+            "results": results,
+            "cart": CartSerializer(cart.render()).data,
+        })
+        return cart.save(response)
+
+    @extend_schema(
+        summary="Clear the guest cart",
+        responses={200: CartSerializer},
+    )
+    def delete(self, request):
+        cart = AnonymousCart()
+        return cart.save(Response(CartSerializer(cart.render()).data))
+
+
+# ---------------------------------------------------------------------------
+
+
+class GuestCartCountView(APIView):
+    """
+    Total quantity in the guest cart, from the cookie alone.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        return Response({"count": AnonymousCart.from_request(request).item_count})
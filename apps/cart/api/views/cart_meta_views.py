@@ -1,7 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Sum
+from ...store import get_cart_store
 
 
 class CartCountView(APIView):
@@ -12,13 +12,4 @@ class CartCountView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cart = getattr(request.user, "cart", None)
-
-        if not cart:
-            return Response({"count": 0})
-
-        total_quantity = cart.items.aggregate(
-            total=Sum("quantity")
-        )["total"] or 0
-
-        return Response({"count": total_quantity})
\ No newline at end of file
+        return Response({"count": get_cart_store().summary(request.user).item_count})
\ No newline at end of file
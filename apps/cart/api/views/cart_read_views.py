@@ -1,10 +1,9 @@
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound
-from django.db.models import Prefetch
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
-from ...models import Cart, CartItem
+from ...store import get_cart_store
 from ..serializers import CartSerializer
 
 
@@ -23,21 +22,7 @@ class CartDetailView(RetrieveAPIView):
     serializer_class = CartSerializer
 
     def get_object(self):
-        try:
-            return (
-                Cart.objects
-                .prefetch_related(
-                    Prefetch(
-                        "items",
-                        queryset=CartItem.objects.select_related(
-                            "variant__product",
-                            "variant__inventory",
-                        ).prefetch_related(
-                            "variant__product__images"
-                        )
-                    )
-                )
-                .get(user=self.request.user)
-            )
-        except Cart.DoesNotExist:
-            raise NotFound("Cart not found.")
\ No newline at end of file
+        cart = get_cart_store().get(self.request.user, with_item_ids=True)
+        if cart is None:
+            raise NotFound("Cart not found.")
+        return cart
\ No newline at end of file
@@ -1,12 +1,15 @@
 from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from apps.products.models import Inventory
-from ...models import Cart
-from ..serializers import CartSerializer
+from ...models import Cart, CartItem
+from ...store import get_cart_store
+from ..serializers import CART_ITEMS_PREFETCH, CartSerializer
 
 
 
@@ -17,9 +20,21 @@ from ..serializers import CartSerializer
 class ValidateCartView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @staticmethod
+    def _lock_inventories(variant_ids):
+        return {
+            inventory.variant_id: inventory
+            for inventory in Inventory.objects.select_for_update()
+            .filter(variant_id__in=variant_ids)
+            .order_by("pk")
+        }
+
     @transaction.atomic
     def post(self, request):
 
+        store = get_cart_store()
+        store.flush(request.user)
+
         try:
             cart = request.user.cart
         except Cart.DoesNotExist:
@@ -28,22 +43,46 @@ class ValidateCartView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        if not cart.items.exists():
+        variant_ids = list(cart.items.values_list("variant_id", flat=True))
+
+        if not variant_ids:
+            return Response(
+                {"detail": "Cart is empty."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # One query, in id order like checkout, so concurrent validations
+        # and checkouts on the same variants can't deadlock
+        inventories = self._lock_inventories(variant_ids)
+
+        # Then the lines, like CartService.apply_batch: totals are
+        # repriced from quantities nobody can change until commit
+        items = list(
+            cart.items
+            .select_for_update(of=("self",))
+            .select_related("variant__product")
+            .order_by("pk")
+        )
+
+        # Lines added between the two reads
+        added = {item.variant_id for item in items} - inventories.keys()
+        if added:
+            inventories.update(self._lock_inventories(added))
+
+        if not items:
             return Response(
                 {"detail": "Cart is empty."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         errors = []
-        price_updated = False
+        repriced = []
+        now = timezone.now()
 
-        for item in cart.items.select_related("variant__product"):
+        for item in items:
 
             variant = item.variant
-
-            inventory = Inventory.objects.select_for_update().get(
-                variant_id=variant.id
-            )
+            inventory = inventories.get(variant.id)
 
             if not variant.is_active or not variant.product.is_active:
                 errors.append({
@@ -52,7 +91,7 @@ class ValidateCartView(APIView):
                 })
                 continue
 
-            if inventory.available_stock < item.quantity:
+            if inventory is None or inventory.available_stock < item.quantity:
                 errors.append({
                     "item_id": item.id,
                     "error": "Insufficient stock."
@@ -64,8 +103,16 @@ class ValidateCartView(APIView):
             if item.unit_price != current_price:
                 item.unit_price = current_price
                 item.discount_percent = variant.discount_percent
-                item.save()
-                price_updated = True
+                item.updated_at = now
+                repriced.append(item)
+
+        price_updated = bool(repriced)
+
+        if repriced:
+            CartItem.objects.bulk_update(
+                repriced, ["unit_price", "discount_percent", "updated_at"]
+            )
+            transaction.on_commit(lambda: store.invalidate(request.user))
 
         if errors:
             return Response(
@@ -73,7 +120,8 @@ class ValidateCartView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        cart.recalculate_totals()
+        cart.refresh_totals()
+        prefetch_related_objects([cart], CART_ITEMS_PREFETCH)
 
         return Response(
             {
@@ -1,14 +1,17 @@
-from django.db import transaction
-from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema, OpenApiResponse,OpenApiParameter,OpenApiResponse
 
-from apps.products.models import ProductVariant, Inventory
-from ...models import Cart, CartItem
-from ..serializers import CartSerializer, UpdateCartItemSerializer
+from ...store import get_cart_store
+from ..serializers import (
+    CartBatchOperationSerializer,
+    CartBatchSerializer,
+    CartSerializer,
+    CartTotalsSerializer,
+    UpdateCartItemSerializer,
+)
 
 
 
@@ -29,55 +32,31 @@ from ..serializers import CartSerializer, UpdateCartItemSerializer
 class AddToCartView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def post(self, request):
 
-        variant_id = request.data.get("variant_id")
-        quantity = int(request.data.get("quantity", 1))
+        serializer = CartBatchOperationSerializer(data={
+            "op": "add",
+            "variant_id": request.data.get("variant_id"),
+            "quantity": request.data.get("quantity", 1),
+        })
+        serializer.is_valid(raise_exception=True)
 
-        variant = get_object_or_404(
-            ProductVariant.objects.select_for_update(),
-            id=variant_id,
-            is_active=True,
-            product__is_active=True
-        )
+        store = get_cart_store()
 
-        inventory = Inventory.objects.select_for_update().get(
-            variant=variant
-        )
+        _, results = store.apply(request.user, [serializer.validated_data])
 
-        if inventory.available_stock < quantity:
+        if not results[0]["success"]:
             return Response(
-                {"detail": "Insufficient stock"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-
-        item, created = CartItem.objects.select_for_update().get_or_create(
-            cart=cart,
-            variant=variant,
-            defaults={
-                "quantity": quantity,
-                "unit_price": variant.selling_price,
-                "discount_percent": variant.discount_percent
-            }
-        )
-
-        if not created:
-            if inventory.available_stock < (item.quantity + quantity):
-                return Response(
-                    {"detail": "Insufficient stock"},
-                    status=status.HTTP_400_BAD_REQUEST
+                {"detail": results[0]["detail"]},
+                status=(
+                    status.HTTP_400_BAD_REQUEST
+                    if results[0]["code"] == "insufficient_stock"
+                    else status.HTTP_404_NOT_FOUND
                 )
-
-            item.quantity += quantity
-            item.save()
-
-        cart.recalculate_totals()
+            )
 
         return Response(
-            CartSerializer(cart).data,
+            CartSerializer(store.get(request.user)).data,
             status=status.HTTP_200_OK
         )
     
@@ -109,7 +88,6 @@ class AddToCartView(APIView):
 class UpdateCartItemView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def patch(self, request, item_id):
 
         serializer = UpdateCartItemSerializer(data=request.data)
@@ -117,45 +95,30 @@ class UpdateCartItemView(APIView):
 
         new_quantity = serializer.validated_data["quantity"]
 
-        cart = request.user.cart
+        store = get_cart_store()
 
-        cart_item = get_object_or_404(
-            CartItem.objects.select_for_update(),
-            id=item_id,
-            cart=cart
-        )
-
-        variant = cart_item.variant
+        variant_id = store.item_variant(request.user, item_id)
+        if variant_id is None:
+            return Response(
+                {"detail": "Cart item not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        inventory = Inventory.objects.select_for_update().get(
-            variant_id=variant.id
+        # Quantity 0 removes the item
+        operation = (
+            {"op": "set", "variant_id": variant_id, "quantity": new_quantity}
+            if new_quantity else {"op": "remove", "variant_id": variant_id}
         )
 
-        if new_quantity == 0:
-            cart_item.delete()
-            cart.recalculate_totals()
-            return Response(CartSerializer(cart).data)
+        _, results = store.apply(request.user, [operation])
 
-        if not variant.is_active or not variant.product.is_active:
+        if not results[0]["success"]:
             return Response(
-                {"detail": "Product is no longer available."},
+                {"detail": results[0]["detail"]},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if inventory.available_stock < new_quantity:
-            return Response(
-                {"detail": "Insufficient stock available."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        cart_item.quantity = new_quantity
-        cart_item.unit_price = variant.selling_price
-        cart_item.discount_percent = variant.discount_percent
-        cart_item.save()
-
-        cart.recalculate_totals()
-
-        return Response(CartSerializer(cart).data)
+        return Response(CartSerializer(store.get(request.user)).data)
     
 
 # ---------------------------------------------------------------------
@@ -163,22 +126,20 @@ class UpdateCartItemView(APIView):
 class RemoveCartItemView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def delete(self, request, item_id):
 
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-
-        cart_item = get_object_or_404(
-            CartItem.objects.select_for_update(),
-            id=item_id,
-            cart=cart
-        )
+        store = get_cart_store()
 
-        cart_item.delete()
+        variant_id = store.item_variant(request.user, item_id)
+        if variant_id is None:
+            return Response(
+                {"detail": "Cart item not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        cart.recalculate_totals()
+        store.apply(request.user, [{"op": "remove", "variant_id": variant_id}])
 
-        return Response(CartSerializer(cart).data)
+        return Response(CartSerializer(store.get(request.user)).data)
     
 
 # ---------------------------------------------------------------------------
@@ -187,67 +148,53 @@ class RemoveCartItemView(APIView):
 class ClearCartView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def delete(self, request):
 
-        try:
-            cart = request.user.cart
-        except Cart.DoesNotExist:
+        cart = get_cart_store().clear(request.user)
+
+        if cart is None:
             return Response(
                 {"detail": "Cart not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        cart = Cart.objects.select_for_update().get(pk=cart.pk)
-
-        cart.items.all().delete()
-
-        cart.subtotal = 0
-        cart.tax_amount = 0
-        cart.shipping_amount = 0
-        cart.total_amount = 0
-        cart.save(update_fields=[
-            "subtotal",
-            "tax_amount",
-            "shipping_amount",
-            "total_amount",
-            "updated_at"
-        ])
-
         return Response(CartSerializer(cart).data)
     
 
 # ---------------------------------------------------------------------------
 
 
-class ClearCartView(APIView):
+@extend_schema(
+    summary="Apply a batch of cart changes",
+    description=(
+        "Applies an ordered list of add / set / remove operations in one "
+        "request, e.g. to sync cart edits made offline. Operations that fail "
+        "(unknown variant, unavailable product, insufficient stock) are "
+        "reported and skipped; the others still apply. 'set' with quantity 0 "
+        "removes the line. Returns one result per operation and the cart totals."
+    ),
+    tags=["cart"],
+    request=CartBatchSerializer,
+    responses={
+        200: OpenApiResponse(description="Per-operation results and cart totals"),
+        400: OpenApiResponse(description="Malformed operations"),
+        401: OpenApiResponse(description="Authentication required"),
+    },
+)
+class BatchCartView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
-    def delete(self, request):
-
-        try:
-            cart = request.user.cart
-        except Cart.DoesNotExist:
-            return Response(
-                {"detail": "Cart not found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        cart = Cart.objects.select_for_update().get(pk=cart.pk)
+    def post(self, request):
 
-        cart.items.all().delete()
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        cart.subtotal = 0
-        cart.tax_amount = 0
-        cart.shipping_amount = 0
-        cart.total_amount = 0
-        cart.save(update_fields=[
-            "subtotal",
-            "tax_amount",
-            "shipping_amount",
-            "total_amount",
-            "updated_at"
-        ])
+        cart, results = get_cart_store().apply(
+            request.user, serializer.validated_data["operations"]
+        )
 
-        return Response(CartSerializer(cart).data)
\ No newline at end of file
+        return Response({
+            "success": True,
+            "results": results,
+            "cart": CartTotalsSerializer(cart).data,
+        })
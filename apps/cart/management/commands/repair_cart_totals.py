@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.cart.services import CartTotalsService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the running subtotal / item count of every cart "
+        "from its items and repair the carts that drifted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of carts recounted per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the carts that drifted",
+        )
+
+    def handle(self, *args, **options):
+
+        started = time.perf_counter()
+        repair = not options["dry_run"]
+
+        def progress(checked, drifted):
+            self.stdout.write(f"{checked} carts checked, {drifted} drifted")
+
+        checked, drifted = CartTotalsService.check(
+            chunk_size=options["chunk_size"],
+            repair=repair,
+            progress=progress,
+        )
+
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} carts in {elapsed:.1f}s, "
+                f"{drifted} drifted" + (", repaired" if repair and drifted else "")
+            )
+        )
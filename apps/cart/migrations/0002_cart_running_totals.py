@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:05
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+def backfill_running_totals(apps, schema_editor):
+    Cart = apps.get_model("cart", "Cart")
+    CartItem = apps.get_model("cart", "CartItem")
+
+    totals = {
+        row["cart_id"]: (row["subtotal"], row["count"])
+        for row in CartItem.objects.values("cart_id")
+        .annotate(subtotal=Sum("total_price"), count=Sum("quantity"))
+        .order_by()
+    }
+
+    changed = []
+    for cart in Cart.objects.iterator():
+        cart.subtotal, cart.item_count = totals.get(cart.pk, (Decimal("0.00"), 0))
+        changed.append(cart)
+
+    Cart.objects.bulk_update(changed, ["subtotal", "item_count"], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_running_totals, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='cart',
+            name='shipping_amount',
+        ),
+        migrations.RemoveField(
+            model_name='cart',
+            name='tax_amount',
+        ),
+        migrations.RemoveField(
+            model_name='cart',
+            name='total_amount',
+        ),
+    ]
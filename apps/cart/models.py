@@ -2,7 +2,17 @@ from django.db import models
 from django.conf import settings
 from decimal import Decimal
 from django.core.validators import MinValueValidator
-from django.db.models import F
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from core.pricing import PricingEngine
 
 
@@ -10,6 +20,15 @@ from core.pricing import PricingEngine
 class Cart(models.Model):
     """
     One active cart per user.
+
+    subtotal and item_count are running totals of the items, kept by
+    CartItem writes as F() deltas (see CartItem / CartItemQuerySet);
+    tax, shipping and total are derived from subtotal on read.
+
+    version changes with every write of the items (even one leaving
+    the totals as they were) and every repair, so a cache-backed cart
+    store (apps.cart.store) can tell whether its entry is still based
+    on what the tables hold.
     """
 
     user = models.OneToOneField(
@@ -21,9 +40,8 @@ class Cart(models.Model):
     is_active = models.BooleanField(default=True)
 
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
-    tax_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
-    shipping_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
-    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    item_count = models.PositiveIntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -37,30 +55,184 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart - {self.user.email}"
 
-    def recalculate_totals(self):
-        items = self.items.all()
+    # ------------------------------------------------------------------
+    # DERIVED TOTALS
+    # ------------------------------------------------------------------
+
+    @property
+    def pricing(self):
+        return PricingEngine.calculate(self.subtotal)
+
+    @property
+    def tax_amount(self):
+        return self.pricing["tax"]
+
+    @property
+    def shipping_amount(self):
+        return self.pricing["shipping"]
 
-        subtotal = sum(item.total_price for item in items)
+    @property
+    def total_amount(self):
+        return self.pricing["total"]
 
-        pricing = PricingEngine.calculate(subtotal)
+    # ------------------------------------------------------------------
+    # RUNNING TOTALS
+    # ------------------------------------------------------------------
 
-        self.subtotal = pricing["subtotal"]
-        self.tax_amount = pricing["tax"]
-        self.shipping_amount = pricing["shipping"]
-        self.total_amount = pricing["total"]
+    @staticmethod
+    def apply_delta(cart_id, subtotal_delta, count_delta):
+        """
+        Add an item change to the running totals in one UPDATE,
+        whatever the number of items. Bumps version even when both
+        deltas are zero: the items were still written.
+        """
+        Cart.objects.filter(pk=cart_id).update(
+            subtotal=F("subtotal") + subtotal_delta,
+            item_count=F("item_count") + count_delta,
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
 
-        self.save(update_fields=[
-            "subtotal",
-            "tax_amount",
-            "shipping_amount",
-            "total_amount",
-            "updated_at"
-        ])
+    def refresh_totals(self):
+        """
+        Reload the running totals after item writes (single-row read).
+        """
+        self.refresh_from_db(fields=["subtotal", "item_count", "updated_at"])
+
+    @staticmethod
+    def recount(cart_ids):
+        """
+        Full recount of the given carts from their items in one UPDATE
+        (correlated subqueries), bumping version.
+        """
+        items = (
+            CartItem.objects
+            .filter(cart=OuterRef("pk"))
+            .order_by()
+            .values("cart")
+        )
+
+        Cart.objects.filter(pk__in=cart_ids).update(
+            subtotal=Coalesce(
+                Subquery(items.annotate(total=Sum("total_price")).values("total")),
+                Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            item_count=Coalesce(
+                Subquery(items.annotate(total=Sum("quantity")).values("total")),
+                Value(0),
+            ),
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+
+    def recalculate_totals(self):
+        """
+        Full recount from the items, for repairs.
+        """
+        Cart.recount([self.pk])
+        self.refresh_from_db(fields=["subtotal", "item_count", "version", "updated_at"])
 
 
 from apps.products.models import ProductVariant
 
 
+class CartItemQuerySet(models.QuerySet):
+    """
+    Keeps Cart.subtotal / item_count in sync on bulk writes.
+    """
+
+    def delete(self):
+        totals = list(
+            self.order_by()
+            .values("cart_id")
+            .annotate(subtotal=Sum("total_price"), count=Sum("quantity"))
+        )
+
+        result = super().delete()
+
+        for row in totals:
+            Cart.apply_delta(row["cart_id"], -row["subtotal"], -row["count"])
+
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def update(self, **kwargs):
+        """
+        total_price follows a new quantity / unit_price (from the
+        values given, or the row's own), then the carts touched are
+        recounted. Any other field only bumps their version.
+        """
+        cart_ids = set(self.values_list("cart_id", flat=True))
+
+        if {"quantity", "unit_price"} & kwargs.keys():
+            kwargs.setdefault("total_price", ExpressionWrapper(
+                kwargs.get("unit_price", F("unit_price"))
+                * kwargs.get("quantity", F("quantity")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ))
+
+        rows = super().update(**kwargs)
+
+        if not cart_ids:
+            return rows
+
+        if {"quantity", "unit_price", "total_price"} & kwargs.keys():
+            Cart.recount(cart_ids)
+        else:
+            Cart.objects.filter(pk__in=cart_ids).update(
+                version=F("version") + 1,
+                updated_at=timezone.now(),
+            )
+
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+
+        deltas = {}
+        for obj in objs:
+            obj.total_price = obj.unit_price * obj.quantity
+            subtotal, count = deltas.get(obj.cart_id, (0, 0))
+            deltas[obj.cart_id] = (subtotal + obj.total_price, count + obj.quantity)
+
+        created = super().bulk_create(objs, *args, **kwargs)
+
+        for obj in created:
+            obj._stored = (obj.total_price, obj.quantity)
+
+        for cart_id, (subtotal, count) in deltas.items():
+            Cart.apply_delta(cart_id, subtotal, count)
+
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+        Django writes each batch through update(), which recounts the
+        carts touched; only total_price has to follow here.
+        """
+        objs = list(objs)
+        fields = list(fields)
+
+        if {"quantity", "unit_price"} & set(fields):
+            if "total_price" not in fields:
+                fields.append("total_price")
+            for obj in objs:
+                obj.total_price = obj.unit_price * obj.quantity
+
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+
+        for obj in objs:
+            obj._stored = (obj.total_price, obj.quantity)
+
+        return updated
+
+    bulk_update.alters_data = True
+
 
 class CartItem(models.Model):
     cart = models.ForeignKey(
@@ -87,6 +259,8 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartItemQuerySet.as_manager()
+
     class Meta:
         unique_together = ("cart", "variant")
         indexes = [
@@ -94,9 +268,38 @@ class CartItem(models.Model):
             models.Index(fields=["variant"]),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the cart totals hold for this item, so a save applies
+        # only the difference
+        if {"total_price", "quantity"} <= set(field_names):
+            instance._stored = (instance.total_price, instance.quantity)
+        return instance
+
     def save(self, *args, **kwargs):
         self.total_price = self.unit_price * self.quantity
+
+        stored = (Decimal("0.00"), 0) if self._state.adding else getattr(self, "_stored", None)
+
         super().save(*args, **kwargs)
 
+        if stored is None:
+            Cart.objects.get(pk=self.cart_id).recalculate_totals()
+        else:
+            Cart.apply_delta(
+                self.cart_id,
+                self.total_price - stored[0],
+                self.quantity - stored[1],
+            )
+
+        self._stored = (self.total_price, self.quantity)
+
+    def delete(self, *args, **kwargs):
+        total_price, quantity = getattr(self, "_stored", (self.total_price, self.quantity))
+        result = super().delete(*args, **kwargs)
+        Cart.apply_delta(self.cart_id, -total_price, -quantity)
+        return result
+
     def __str__(self):
         return f"{self.variant} x {self.quantity}"
\ No newline at end of file
@@ -1,27 +1,27 @@
 from decimal import Decimal
-from apps.cart.models import CartItem
-from core.pricing import PricingEngine
+
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.cart.models import Cart, CartItem
+from apps.common.db import bulk_update_values
+from apps.products.models import Inventory
 
 
 class CartService:
 
     @staticmethod
     def get_cart_summary(user):
+        """
+        Totals from the cart's running subtotal / item_count: one
+        single-row read (or cache read), whatever the number of items.
+        """
+        from .store import get_cart_store
 
-        cart_items = (
-            CartItem.objects
-            .select_related("variant")
-            .filter(cart__user=user)
-        )
-
-        subtotal = Decimal("0.00")
-        item_count = 0
-
-        for item in cart_items:
-            subtotal += item.total_price
-            item_count += item.quantity
+        cart = get_cart_store().summary(user)
 
-        pricing = PricingEngine.calculate(subtotal)
+        pricing = cart.pricing
 
         return {
             "subtotal": pricing["subtotal"],
@@ -29,5 +29,349 @@ class CartService:
             "shipping": pricing["shipping"],
             "discount": pricing["discount"],
             "total": pricing["total"],
-            "item_count": item_count,
-        }
\ No newline at end of file
+            "item_count": cart.item_count,
+        }
+
+    # ----------------------------------------------------------------------
+    # BATCH
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def apply_operations(operations, inventories, lines, new_line):
+        """
+        Run add / set / remove operations in memory.
+
+        inventories: variant id -> Inventory with variant__product loaded.
+        lines: variant id -> CartItem, updated in place; a removed line
+        is left with quantity 0. new_line(variant) makes the line of a
+        variant not in the cart yet.
+
+        Returns one result per operation; a failed one carries a code
+        (not_found, unavailable, insufficient_stock) and a detail.
+        """
+        results = []
+
+        for index, operation in enumerate(operations):
+            variant_id = operation["variant_id"]
+            item = lines.get(variant_id)
+
+            result = {"index": index, "op": operation["op"], "variant_id": variant_id}
+            results.append(result)
+
+            if operation["op"] == "remove":
+                # Deleted at the end, unless a later operation adds it back
+                if item is not None:
+                    item.quantity = 0
+                result.update(success=True, quantity=0)
+                continue
+
+            inventory = inventories.get(variant_id)
+            if inventory is None:
+                result.update(
+                    success=False, code="not_found", detail="Product variant not found."
+                )
+                continue
+
+            variant = inventory.variant
+            if not variant.is_active or not variant.product.is_active:
+                result.update(
+                    success=False, code="unavailable", detail="Product is no longer available."
+                )
+                continue
+
+            current = item.quantity if item is not None else 0
+            quantity = (
+                current + operation["quantity"]
+                if operation["op"] == "add" else operation["quantity"]
+            )
+
+            if quantity and inventory.available_stock < quantity:
+                result.update(
+                    success=False, code="insufficient_stock", detail="Insufficient stock."
+                )
+                continue
+
+            if item is None:
+                item = lines[variant_id] = new_line(variant)
+
+            item.quantity = quantity
+            if quantity:
+                item.unit_price = variant.selling_price
+                item.discount_percent = variant.discount_percent
+
+            result.update(success=True, quantity=quantity)
+
+        return results
+
+    @staticmethod
+    @transaction.atomic
+    def apply_batch(user, operations):
+        """
+        Apply an ordered list of {"op": "add" | "set" | "remove",
+        "variant_id", "quantity"} to the user's cart with a fixed
+        number of queries: every Inventory row is locked in one query
+        ordered by id (so concurrent batches can't deadlock), the
+        operations run in memory, lines are written with one
+        bulk_create / bulk_update / delete and the totals with one delta.
+
+        A failing operation is reported and skipped, the others still
+        apply. Returns (cart, results), one result per operation.
+        """
+        variant_ids = {operation["variant_id"] for operation in operations}
+
+        inventories = {
+            inventory.variant_id: inventory
+            for inventory in (
+                Inventory.objects
+                .select_for_update(of=("self",))
+                .select_related("variant__product")
+                .filter(variant_id__in=variant_ids)
+                .order_by("pk")
+            )
+        }
+
+        cart, _ = Cart.objects.select_for_update().get_or_create(user=user)
+
+        lines = {
+            item.variant_id: item
+            for item in CartItem.objects.select_for_update().filter(
+                cart=cart, variant_id__in=variant_ids
+            )
+        }
+        stored = {
+            variant_id: (item.quantity, item.unit_price, item.discount_percent, item.total_price)
+            for variant_id, item in lines.items()
+        }
+
+        results = CartService.apply_operations(
+            operations,
+            inventories,
+            lines,
+            lambda variant: CartItem(cart=cart, variant=variant, quantity=0),
+        )
+
+        # ------------------------------------------------------------------
+        # WRITE
+        # ------------------------------------------------------------------
+
+        now = timezone.now()
+        created, changed, removed = [], [], []
+        subtotal_delta, count_delta = Decimal("0.00"), 0
+
+        for variant_id, item in lines.items():
+            before = stored.get(variant_id)
+
+            if item.quantity:
+                item.total_price = item.unit_price * item.quantity
+                subtotal_delta += item.total_price
+                count_delta += item.quantity
+
+            if before is not None:
+                subtotal_delta -= before[3]
+                count_delta -= before[0]
+
+            if not item.quantity:
+                if item.pk is not None:
+                    removed.append(item.pk)
+            elif item.pk is None:
+                created.append(item)
+            elif (item.quantity, item.unit_price, item.discount_percent) != before[:3]:
+                item.updated_at = now
+                changed.append(item)
+
+        # The plain manager: CartItemQuerySet would apply one delta per
+        # write, the batch applies its net delta once below
+        items = CartItem._base_manager
+
+        if created:
+            items.bulk_create(created)
+        if changed:
+            items.bulk_update(
+                changed,
+                ["quantity", "unit_price", "discount_percent", "total_price", "updated_at"],
+            )
+        if removed:
+            items.filter(pk__in=removed).delete()
+
+        if created or changed or removed:
+            Cart.apply_delta(cart.pk, subtotal_delta, count_delta)
+
+        # The row is locked, so the stored totals plus the delta are current
+        cart.subtotal += subtotal_delta
+        cart.item_count += count_delta
+
+        return cart, results
+
+    # ----------------------------------------------------------------------
+    # MERGE
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    @transaction.atomic
+    def merge_lines(user, lines):
+        """
+        Add {variant_id: quantity} (e.g. a guest cart at login) to the
+        user's cart with one upsert:
+
+            INSERT INTO cart_cartitem (...) VALUES (...), ...
+            ON CONFLICT (cart_id, variant_id) DO UPDATE SET
+                quantity = EXCLUDED.quantity, at the current price
+
+        Locks like apply_batch (inventories by id, the cart, its lines
+        for these variants), so the summed quantities are computed from
+        rows nobody else can change. Unavailable variants are skipped
+        and each line, stored plus merged, is capped at the available
+        stock. Returns the number of lines merged.
+        """
+        inventories = list(
+            Inventory.objects
+            .select_for_update(of=("self",))
+            .select_related("variant__product")
+            .filter(variant_id__in=list(lines))
+            .order_by("pk")
+        )
+
+        cart, _ = Cart.objects.select_for_update().get_or_create(user=user)
+
+        stored = dict(
+            CartItem.objects.select_for_update()
+            .filter(cart=cart, variant_id__in=list(lines))
+            .values_list("variant_id", "quantity")
+        )
+
+        rows = []
+        for inventory in inventories:
+            variant = inventory.variant
+            if not variant.is_active or not variant.product.is_active:
+                continue
+
+            current = stored.get(variant.id, 0)
+            quantity = min(current + lines[variant.id], inventory.available_stock)
+            if quantity <= current:
+                continue
+
+            rows.append((variant.id, quantity, variant.selling_price, variant.discount_percent))
+
+        if not rows:
+            return 0
+
+        now = timezone.now()
+
+        opts = CartItem._meta
+        quote = connection.ops.quote_name
+        table = quote(opts.db_table)
+
+        def column(name):
+            return quote(opts.get_field(name).column)
+
+        fields = [
+            "cart", "variant", "quantity", "unit_price", "discount_percent",
+            "total_price", "created_at", "updated_at",
+        ]
+        model_fields = [opts.get_field(name) for name in fields]
+        placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+
+        params = [
+            field.get_db_prep_save(value, connection)
+            for variant_id, quantity, unit_price, discount_percent in rows
+            for field, value in zip(model_fields, (
+                cart.pk, variant_id, quantity, unit_price, discount_percent,
+                unit_price * quantity, now, now,
+            ))
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(column(name) for name in fields)}) "
+                f"VALUES {', '.join([placeholder] * len(rows))} "
+                f"ON CONFLICT ({column('cart')}, {column('variant')}) DO UPDATE SET "
+                f"{column('quantity')} = EXCLUDED.{column('quantity')}, "
+                f"{column('unit_price')} = EXCLUDED.{column('unit_price')}, "
+                f"{column('discount_percent')} = EXCLUDED.{column('discount_percent')}, "
+                f"{column('total_price')} = EXCLUDED.{column('total_price')}, "
+                f"{column('updated_at')} = EXCLUDED.{column('updated_at')}",
+                params,
+            )
+
+        # Raw SQL skips CartItemQuerySet: recount this one cart
+        totals = cart.items.aggregate(subtotal=Sum("total_price"), count=Sum("quantity"))
+        Cart.objects.filter(pk=cart.pk).update(
+            subtotal=totals["subtotal"] or Decimal("0.00"),
+            item_count=totals["count"] or 0,
+            version=F("version") + 1,
+            updated_at=now,
+        )
+
+        return len(rows)
+
+
+class CartTotalsService:
+    """
+    Finds and repairs carts whose running subtotal / item_count no
+    longer match their items, e.g. after raw SQL or a write that
+    bypassed CartItem / CartItemQuerySet.
+    """
+
+    @staticmethod
+    def check_range(first_id, last_id, repair=True):
+        """
+        Recount the carts with first_id <= pk <= last_id.
+        Returns (checked, drifted).
+        """
+        with transaction.atomic():
+            carts = Cart.objects.filter(pk__gte=first_id, pk__lte=last_id)
+            if repair:
+                carts = carts.select_for_update()
+
+            stored = {
+                pk: (subtotal, count)
+                for pk, subtotal, count in carts.values_list("pk", "subtotal", "item_count")
+            }
+
+            actual = {
+                row["cart_id"]: (row["subtotal"], row["count"])
+                for row in (
+                    CartItem.objects
+                    .filter(cart_id__in=list(stored))
+                    .order_by()
+                    .values("cart_id")
+                    .annotate(subtotal=Sum("total_price"), count=Sum("quantity"))
+                )
+            }
+
+            drifted = []
+            for pk, (subtotal, count) in stored.items():
+                expected = actual.get(pk, (Decimal("0.00"), 0))
+                if (subtotal, count) != expected:
+                    drifted.append((pk, *expected))
+
+            if repair and drifted:
+                bulk_update_values(Cart, drifted, ["subtotal", "item_count"])
+                # Tells a cache-backed cart store the tables changed
+                Cart.objects.filter(pk__in=[row[0] for row in drifted]).update(
+                    version=F("version") + 1
+                )
+
+        return len(stored), len(drifted)
+
+    @staticmethod
+    def check(chunk_size=2000, repair=True, progress=None):
+        """
+        Recount every cart in chunks of chunk_size ids.
+        Returns (checked, drifted); progress(checked, drifted) is
+        called after every chunk.
+        """
+        ids = list(Cart.objects.order_by("pk").values_list("pk", flat=True))
+
+        checked = drifted = 0
+
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            done, found = CartTotalsService.check_range(chunk[0], chunk[-1], repair)
+            checked += done
+            drifted += found
+
+            if progress:
+                progress(checked, drifted)
+
+        return checked, drifted
@@ -0,0 +1,675 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+
+from apps.products.models import Inventory, ProductVariant
+
+from .api.serializers import CART_ITEMS_PREFETCH
+from .models import Cart, CartItem
+from .services import CartService
+
+
+logger = logging.getLogger(__name__)
+
+
+class CartLockTimeout(APIException):
+    """
+    The per-user cart lock stayed taken for lock_wait seconds.
+    """
+
+    status_code = 503
+    default_detail = "The cart is busy, please try again."
+    default_code = "cart_busy"
+
+
+class CartSnapshot:
+    """
+    A cart as read from a cache entry: the attributes CartSerializer /
+    CartTotalsSerializer read from a Cart, totals derived the same way.
+    """
+
+    pricing = Cart.pricing
+    tax_amount = Cart.tax_amount
+    shipping_amount = Cart.shipping_amount
+    total_amount = Cart.total_amount
+
+    def __init__(self, cart_id, subtotal, item_count, items=None):
+        self.id = self.pk = cart_id
+        self.subtotal = subtotal
+        self.item_count = item_count
+        self.items = items if items is not None else []
+
+
+class BaseCartStore:
+    """
+    Where the cart API reads and writes carts.
+
+    Code that writes CartItem rows itself (checkout, validation, the
+    wishlist) calls flush() before reading them and invalidate() once
+    its transaction has committed.
+    """
+
+    def summary(self, user):
+        """
+        Totals only (subtotal, item_count, tax, total): header badge,
+        mini-cart.
+        """
+        raise NotImplementedError
+
+    def get(self, user, with_item_ids=False):
+        """
+        The cart with its items, for CartSerializer, or None.
+        with_item_ids: every item must carry its database id (the cart
+        page edits items by id).
+        """
+        raise NotImplementedError
+
+    def apply(self, user, operations):
+        """
+        Run add / set / remove operations (see
+        CartService.apply_operations). Returns (cart totals, results).
+        """
+        raise NotImplementedError
+
+    def clear(self, user):
+        raise NotImplementedError
+
+    def item_variant(self, user, item_id):
+        """
+        Variant id of the user's cart item item_id, or None.
+        """
+        raise NotImplementedError
+
+    def flush(self, user):
+        """
+        Write changes still held by the store to the tables now.
+        """
+
+    def invalidate(self, user):
+        """
+        Forget what the store holds after the tables were written directly.
+        """
+
+
+# --------------------------------------------------------------------------
+# DATABASE
+# --------------------------------------------------------------------------
+
+class DatabaseCartStore(BaseCartStore):
+    """
+    Reads and writes the Cart / CartItem tables directly.
+    """
+
+    def summary(self, user):
+        return (
+            Cart.objects
+            .filter(user=user)
+            .only("subtotal", "item_count")
+            .first()
+        ) or Cart(user=user)
+
+    def get(self, user, with_item_ids=False):
+        return (
+            Cart.objects
+            .prefetch_related(CART_ITEMS_PREFETCH)
+            .filter(user=user)
+            .first()
+        )
+
+    def apply(self, user, operations):
+        return CartService.apply_batch(user, operations)
+
+    @transaction.atomic
+    def clear(self, user):
+        cart = Cart.objects.select_for_update().filter(user=user).first()
+        if cart is None:
+            return None
+
+        cart.items.all().delete()
+        cart.refresh_totals()
+        return cart
+
+    def item_variant(self, user, item_id):
+        return (
+            CartItem.objects
+            .filter(pk=item_id, cart__user=user)
+            .values_list("variant_id", flat=True)
+            .first()
+        )
+
+
+# --------------------------------------------------------------------------
+# CACHE (WRITE-BEHIND)
+# --------------------------------------------------------------------------
+
+class CacheCartStore(BaseCartStore):
+    """
+    Keeps each user's cart lines in the Django cache and writes them
+    back to the tables asynchronously.
+
+    An entry holds the lines as (variant id, item id, quantity, unit
+    price, discount) and two versions: `version`, bumped by every write
+    to the entry, and `base`, the Cart.version of the tables it was
+    built on, with `base_lines`, their quantities then. Writes update
+    the entry under a per-user cache lock and mark the user dirty; a
+    daemon thread per process flushes dirty carts every `interval`
+    seconds, and flush() does it right away for checkout and
+    validation. A flush writes the whole entry in one transaction. If
+    anything else wrote the tables since `base` (checkout, a guest cart
+    merge, repair_cart_totals), the entry's changes are rebased: each
+    line's quantity change since `base_lines` is applied to the rows
+    as they are now.
+
+    A missing entry (first read, cache restart, eviction) is rebuilt
+    from the tables; changes not yet flushed when an entry is evicted
+    are lost, so production needs a shared cache that doesn't evict
+    them early. Items added since the last flush have no id yet.
+
+    Stock is checked on write without locking inventory; checkout and
+    validation check it again under lock.
+    """
+
+    key_prefix = "cart:v2"
+    timeout = 60 * 60 * 24 * 30
+    lock_timeout = 10
+    lock_wait = 5
+
+    def __init__(self, cache_alias=None, interval=None):
+        self.cache = caches[
+            cache_alias or getattr(settings, "CART_STORE_CACHE_ALIAS", "default")
+        ]
+        self.interval = (
+            getattr(settings, "CART_STORE_FLUSH_INTERVAL", 2)
+            if interval is None else interval
+        )
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = False
+
+    # ----------------------------------------------------------------------
+    # ENTRIES
+    # ----------------------------------------------------------------------
+
+    def key(self, user_id):
+        return f"{self.key_prefix}:{user_id}"
+
+    @contextmanager
+    def _locked(self, user_id):
+        # Expires on its own if the holder dies; waiting for it is bounded
+        # too, in case the backend keeps it longer
+        key = f"{self.key(user_id)}:lock"
+        deadline = time.monotonic() + self.lock_wait
+        while not self.cache.add(key, 1, timeout=self.lock_timeout):
+            if time.monotonic() >= deadline:
+                raise CartLockTimeout()
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            self.cache.delete(key)
+
+    def rebuild(self, user_id):
+        """
+        Crash recovery: the entry as the tables hold it. Only stored if
+        no entry appeared meanwhile.
+        """
+        cart, _ = Cart.objects.get_or_create(user_id=user_id)
+
+        lines = list(
+            cart.items.order_by("pk").values_list(
+                "variant_id", "pk", "quantity", "unit_price", "discount_percent"
+            )
+        )
+
+        entry = {
+            "cart_id": cart.pk,
+            "version": cart.version,
+            "base": cart.version,
+            "base_lines": self._quantities(lines),
+            "flushing": None,
+            "dirty": False,
+            "lines": lines,
+        }
+
+        key = self.key(user_id)
+        if self.cache.add(key, entry, self.timeout):
+            return entry
+        return self.cache.get(key) or entry
+
+    def _entry(self, user_id):
+        entry = self.cache.get(self.key(user_id))
+        return entry if entry is not None else self.rebuild(user_id)
+
+    @staticmethod
+    def _quantities(lines):
+        return {line[0]: line[2] for line in lines}
+
+    @staticmethod
+    def _snapshot(entry, items=None):
+        return CartSnapshot(
+            entry["cart_id"],
+            sum(
+                (unit_price * quantity for _, _, quantity, unit_price, _ in entry["lines"]),
+                Decimal("0.00"),
+            ),
+            sum(line[2] for line in entry["lines"]),
+            items,
+        )
+
+    # ----------------------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------------------
+
+    def summary(self, user):
+        return self._snapshot(self._entry(user.pk))
+
+    def get(self, user, with_item_ids=False):
+        entry = self._entry(user.pk)
+
+        if with_item_ids and any(line[1] is None for line in entry["lines"]):
+            entry = self._flush(user.pk) or self._entry(user.pk)
+
+        variants = (
+            ProductVariant.objects
+            .select_related("product", "inventory")
+            .prefetch_related("product__images")
+            .in_bulk([line[0] for line in entry["lines"]])
+        )
+
+        items = [
+            CartItem(
+                id=item_id,
+                cart_id=entry["cart_id"],
+                variant=variants[variant_id],
+                quantity=quantity,
+                unit_price=unit_price,
+                discount_percent=discount_percent,
+                total_price=unit_price * quantity,
+            )
+            for variant_id, item_id, quantity, unit_price, discount_percent in entry["lines"]
+            if variant_id in variants
+        ]
+
+        return self._snapshot(entry, items)
+
+    def item_variant(self, user, item_id):
+        for variant_id, line_id, *_ in self._entry(user.pk)["lines"]:
+            if line_id == item_id:
+                return variant_id
+        return None
+
+    # ----------------------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------------------
+
+    def _write(self, user_id, entry, lines):
+        entry = {
+            **entry,
+            "version": entry["version"] + 1,
+            "dirty": True,
+            "lines": lines,
+        }
+        self.cache.set(self.key(user_id), entry, self.timeout)
+        return entry
+
+    def apply(self, user, operations):
+        inventories = {
+            inventory.variant_id: inventory
+            for inventory in Inventory.objects.select_related("variant__product").filter(
+                variant_id__in={operation["variant_id"] for operation in operations}
+            )
+        }
+
+        with self._locked(user.pk):
+            entry = self._entry(user.pk)
+
+            lines = {
+                variant_id: CartItem(
+                    id=item_id,
+                    variant_id=variant_id,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    discount_percent=discount_percent,
+                )
+                for variant_id, item_id, quantity, unit_price, discount_percent in entry["lines"]
+            }
+
+            results = CartService.apply_operations(
+                operations,
+                inventories,
+                lines,
+                lambda variant: CartItem(variant=variant, quantity=0),
+            )
+
+            if any(result["success"] for result in results):
+                entry = self._write(user.pk, entry, [
+                    (variant_id, item.id, item.quantity, item.unit_price, item.discount_percent)
+                    for variant_id, item in lines.items()
+                    if item.quantity
+                ])
+
+        if entry["dirty"]:
+            self._schedule(user.pk)
+
+        return self._snapshot(entry), results
+
+    def clear(self, user):
+        with self._locked(user.pk):
+            entry = self._write(user.pk, self._entry(user.pk), [])
+
+        self._schedule(user.pk)
+        return self._snapshot(entry)
+
+    def invalidate(self, user):
+        with self._locked(user.pk):
+            entry = self.cache.get(self.key(user.pk))
+            if entry is None:
+                return
+
+            # Written while the tables were: rebased onto them at its flush
+            if entry["dirty"]:
+                self._schedule(user.pk)
+                return
+
+            self.cache.delete(self.key(user.pk))
+
+    # ----------------------------------------------------------------------
+    # FLUSH
+    # ----------------------------------------------------------------------
+
+    def flush(self, user):
+        self._flush(user.pk)
+
+    def _flush(self, user_id):
+        """
+        Returns the entry as flushed, with the ids of new items, or
+        None if there was nothing to flush.
+        """
+        with self._locked(user_id):
+            entry = self.cache.get(self.key(user_id))
+            if entry is None or not entry["dirty"]:
+                return None
+
+            persisted = self._persist(user_id, entry)
+            if persisted is None:
+                self.cache.delete(self.key(user_id))
+                return None
+
+            entry = {**entry, **persisted}
+            version = entry["version"]
+
+            # Stays dirty until the transaction commits: rolled back, the
+            # next flush writes it again on top of `base`
+            entry["flushing"] = (version, self._quantities(entry["lines"]))
+            self.cache.set(self.key(user_id), entry, self.timeout)
+
+        transaction.on_commit(lambda: self._persisted(user_id, version))
+
+        return entry
+
+    @transaction.atomic
+    def _persist(self, user_id, entry):
+        """
+        Make the tables hold the entry, rebased onto them if they moved
+        on since the entry was built. Returns the entry's new lines (with
+        item ids) and version, and the base / base_lines of the tables
+        they were written on top of; None if the cart is gone (deleted
+        with its user).
+        """
+        cart = Cart.objects.select_for_update().filter(pk=entry["cart_id"]).first()
+        if cart is None:
+            return None
+
+        stored = {
+            item.variant_id: item
+            for item in CartItem.objects.select_for_update().filter(cart=cart).order_by("pk")
+        }
+
+        base, base_lines = entry["base"], entry["base_lines"]
+
+        # Flushed before, but the commit callback hasn't run (yet)
+        flushing = entry["flushing"]
+        if flushing is not None and cart.version == flushing[0]:
+            base, base_lines = flushing
+
+        lines, version = entry["lines"], entry["version"]
+
+        if cart.version != base:
+            logger.info(
+                "Cart of user %s changed in the database since it was cached, "
+                "rebasing the cached changes", user_id,
+            )
+            lines = self._rebase(lines, base_lines, stored)
+            version = max(cart.version, version) + 1
+            base, base_lines = cart.version, {
+                variant_id: item.quantity for variant_id, item in stored.items()
+            }
+
+        now = timezone.now()
+        created, changed, ids = [], [], {}
+        subtotal, item_count = Decimal("0.00"), 0
+
+        for variant_id, _, quantity, unit_price, discount_percent in lines:
+            total_price = unit_price * quantity
+            subtotal += total_price
+            item_count += quantity
+
+            item = stored.pop(variant_id, None)
+            if item is not None:
+                ids[variant_id] = item.pk
+
+            if item is None:
+                created.append(CartItem(
+                    cart=cart,
+                    variant_id=variant_id,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    discount_percent=discount_percent,
+                    total_price=total_price,
+                ))
+            elif (item.quantity, item.unit_price, item.discount_percent) != (
+                quantity, unit_price, discount_percent
+            ):
+                item.quantity = quantity
+                item.unit_price = unit_price
+                item.discount_percent = discount_percent
+                item.total_price = total_price
+                item.updated_at = now
+                changed.append(item)
+
+        # The plain manager: the totals are set outright below
+        items = CartItem._base_manager
+
+        if created:
+            items.bulk_create(created)
+        if changed:
+            items.bulk_update(
+                changed,
+                ["quantity", "unit_price", "discount_percent", "total_price", "updated_at"],
+            )
+        if stored:
+            items.filter(pk__in=[item.pk for item in stored.values()]).delete()
+
+        Cart.objects.filter(pk=cart.pk).update(
+            subtotal=subtotal,
+            item_count=item_count,
+            version=version,
+            updated_at=now,
+        )
+
+        ids.update((item.variant_id, item.pk) for item in created if item.pk)
+
+        return {
+            "lines": self._with_ids(lines, ids),
+            "version": version,
+            "base": base,
+            "base_lines": base_lines,
+        }
+
+    @staticmethod
+    def _rebase(lines, base_lines, stored):
+        """
+        The lines as stored, plus each cached line's quantity change
+        since base_lines (at its cached price). A line whose quantity
+        the cache didn't change keeps the stored row as it is.
+        """
+        rebased = {
+            variant_id: [item.pk, item.quantity, item.unit_price, item.discount_percent]
+            for variant_id, item in stored.items()
+        }
+
+        for variant_id, _, quantity, unit_price, discount_percent in lines:
+            delta = quantity - base_lines.get(variant_id, 0)
+            if not delta:
+                continue
+
+            line = rebased.setdefault(variant_id, [None, 0, unit_price, discount_percent])
+            line[1] += delta
+            line[2], line[3] = unit_price, discount_percent
+
+        # Removed from the cached cart
+        cached = {line[0] for line in lines}
+        for variant_id, quantity in base_lines.items():
+            if variant_id not in cached and variant_id in rebased:
+                rebased[variant_id][1] -= quantity
+
+        return [
+            (variant_id, *line)
+            for variant_id, line in rebased.items()
+            if line[1] > 0
+        ]
+
+    def _persisted(self, user_id, version):
+        try:
+            with self._locked(user_id):
+                entry = self.cache.get(self.key(user_id))
+                if entry is None or entry["flushing"] is None or entry["flushing"][0] != version:
+                    return
+
+                self.cache.set(self.key(user_id), {
+                    **entry,
+                    "base": version,
+                    "base_lines": entry["flushing"][1],
+                    "flushing": None,
+                    "dirty": entry["version"] > version,
+                }, self.timeout)
+        except CartLockTimeout:
+            # The next flush finds the tables at `flushing` and moves on
+            logger.warning("Cart of user %s stays dirty after its flush", user_id)
+
+    @staticmethod
+    def _with_ids(lines, ids):
+        return [
+            (variant_id, ids.get(variant_id, item_id), *rest)
+            for variant_id, item_id, *rest in lines
+        ]
+
+    # ----------------------------------------------------------------------
+    # WRITE-BEHIND
+    # ----------------------------------------------------------------------
+
+    def _schedule(self, user_id):
+        # Forked after the store was created: the parent flushes its own
+        if self._pid != os.getpid():
+            self._reset()
+
+        with self._lock:
+            self._dirty.add(user_id)
+
+            if self._started:
+                return
+            self._started = True
+
+            if self.interval:
+                self._thread = threading.Thread(
+                    target=self._run, name="cart-store-flusher", daemon=True
+                )
+                self._thread.start()
+
+        atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush_pending()
+
+    def flush_pending(self):
+        """
+        Flush every cart written in this process since the last run.
+        Returns the number of carts flushed.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+
+        flushed = 0
+        try:
+            for user_id in dirty:
+                try:
+                    self._flush(user_id)
+                    flushed += 1
+                except Exception:
+                    logger.exception("Flushing the cart of user %s failed", user_id)
+                    with self._lock:
+                        self._dirty.add(user_id)
+        finally:
+            # Connections are per thread: don't leave the flusher's open
+            if threading.current_thread() is self._thread:
+                connections.close_all()
+
+        return flushed
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval or None)
+
+        # Still in the cache after a failure here: flushed at checkout or
+        # with the next write of the same cart
+        self.flush_pending()
+
+
+class LocalMemoryCartStore(CacheCartStore):
+    """
+    CacheCartStore on a private local-memory cache and without the
+    flusher thread, for tests: writes stay in the cache until
+    flush_pending(), flush() or checkout. An entry only counts as
+    flushed once the transaction commits, so in a TestCase flush within
+    captureOnCommitCallbacks(execute=True).
+    """
+
+    def __init__(self, interval=0):
+        super().__init__(interval=interval)
+        self.cache = LocMemCache("cart-store", {"TIMEOUT": None})
+
+
+_store = None
+
+
+def get_cart_store():
+    """
+    settings.CART_STORE_BACKEND (dotted path) if set, the database otherwise.
+    """
+    global _store
+
+    if _store is None:
+        path = getattr(settings, "CART_STORE_BACKEND", None)
+        _store = import_string(path)() if path else DatabaseCartStore()
+
+    return _store
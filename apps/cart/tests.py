@@ -1,3 +1,698 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.orders.models import Order
+from apps.orders.services import OrderService
+from apps.products.models import (
+    Category,
+    Inventory,
+    Product,
+    ProductMetrics,
+    ProductType,
+    ProductVariant,
+)
+
+from . import store as store_module
+from .anonymous import AnonymousCart
+from .models import Cart, CartItem
+from .services import CartService, CartTotalsService
+from .store import LocalMemoryCartStore
+
+
+def make_variants(name="Cart Tee", sizes=("S", "M", "L", "XL"), stock=50):
+    category, _ = Category.objects.get_or_create(name="Men", defaults={"slug": "men"})
+    product_type, _ = ProductType.objects.get_or_create(name="Tee", defaults={"slug": "tee"})
+    product = Product.objects.create(
+        name=name,
+        description=f"{name} description",
+        category=category,
+        product_type=product_type,
+    )
+    ProductMetrics.objects.create(product=product)
+
+    variants = []
+    for index, size in enumerate(sizes):
+        variant = ProductVariant.objects.create(
+            product=product,
+            size=size,
+            price=Decimal(100 + 10 * index),
+            discount_percent=Decimal("10.00"),
+        )
+        variant.inventory.stock = stock
+        variant.inventory.save()
+        variants.append(variant)
+
+    return variants
+
+
+def make_user(email):
+    return get_user_model().objects.create_user(email=email, password="pw12345678!")
+
+
+def add_line(cart, variant, quantity):
+    return CartItem.objects.create(
+        cart=cart,
+        variant=variant,
+        quantity=quantity,
+        unit_price=variant.selling_price,
+        discount_percent=variant.discount_percent,
+    )
+
+
+# --------------------------------------------------------------------------
+# RUNNING TOTALS
+# --------------------------------------------------------------------------
+
+class CartRunningTotalsTests(TestCase):
+    """
+    Every CartItem write path keeps Cart.subtotal / item_count equal to
+    a recount and bumps Cart.version.
+    """
+
+    def setUp(self):
+        self.variants = make_variants()
+        self.cart, _ = Cart.objects.get_or_create(user=make_user("totals@example.com"))
+
+    def assertTotals(self, version_before=None):
+        cart = Cart.objects.get(pk=self.cart.pk)
+        items = list(CartItem.objects.filter(cart=cart))
+
+        for item in items:
+            self.assertEqual(item.total_price, item.unit_price * item.quantity)
+        self.assertEqual(cart.subtotal, sum((item.total_price for item in items), Decimal("0.00")))
+        self.assertEqual(cart.item_count, sum(item.quantity for item in items))
+        self.assertEqual(CartTotalsService.check(repair=False), (1, 0))
+
+        if version_before is not None:
+            self.assertGreater(cart.version, version_before)
+        return cart.version
+
+    def test_save_and_delete(self):
+        version = self.assertTotals()
+
+        item = add_line(self.cart, self.variants[0], 2)
+        version = self.assertTotals(version)
+
+        item.quantity = 5
+        item.save()
+        version = self.assertTotals(version)
+
+        # Same total, still a write
+        item.save()
+        version = self.assertTotals(version)
+
+        item = CartItem.objects.get(pk=item.pk)
+        item.delete()
+        self.assertTotals(version)
+
+    def test_queryset_writes(self):
+        version = self.assertTotals()
+
+        CartItem.objects.bulk_create([
+            CartItem(
+                cart=self.cart,
+                variant=variant,
+                quantity=index + 1,
+                unit_price=variant.selling_price,
+                discount_percent=variant.discount_percent,
+            )
+            for index, variant in enumerate(self.variants)
+        ])
+        version = self.assertTotals(version)
+
+        items = list(CartItem.objects.filter(cart=self.cart).order_by("pk"))
+        for item in items[:2]:
+            item.quantity += 3
+        CartItem.objects.bulk_update(items[:2], ["quantity"])
+        version = self.assertTotals(version)
+
+        CartItem.objects.filter(pk=items[0].pk).update(quantity=7)
+        version = self.assertTotals(version)
+
+        CartItem.objects.filter(cart=self.cart).update(unit_price=Decimal("9.99"))
+        version = self.assertTotals(version)
+
+        CartItem.objects.filter(cart=self.cart).update(discount_percent=Decimal("0.00"))
+        version = self.assertTotals(version)
+
+        CartItem.objects.filter(pk__in=[item.pk for item in items[1:3]]).delete()
+        self.assertTotals(version)
+
+    def test_repair_bumps_version(self):
+        add_line(self.cart, self.variants[0], 2)
+
+        # Behind the ORM's back
+        CartItem._base_manager.filter(cart=self.cart).update(quantity=9, total_price=Decimal("1.00"))
+        version = Cart.objects.get(pk=self.cart.pk).version
+
+        self.assertEqual(CartTotalsService.check(repair=True), (1, 1))
+        cart = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual((cart.subtotal, cart.item_count), (Decimal("1.00"), 9))
+        self.assertGreater(cart.version, version)
+
+        cart.recalculate_totals()
+        self.assertGreater(cart.version, version + 1)
+
+
+# --------------------------------------------------------------------------
+# BATCH
+# --------------------------------------------------------------------------
+
+class CartBatchTests(TestCase):
+
+    def setUp(self):
+        self.variants = [
+            variant
+            for index in range(10)
+            for variant in make_variants(f"Batch Tee {index}", stock=20)
+        ]
+        self.user = make_user("batch@example.com")
+        self.cart, _ = Cart.objects.get_or_create(user=self.user)
+
+    def quantities(self):
+        return dict(
+            CartItem.objects.filter(cart=self.cart).values_list("variant_id", "quantity")
+        )
+
+    def assertTotals(self, cart):
+        stored = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual((cart.subtotal, cart.item_count), (stored.subtotal, stored.item_count))
+        self.assertEqual(CartTotalsService.check(repair=False), (1, 0))
+
+    def batch(self, stored, changed, removed, created):
+        # Lines of `stored` in the cart, then every kind of write
+        CartItem.objects.filter(cart=self.cart).delete()
+        for variant in stored:
+            add_line(self.cart, variant, 2)
+
+        return (
+            [{"op": "set", "variant_id": variant.pk, "quantity": 5} for variant in changed]
+            + [{"op": "remove", "variant_id": variant.pk} for variant in removed]
+            + [{"op": "add", "variant_id": variant.pk, "quantity": 1} for variant in created]
+        )
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        variants = self.variants
+
+        operations = self.batch(variants[:2], variants[:1], variants[1:2], variants[2:3])
+        with CaptureQueriesContext(connection) as queries:
+            CartService.apply_batch(self.user, operations)
+        self.assertEqual(len(self.quantities()), 2)
+
+        operations = self.batch(variants[:20], variants[:10], variants[10:20], variants[20:40])
+        with self.assertNumQueries(len(queries)):
+            cart, results = CartService.apply_batch(self.user, operations)
+
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual(len(self.quantities()), 30)
+        self.assertTotals(cart)
+
+    def test_operations_apply_in_order(self):
+        first, second, third = self.variants[:3]
+        add_line(self.cart, first, 3)
+        add_line(self.cart, third, 1)
+
+        cart, results = CartService.apply_batch(self.user, [
+            {"op": "remove", "variant_id": first.pk},
+            {"op": "add", "variant_id": first.pk, "quantity": 2},
+            {"op": "add", "variant_id": second.pk, "quantity": 1},
+            {"op": "add", "variant_id": second.pk, "quantity": 2},
+            {"op": "add", "variant_id": third.pk, "quantity": 1},
+            {"op": "set", "variant_id": third.pk, "quantity": 0},
+        ])
+
+        self.assertEqual(
+            [result["quantity"] for result in results], [0, 2, 1, 3, 2, 0]
+        )
+        self.assertEqual(self.quantities(), {first.pk: 2, second.pk: 3})
+        self.assertTotals(cart)
+
+    def test_failed_operations_are_skipped(self):
+        first, second, third = self.variants[:3]
+        second.is_active = False
+        second.save()
+        add_line(self.cart, third, 19)
+
+        cart, results = CartService.apply_batch(self.user, [
+            {"op": "add", "variant_id": 10**9, "quantity": 1},
+            {"op": "add", "variant_id": second.pk, "quantity": 1},
+            {"op": "add", "variant_id": third.pk, "quantity": 2},
+            {"op": "set", "variant_id": first.pk, "quantity": 21},
+            {"op": "add", "variant_id": first.pk, "quantity": 4},
+        ])
+
+        self.assertEqual(
+            [(result["success"], result.get("code")) for result in results],
+            [
+                (False, "not_found"),
+                (False, "unavailable"),
+                (False, "insufficient_stock"),
+                (False, "insufficient_stock"),
+                (True, None),
+            ],
+        )
+        self.assertEqual(self.quantities(), {first.pk: 4, third.pk: 19})
+        self.assertTotals(cart)
+
+    def test_endpoint(self):
+        first, second = self.variants[:2]
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post("/api/cart/batch/", {"operations": [
+            {"op": "add", "variant_id": first.pk, "quantity": 2},
+            {"op": "add", "variant_id": second.pk},
+            {"op": "set", "variant_id": 10**9, "quantity": 1},
+        ]}, format="json")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [result["success"] for result in response.data["results"]], [True, True, False]
+        )
+        self.assertEqual(response.data["cart"]["item_count"], 3)
+        self.assertEqual(
+            Decimal(response.data["cart"]["subtotal"]),
+            first.selling_price * 2 + second.selling_price,
+        )
+        self.assertEqual(CartTotalsService.check(repair=False), (1, 0))
+
+        response = client.post("/api/cart/batch/", {"operations": [
+            {"op": "set", "variant_id": first.pk},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+# --------------------------------------------------------------------------
+# WRITE-BEHIND STORE
+# --------------------------------------------------------------------------
+
+class CartStoreTests(TestCase):
+    """
+    LocalMemoryCartStore: writes stay in the cache until flushed, and a
+    flush leaves the tables holding the entry.
+    """
+
+    def setUp(self):
+        self.store = store_module._store = LocalMemoryCartStore()
+        self.addCleanup(setattr, store_module, "_store", None)
+
+        self.variants = make_variants()
+        self.user = make_user("store@example.com")
+        self.cart, _ = Cart.objects.get_or_create(user=self.user)
+
+    def apply(self, *operations):
+        _, results = self.store.apply(self.user, [
+            {"op": op, "variant_id": self.variants[index].pk, "quantity": quantity}
+            for op, index, quantity in operations
+        ])
+        self.assertTrue(all(result["success"] for result in results), results)
+
+    def flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.store.flush_pending()
+
+    def entry(self):
+        return self.store.cache.get(self.store.key(self.user.pk))
+
+    def stored(self):
+        return {
+            variant_id: quantity
+            for variant_id, quantity in CartItem.objects.filter(cart=self.cart).values_list(
+                "variant_id", "quantity"
+            )
+        }
+
+    def quantities(self, *pairs):
+        return {self.variants[index].pk: quantity for index, quantity in pairs}
+
+    def assertFlushed(self):
+        entry = self.entry()
+        self.assertFalse(entry["dirty"])
+        self.assertIsNone(entry["flushing"])
+
+        cart = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual(entry["base"], cart.version)
+        self.assertEqual(self.stored(), {line[0]: line[2] for line in entry["lines"]})
+        self.assertEqual(
+            (cart.subtotal, cart.item_count),
+            (self.store.summary(self.user).subtotal, self.store.summary(self.user).item_count),
+        )
+        self.assertEqual(CartTotalsService.check(repair=False), (1, 0))
+
+    def test_flush(self):
+        self.apply(("add", 0, 2), ("add", 1, 1), ("add", 2, 4))
+        self.assertEqual(self.stored(), {})
+        self.assertEqual(self.store.summary(self.user).item_count, 7)
+
+        self.assertEqual(self.flush(), 1)
+        self.assertFlushed()
+        self.assertEqual(self.stored(), self.quantities((0, 2), (1, 1), (2, 4)))
+
+        self.apply(("set", 0, 5), ("remove", 1, 0), ("add", 3, 1))
+        self.flush()
+        self.assertFlushed()
+        self.assertEqual(self.stored(), self.quantities((0, 5), (2, 4), (3, 1)))
+
+        # Nothing left to write
+        self.assertEqual(self.flush(), 0)
+
+    def test_rebase_keeps_both_sides(self):
+        self.apply(("add", 0, 2))
+        self.flush()
+
+        # Cached, then the tables move on underneath (a guest cart merge
+        # from another process) before the flush
+        self.apply(("add", 0, 3), ("add", 1, 1))
+        CartService.merge_lines(self.user, self.quantities((0, 4), (2, 2)))
+        self.assertEqual(self.stored(), self.quantities((0, 6), (2, 2)))
+
+        with self.assertLogs("apps.cart.store", "INFO"):
+            self.flush()
+        self.assertFlushed()
+        self.assertEqual(self.stored(), self.quantities((0, 9), (1, 1), (2, 2)))
+
+    def test_rebase_after_checkout_removed_the_rows(self):
+        self.apply(("add", 0, 2), ("add", 1, 1))
+        self.flush()
+
+        self.apply(("add", 2, 3))
+        CartItem.objects.filter(cart=self.cart).delete()
+
+        with self.assertLogs("apps.cart.store", "INFO"):
+            self.flush()
+        self.assertFlushed()
+        self.assertEqual(self.stored(), self.quantities((2, 3)))
+
+    def test_rolled_back_flush_is_written_once(self):
+        self.apply(("add", 0, 2))
+        self.flush()
+        self.apply(("add", 0, 3), ("add", 1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.store.flush(self.user)
+                    raise RuntimeError
+
+        self.assertEqual(self.stored(), self.quantities((0, 2)))
+        self.assertTrue(self.entry()["dirty"])
+
+        self.flush()
+        self.assertFlushed()
+        self.assertEqual(self.stored(), self.quantities((0, 5), (1, 1)))
+
+    def test_invalidate(self):
+        self.apply(("add", 0, 2))
+
+        # Dirty: kept, and flushed on top of the tables
+        self.store.invalidate(self.user)
+        self.assertEqual(self.store.summary(self.user).item_count, 2)
+
+        self.flush()
+        self.assertFlushed()
+
+        # Clean: dropped and rebuilt from the tables
+        CartItem.objects.filter(cart=self.cart).update(quantity=7)
+        self.assertEqual(self.store.summary(self.user).item_count, 2)
+        self.store.invalidate(self.user)
+        self.assertIsNone(self.entry())
+        self.assertEqual(self.store.summary(self.user).item_count, 7)
+
+    def test_eviction_rebuilds_from_the_tables(self):
+        self.apply(("add", 0, 2), ("add", 1, 1))
+        self.flush()
+
+        # Lost before its flush: the tables win
+        self.apply(("add", 2, 5))
+        self.store.cache.clear()
+
+        entry = self.store.rebuild(self.user.pk)
+        self.assertFalse(entry["dirty"])
+        self.assertEqual(entry["base"], Cart.objects.get(pk=self.cart.pk).version)
+        self.assertEqual(self.store.summary(self.user).item_count, 3)
+
+        self.flush()
+        self.assertEqual(self.stored(), self.quantities((0, 2), (1, 1)))
+
+        self.apply(("add", 2, 5))
+        self.flush()
+        self.assertFlushed()
+
+
+# --------------------------------------------------------------------------
+# GUEST CART
+# --------------------------------------------------------------------------
+
+class GuestCartTests(TestCase):
+
+    def setUp(self):
+        self.variants = make_variants()
+        self.user = make_user("guest@example.com")
+        self.user.is_verified = True
+        self.user.save()
+        self.cart, _ = Cart.objects.get_or_create(user=self.user)
+
+    def from_cookie(self, value):
+        request = RequestFactory().get("/")
+        request.COOKIES[AnonymousCart.cookie_name] = value
+        return AnonymousCart.from_request(request)
+
+    def signed(self, payload):
+        return signing.TimestampSigner(salt=AnonymousCart.salt).sign(payload)
+
+    def login(self, client):
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(
+                "/api/auth/login/",
+                {"email": self.user.email, "password": "pw12345678!"},
+                format="json",
+            )
+
+    def test_cookie_round_trip(self):
+        lines = {self.variants[2].pk: 3, self.variants[0].pk: 1}
+        value = AnonymousCart(lines).encode()
+
+        cart = self.from_cookie(value)
+        self.assertEqual(cart.lines, lines)
+        self.assertEqual(list(cart.lines), list(lines))
+        self.assertEqual(cart.item_count, 4)
+
+        self.assertEqual(self.from_cookie(value.replace("-3", "-9")).lines, {})
+        self.assertEqual(self.from_cookie(value + "x").lines, {})
+        self.assertEqual(self.from_cookie("").lines, {})
+
+    def test_cookie_bounds(self):
+        payload = ".".join([f"{pk}-150" for pk in range(1, 61)] + ["7-0", "junk"])
+        cart = self.from_cookie(self.signed(payload))
+
+        self.assertEqual(len(cart.lines), AnonymousCart.max_lines)
+        self.assertEqual(set(cart.lines.values()), {AnonymousCart.max_quantity})
+
+        full = AnonymousCart({pk: AnonymousCart.max_quantity for pk in range(1, 51)})
+        self.assertLess(len(full.encode()), 4096)
+
+    def test_apply_bounds(self):
+        Inventory.objects.update(stock=500)
+        variant = self.variants[0]
+
+        cart = AnonymousCart({variant.pk: 99})
+        with self.assertRaises(ValidationError):
+            cart.apply([{"op": "add", "variant_id": variant.pk, "quantity": 1}])
+        self.assertEqual(cart.lines, {variant.pk: 99})
+
+        cart = AnonymousCart({pk: 1 for pk in range(1_000_000, 1_000_050)})
+        with self.assertRaises(ValidationError):
+            cart.apply([{"op": "add", "variant_id": variant.pk, "quantity": 1}])
+
+    def test_merge_caps_at_available_stock(self):
+        first, second = self.variants[:2]
+        add_line(self.cart, first, 3)
+        Inventory.objects.filter(variant=first).update(stock=6, reserved=1)
+        version = Cart.objects.get(pk=self.cart.pk).version
+
+        merged = CartService.merge_lines(self.user, {first.pk: 4, second.pk: 2})
+
+        self.assertEqual(merged, 2)
+        cart = Cart.objects.get(pk=self.cart.pk)
+        items = {item.variant_id: item for item in cart.items.all()}
+        self.assertEqual(items[first.pk].quantity, 5)
+        self.assertEqual(items[first.pk].total_price, first.selling_price * 5)
+        self.assertEqual(items[second.pk].quantity, 2)
+        self.assertEqual(cart.item_count, 7)
+        self.assertEqual(cart.subtotal, first.selling_price * 5 + second.selling_price * 2)
+        self.assertGreater(cart.version, version)
+        self.assertEqual(CartTotalsService.check(repair=False), (1, 0))
+
+        # Already at the cap: nothing to write
+        self.assertEqual(CartService.merge_lines(self.user, {first.pk: 1}), 0)
+
+    def test_merge_skips_inactive_variants(self):
+        first, second = self.variants[:2]
+        second.is_active = False
+        second.save()
+
+        merged = CartService.merge_lines(self.user, {first.pk: 1, second.pk: 1, 10**9: 1})
+
+        self.assertEqual(merged, 1)
+        self.assertEqual(
+            list(self.cart.items.values_list("variant_id", flat=True)), [first.pk]
+        )
+
+    def test_login_merges_and_clears_the_cookie(self):
+        client = APIClient()
+        client.cookies[AnonymousCart.cookie_name] = AnonymousCart(
+            {self.variants[0].pk: 2}
+        ).encode()
+
+        response = self.login(client)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[AnonymousCart.cookie_name].value, "")
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).item_count, 2)
+
+    def test_failed_merge_keeps_the_cookie(self):
+        client = APIClient()
+        client.cookies[AnonymousCart.cookie_name] = AnonymousCart(
+            {self.variants[0].pk: 2}
+        ).encode()
+
+        with mock.patch.object(CartService, "merge_lines", side_effect=DatabaseError):
+            with self.assertLogs("apps.cart.anonymous", "ERROR"):
+                response = self.login(client)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(AnonymousCart.cookie_name, response.cookies)
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).item_count, 0)
+
+
+# --------------------------------------------------------------------------
+# VALIDATION VS CHECKOUT
+# --------------------------------------------------------------------------
+
+@skipUnless(
+    connection.features.has_select_for_update,
+    "row locks need a database with SELECT ... FOR UPDATE",
+)
+class ValidateCartConcurrencyTests(TransactionTestCase):
+    """
+    Two validations and a checkout lock overlapping inventories at the
+    same time; the id-ordered locks must let all three finish.
+    """
+
+    def setUp(self):
+        category = Category.objects.create(name="Men", slug="men")
+        product_type = ProductType.objects.create(name="Tee", slug="tee")
+        product = Product.objects.create(
+            name="Race Tee",
+            description="Race Tee description",
+            category=category,
+            product_type=product_type,
+        )
+        ProductMetrics.objects.create(product=product)
+
+        self.variants = []
+        for index, size in enumerate(("S", "M", "L", "XL")):
+            variant = ProductVariant.objects.create(
+                product=product,
+                size=size,
+                price=Decimal(100 + 10 * index),
+                discount_percent=Decimal("10.00"),
+            )
+            variant.inventory.stock = 50
+            variant.inventory.save()
+            self.variants.append(variant)
+
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(email=f"race{index}@example.com", password="pw12345678!")
+            for index in range(3)
+        ]
+
+        # Overlapping lines, added in different orders
+        for user, positions in zip(self.users, ([0, 1, 2], [3, 2, 1], [1, 2, 3])):
+            cart, _ = Cart.objects.get_or_create(user=user)
+            for position in positions:
+                variant = self.variants[position]
+                CartItem.objects.create(
+                    cart=cart,
+                    variant=variant,
+                    quantity=position + 1,
+                    unit_price=variant.selling_price,
+                    discount_percent=variant.discount_percent,
+                )
+
+        # Every line is stale: the validations reprice all of them
+        for variant in self.variants:
+            variant.price += Decimal("5.00")
+            variant.save()
+
+    def validate(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post("/api/cart/validate/")
+
+    def run_concurrently(self, *calls):
+        barrier = threading.Barrier(len(calls))
+        results, errors = [None] * len(calls), []
+
+        def run(index, call):
+            try:
+                barrier.wait()
+                results[index] = call()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=run, args=(index, call))
+            for index, call in enumerate(calls)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        self.assertFalse(any(thread.is_alive() for thread in threads), "deadlocked")
+        self.assertEqual(errors, [])
+        return results
+
+    def test_validations_race_a_checkout(self):
+        first, second, buyer = self.users
+
+        responses = self.run_concurrently(
+            lambda: self.validate(first),
+            lambda: self.validate(second),
+            lambda: OrderService.create_order(buyer, {}, {}, "COD"),
+        )
+
+        for response, user in zip(responses[:2], (first, second)):
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertTrue(response.data["price_updated"])
+
+            cart = Cart.objects.get(user=user)
+            items = list(cart.items.select_related("variant"))
+            for item in items:
+                self.assertEqual(item.unit_price, item.variant.selling_price)
+                self.assertEqual(item.total_price, item.variant.selling_price * item.quantity)
+            self.assertEqual(cart.subtotal, sum(item.total_price for item in items))
+            self.assertEqual(Decimal(response.data["cart"]["subtotal"]), cart.subtotal)
+
+        order = Order.objects.get(user=buyer)
+        self.assertEqual(order.items.count(), 3)
+        self.assertFalse(CartItem.objects.filter(cart__user=buyer).exists())
+
+        stock = dict(Inventory.objects.values_list("variant__size", "stock"))
+        self.assertEqual(stock, {"S": 50, "M": 48, "L": 47, "XL": 46})
+
+        checked, drifted = CartTotalsService.check(repair=False)
+        self.assertEqual(drifted, 0)
@@ -0,0 +1,153 @@
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+
+def bulk_update_values(model, rows, fields, batch_size=300):
+    """
+    Set-based bulk update: one
+
+        UPDATE table SET f = v.column2, ... FROM (VALUES (pk, ...), ...) AS v
+        WHERE table.pk = v.column1
+
+    per batch. rows are tuples (pk, value for fields[0], ...).
+
+    Django's bulk_update() builds a CASE WHEN per row and field, which
+    costs more in Python than the UPDATE itself for thousands of rows.
+    Works on PostgreSQL and SQLite >= 3.33 (UPDATE ... FROM).
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    opts = model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    pk_column = quote(opts.pk.column)
+    model_fields = [opts.get_field(name) for name in fields]
+
+    assignments = ", ".join(
+        f"{quote(field.column)} = CAST(v.column{index} AS {field.db_type(connection)})"
+        for index, field in enumerate(model_fields, start=2)
+    )
+    placeholder = "(" + ", ".join(["%s"] * (len(fields) + 1)) + ")"
+
+    updated = 0
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+
+            params = []
+            for row in batch:
+                params.append(opts.pk.get_db_prep_value(row[0], connection))
+                params.extend(
+                    field.get_db_prep_value(value, connection)
+                    for field, value in zip(model_fields, row[1:])
+                )
+
+            cursor.execute(
+                f"UPDATE {table} SET {assignments} "
+                f"FROM (VALUES {', '.join([placeholder] * len(batch))}) AS v "
+                f"WHERE {table}.{pk_column} = v.column1",
+                params,
+            )
+            updated += cursor.rowcount
+
+    return updated
+
+
+def bulk_insert_values(model, rows, fields, batch_size=1000):
+    """
+    Multi-row INSERT INTO table (fields) VALUES (...), (...) from plain
+    tuples, for batch jobs writing many thousands of rows: no model
+    instance per row, unlike bulk_create(). No defaults are applied and
+    no signals sent, so every non-null column must be in fields.
+    """
+    # The wrapper itself, not the thread-local proxy: every attribute
+    # lookup on the proxy costs more than preparing the value
+    db = connections[DEFAULT_DB_ALIAS]
+
+    opts = model._meta
+    quote = db.ops.quote_name
+    model_fields = [opts.get_field(name) for name in fields]
+
+    columns = ", ".join(quote(field.column) for field in model_fields)
+    placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+
+    # SQLite caps the number of bound parameters per statement
+    max_rows = db.ops.bulk_batch_size(model_fields, [None] * batch_size)
+    batch_size = max(1, min(batch_size, max_rows))
+
+    rows = iter(rows)
+    inserted = 0
+
+    with db.cursor() as cursor:
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+
+            params = [
+                field.get_db_prep_save(value, db)
+                for row in batch
+                for field, value in zip(model_fields, row)
+            ]
+
+            cursor.execute(
+                f"INSERT INTO {quote(opts.db_table)} ({columns}) "
+                f"VALUES {', '.join([placeholder] * len(batch))}",
+                params,
+            )
+            inserted += len(batch)
+
+    return inserted
+
+
+def bulk_increment_values(model, rows, unique_fields, fields, batch_size=500):
+    """
+    Additive upsert: one
+
+        INSERT INTO table (u, ..., f, ...) VALUES (...), ...
+        ON CONFLICT (u, ...) DO UPDATE SET f = table.f + EXCLUDED.f, ...
+
+    per batch. rows are tuples (values of unique_fields..., deltas for
+    fields...); missing rows are created holding the deltas. Concurrent
+    callers never lose an increment. unique_fields must carry a unique
+    constraint. Works on PostgreSQL and SQLite >= 3.24.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    opts = model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    key_fields = [opts.get_field(name) for name in unique_fields]
+    value_fields = [opts.get_field(name) for name in fields]
+    model_fields = key_fields + value_fields
+
+    columns = ", ".join(quote(field.column) for field in model_fields)
+    conflict = ", ".join(quote(field.column) for field in key_fields)
+    assignments = ", ".join(
+        f"{quote(field.column)} = {table}.{quote(field.column)} + EXCLUDED.{quote(field.column)}"
+        for field in value_fields
+    )
+    placeholder = "(" + ", ".join(["%s"] * len(model_fields)) + ")"
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+
+            params = [
+                field.get_db_prep_save(value, connection)
+                for row in batch
+                for field, value in zip(model_fields, row)
+            ]
+
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) "
+                f"VALUES {', '.join([placeholder] * len(batch))} "
+                f"ON CONFLICT ({conflict}) DO UPDATE SET {assignments}",
+                params,
+            )
+
+    return len(rows)
@@ -1,5 +1,14 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
 
 
 class StandardResultsPagination(PageNumberPagination):
@@ -18,4 +27,255 @@ class StandardResultsPagination(PageNumberPagination):
             "next": self.get_next_link(),
             "previous": self.get_previous_link(),
             "results": data
-        })
\ No newline at end of file
+        })
+
+
+# --------------------------------------------------------------------------
+# KEYSET (CURSOR) PAGINATION
+# --------------------------------------------------------------------------
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    Keeps full microsecond precision, DjangoJSONEncoder cuts datetimes
+    to milliseconds and the cursor would no longer match its own row.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, cls=CursorJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+INVALID_CURSOR_MESSAGE = "Invalid cursor."
+
+
+def decode_cursor(cursor):
+    """
+    The {"p": [...], ...} dict encode_cursor() wrote. Anything else
+    (not base64, not JSON, or JSON of another shape) is a 404.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+
+    if not isinstance(data, dict) or not isinstance(data.get("p"), list):
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+
+    return data
+
+
+def is_cursor_request(request):
+    """
+    Clients opt in to keyset pagination with ?pagination=cursor,
+    everyone else keeps the page-number envelope.
+    """
+    return request.query_params.get("pagination") == "cursor"
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination keyed on the queryset's active ordering plus the
+    primary key, e.g. (created_at, id) or (min_price, id).
+
+    Each page is a single indexed range scan: no COUNT(*) and no OFFSET.
+    The opaque cursor holds the sort values of the last (or first) row.
+    """
+
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = INVALID_CURSOR_MESSAGE
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ----------------------------------------------------------------------
+    # ORDERING
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def _get_keys(queryset):
+        ordering = list(queryset.query.order_by) or list(
+            queryset.model._meta.ordering
+        ) or ["-pk"]
+
+        keys = []
+        for field in ordering:
+            if not isinstance(field, str):
+                raise ValueError("Keyset pagination needs string orderings.")
+
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            if name == "id" or name == queryset.model._meta.pk.name:
+                name = "pk"
+
+            model_field = (
+                queryset.model._meta.pk if name == "pk"
+                else queryset.model._meta.get_field(name)
+            )
+            keys.append((name, descending, model_field.null))
+
+            if name == "pk":
+                break
+        else:
+            # Primary key breaks ties, following the last sort direction
+            keys.append(("pk", keys[-1][1] if keys else True, False))
+
+        return keys
+
+    @staticmethod
+    def _order_by(keys, reverse):
+        expressions = []
+        for name, descending, nullable in keys:
+            descending = descending != reverse
+            # NULLs always sort last when walking forward
+            nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+            expression = F(name).desc if descending else F(name).asc
+            expressions.append(expression(**nulls) if nullable else expression())
+        return expressions
+
+    @staticmethod
+    def _after(keys, values, reverse, index=0):
+        """
+        Q matching the rows that come strictly after `values`
+        in the (possibly reversed) key ordering.
+        """
+        name, descending, nullable = keys[index]
+        value = values[index]
+        descending = descending != reverse
+        nulls_first = nullable and reverse
+
+        rest = None
+        if index + 1 < len(keys):
+            rest = KeysetPagination._after(keys, values, reverse, index + 1)
+
+        if value is None:
+            condition = Q(**{f"{name}__isnull": True}) & rest
+            if nulls_first:
+                condition |= Q(**{f"{name}__isnull": False})
+            return condition
+
+        lookup = "lt" if descending else "gt"
+        condition = Q(**{f"{name}__{lookup}": value})
+
+        if nullable and not nulls_first:
+            condition |= Q(**{f"{name}__isnull": True})
+
+        if rest is not None:
+            condition |= Q(**{name: value}) & rest
+
+        return condition
+
+    # ----------------------------------------------------------------------
+    # PAGINATE
+    # ----------------------------------------------------------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self._get_keys(queryset)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        self.cursor = decode_cursor(encoded) if encoded else None
+
+        reverse = bool(self.cursor and self.cursor.get("r"))
+
+        queryset = queryset.order_by(*self._order_by(self.keys, reverse))
+
+        if self.cursor:
+            values = self.cursor["p"]
+            if len(values) != len(self.keys):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                queryset = queryset.filter(
+                    self._after(self.keys, values, reverse)
+                )
+            except (TypeError, ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def _position(self, obj):
+        return [getattr(obj, name) for name, _, _ in self.keys]
+
+    def _link(self, obj, reverse):
+        url = self.request.build_absolute_uri()
+        cursor = encode_cursor({"p": self._position(obj), "r": int(reverse)})
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "success": True,
+            "page_size": self.page_size,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "success": {"type": "boolean"},
+                "page_size": {"type": "integer"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class CursorOptInMixin:
+    """
+    For generic list views: switches to KeysetPagination when the
+    request carries ?pagination=cursor, otherwise uses pagination_class.
+    """
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if is_cursor_request(self.request):
+                self._paginator = KeysetPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import MediaTask
+
+
+@admin.register(MediaTask)
+class MediaTaskAdmin(admin.ModelAdmin):
+    list_display = ("action", "public_id", "status", "attempts", "next_attempt_at", "created_at")
+    list_filter = ("action", "status")
+    search_fields = ("public_id",)
+    readonly_fields = ("source_path", "last_error", "claimed_at", "created_at", "updated_at")
@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models import Max
+from rest_framework import serializers
+
+from apps.accounts.models import User
+from apps.media.services import DirectUpload, DirectUploadError, MediaQueue
+from apps.products.models import Product, ProductImage
+
+
+# target -> (model, CloudinaryField name)
+TARGETS = {
+    "product_image": (ProductImage, "image"),
+    "profile_image": (User, "profile_image"),
+}
+
+
+def target_field(target):
+    model, name = TARGETS[target]
+    return model._meta.get_field(name)
+
+
+class DirectUploadSignSerializer(serializers.Serializer):
+    target = serializers.ChoiceField(choices=list(TARGETS))
+    product = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.all(),
+        required=False
+    )
+
+    def validate(self, attrs):
+        if attrs["target"] == "product_image" and not attrs.get("product"):
+            raise serializers.ValidationError(
+                {"product": "This field is required for product images."}
+            )
+        return attrs
+
+
+class DirectUploadConfirmSerializer(serializers.Serializer):
+    """
+    upload_token comes from the sign endpoint; public_id, version and
+    signature from the media store's upload response.
+    """
+
+    target = serializers.ChoiceField(choices=list(TARGETS))
+    upload_token = serializers.CharField()
+    public_id = serializers.CharField(max_length=255)
+    version = serializers.CharField(max_length=20)
+    signature = serializers.CharField(max_length=128)
+
+    # product_image only
+    alt_text = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    is_primary = serializers.BooleanField(default=False)
+    is_secondary = serializers.BooleanField(default=False)
+
+    def validate_version(self, value):
+        if not value.isdigit():
+            raise serializers.ValidationError("Enter a valid version.")
+        return value
+
+    def validate(self, attrs):
+        if attrs["is_primary"] and attrs["is_secondary"]:
+            raise serializers.ValidationError(
+                "An image cannot be both primary and secondary."
+            )
+
+        user = self.context["request"].user
+
+        try:
+            attrs["resource"], attrs["claims"] = DirectUpload.confirm(
+                target_field(attrs["target"]),
+                attrs["upload_token"],
+                {"user": str(user.pk), "target": attrs["target"]},
+                attrs["public_id"],
+                attrs["version"],
+                attrs["signature"],
+            )
+        except DirectUploadError as exc:
+            raise serializers.ValidationError({"upload_token": str(exc)})
+
+        return attrs
+
+    # -------------------------
+    # ATTACH
+    # -------------------------
+
+    def create(self, validated_data):
+        if validated_data["target"] == "product_image":
+            return self._attach_product_image(validated_data)
+        return self._attach_profile_image(validated_data)
+
+    @transaction.atomic
+    def _attach_product_image(self, validated_data):
+        resource = validated_data["resource"]
+
+        try:
+            product = Product.objects.select_for_update().get(
+                pk=validated_data["claims"]["product"]
+            )
+        except Product.DoesNotExist:
+            raise serializers.ValidationError({"product": "Product no longer exists."})
+
+        # Confirming the same upload twice attaches it once
+        existing = product.images.filter(image=resource).first()
+        if existing:
+            return existing
+
+        if validated_data["is_primary"]:
+            product.images.filter(is_primary=True).update(is_primary=False)
+        if validated_data["is_secondary"]:
+            product.images.filter(is_secondary=True).update(is_secondary=False)
+
+        last_order = product.images.aggregate(last=Max("order"))["last"]
+
+        return ProductImage.objects.create(
+            product=product,
+            image=resource,
+            alt_text=validated_data.get("alt_text", ""),
+            is_primary=validated_data["is_primary"],
+            is_secondary=validated_data["is_secondary"],
+            order=0 if last_order is None else last_order + 1,
+        )
+
+    @transaction.atomic
+    def _attach_profile_image(self, validated_data):
+        user = User.objects.select_for_update().get(pk=self.context["request"].user.pk)
+
+        previous = user.profile_image
+        user.profile_image = validated_data["resource"]
+        user.save(update_fields=["profile_image", "updated_at"])
+
+        if previous and previous.public_id != user.profile_image.public_id:
+            MediaQueue.enqueue_delete([previous.public_id])
+
+        return user
@@ -0,0 +1,13 @@
+from django.urls import path
+
+from .views.direct_upload_views import (
+    DirectUploadConfirmAPIView,
+    DirectUploadSignAPIView,
+)
+
+app_name = "media"
+
+urlpatterns = [
+    path("uploads/sign/", DirectUploadSignAPIView.as_view(), name="direct-upload-sign"),
+    path("uploads/confirm/", DirectUploadConfirmAPIView.as_view(), name="direct-upload-confirm"),
+]
@@ -0,0 +1,95 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+
+from apps.media.services import DirectUpload
+from apps.media.api.serializers.direct_upload_serializer import (
+    DirectUploadConfirmSerializer,
+    DirectUploadSignSerializer,
+    target_field,
+)
+
+
+def check_target_permission(request, target):
+    if target == "product_image" and not request.user.is_staff:
+        raise PermissionDenied("Only admins can upload product images.")
+
+
+class DirectUploadSignAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=["media"],
+        summary="Sign a direct image upload",
+        description=(
+            "Returns short-lived signed form fields for uploading one image "
+            "straight to the media store (`upload_url`), and an "
+            "`upload_token` to pass to the confirm endpoint afterwards. "
+            "`product_image` (admin only) needs `product`; "
+            "`profile_image` is the current user's avatar."
+        ),
+        request=DirectUploadSignSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def post(self, request):
+        serializer = DirectUploadSignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        target = serializer.validated_data["target"]
+        check_target_permission(request, target)
+
+        claims = {"user": str(request.user.pk), "target": target}
+        if target == "product_image":
+            claims["product"] = serializer.validated_data["product"].pk
+
+        return Response(
+            DirectUpload.sign(target_field(target), claims),
+            status=status.HTTP_200_OK
+        )
+
+
+class DirectUploadConfirmAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=["media"],
+        summary="Confirm a direct image upload",
+        description=(
+            "Verifies the media store's response signature against the "
+            "upload token and attaches the public id to the product "
+            "(new ProductImage) or to the current user's profile."
+        ),
+        request=DirectUploadConfirmSerializer,
+        responses={201: OpenApiTypes.OBJECT},
+    )
+    def post(self, request):
+        check_target_permission(request, request.data.get("target"))
+
+        serializer = DirectUploadConfirmSerializer(
+            data=request.data,
+            context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        obj = serializer.save()
+
+        if serializer.validated_data["target"] == "product_image":
+            data = {
+                "id": obj.id,
+                "product": obj.product_id,
+                "public_id": obj.image.public_id,
+                "url": obj.image.url,
+                "is_primary": obj.is_primary,
+                "is_secondary": obj.is_secondary,
+                "order": obj.order,
+            }
+        else:
+            data = {
+                "public_id": obj.profile_image.public_id,
+                "url": obj.profile_image.url,
+            }
+
+        return Response(data, status=status.HTTP_201_CREATED)
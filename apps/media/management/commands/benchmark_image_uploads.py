@@ -0,0 +1,108 @@
+import itertools
+import os
+import tempfile
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.media.models import MediaTask
+from apps.media.services import MediaUploadError, MediaUploader
+from apps.media.storage import LocalMediaStorage
+from apps.products.models import ProductImage
+
+
+class Rollback(Exception):
+    pass
+
+
+class SlowStorage(LocalMediaStorage):
+    """
+    Local storage with a fixed round-trip latency per upload,
+    optionally failing the n-th upload.
+    """
+
+    def __init__(self, root, latency, fail_at=None):
+        super().__init__(root)
+        self.latency = latency
+        self.fail_at = fail_at
+        self.calls = itertools.count(1)
+
+    def upload(self, source, public_id):
+        call = next(self.calls)
+        time.sleep(self.latency)
+        if call == self.fail_at:
+            raise OSError("simulated upload failure")
+        return super().upload(source, public_id)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time sequential vs concurrent upload of one request's images "
+        "against a simulated slow media store, and check that a partial "
+        "failure queues the finished uploads for deletion"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=8)
+        parser.add_argument("--size-kb", type=int, default=2048)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.5,
+            help="Seconds per simulated upload",
+        )
+        parser.add_argument("--workers", type=int, default=MediaUploader.max_workers)
+
+    def _files(self, count, size):
+        return [
+            SimpleUploadedFile(f"bench-{i}.jpg", os.urandom(size), "image/jpeg")
+            for i in range(count)
+        ]
+
+    def handle(self, *args, **options):
+
+        field = ProductImage._meta.get_field("image")
+        count = options["images"]
+        size = options["size_kb"] * 1024
+
+        with tempfile.TemporaryDirectory() as root:
+
+            timings = {}
+            for label, workers in (("sequential", 1), ("concurrent", options["workers"])):
+                storage = SlowStorage(root, options["latency"])
+                started = time.perf_counter()
+                MediaUploader.upload(
+                    field, self._files(count, size),
+                    max_workers=workers, storage=storage,
+                )
+                timings[label] = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{count} images of {options['size_kb']} KB, "
+                f"{options['latency'] * 1000:.0f} ms per upload: "
+                f"sequential {timings['sequential']:.2f}s, "
+                f"concurrent {timings['concurrent']:.2f}s "
+                f"({timings['sequential'] / timings['concurrent']:.1f}x)"
+            )
+
+            try:
+                with transaction.atomic():
+                    storage = SlowStorage(root, options["latency"], fail_at=count // 2)
+                    try:
+                        MediaUploader.upload(
+                            field, self._files(count, size),
+                            max_workers=options["workers"], storage=storage,
+                        )
+                    except MediaUploadError as exc:
+                        queued = MediaTask.objects.filter(action=MediaTask.Action.DELETE).count()
+                        self.stdout.write(
+                            f"partial failure: {exc}; "
+                            f"{queued} finished uploads queued for deletion"
+                        )
+                    raise Rollback
+            except Rollback:
+                pass
+
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from apps.media.services import MediaQueue
+
+
+class Command(BaseCommand):
+    help = "Run queued media uploads / deletes against the media store"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Concurrent storage calls",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Tasks claimed at a time (default: 5 per worker)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when no task is due instead of polling",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds between polls of an empty queue",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Requeue failed tasks before starting",
+        )
+
+    def handle(self, *args, **options):
+
+        if options["retry_failed"]:
+            requeued = MediaQueue.retry_failed()
+            self.stdout.write(f"{requeued} failed tasks requeued")
+
+        swept = MediaQueue.sweep_spool()
+        if swept:
+            self.stdout.write(f"{swept} orphaned spool files removed")
+
+        def progress(claimed, succeeded):
+            self.stdout.write(f"{succeeded}/{claimed} tasks done")
+
+        claimed, succeeded = MediaQueue.run(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            once=options["once"],
+            poll_interval=options["poll_interval"],
+            progress=progress,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {claimed} tasks, {succeeded} done, "
+                f"{claimed - succeeded} to retry or failed"
+            )
+        )
@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils import timezone
+
+
+class MediaTask(models.Model):
+    """
+    Durable upload / delete intent for the media store, written in the
+    same transaction as the rows that reference the public id and
+    carried out later by the process_media_queue worker.
+
+    Finished tasks are deleted; failed ones are kept for inspection.
+    """
+
+    class Action(models.TextChoices):
+        UPLOAD = "upload", "Upload"
+        DELETE = "delete", "Delete"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        FAILED = "failed", "Failed"
+
+    action = models.CharField(max_length=10, choices=Action.choices)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+
+    public_id = models.CharField(max_length=255)
+
+    # Spooled file of an upload, see MediaQueue.enqueue_upload
+    source_path = models.CharField(max_length=500, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.public_id} ({self.status})"
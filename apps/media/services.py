@@ -0,0 +1,431 @@
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import MediaTask
+from .storage import get_media_storage
+
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentMediaError(Exception):
+    """
+    A task that can never succeed (e.g. its spooled file is gone):
+    failed right away instead of retried.
+    """
+
+
+class MediaUploadError(Exception):
+    pass
+
+
+class DirectUploadError(Exception):
+    pass
+
+
+class MediaQueue:
+    """
+    DB-backed queue of media store uploads and deletes.
+
+    Requests only spool the file to disk and insert a MediaTask in their
+    own transaction, so no network call ever runs while row locks are
+    held; the public id is chosen up front and stored right away. The
+    process_media_queue worker claims due tasks, runs the storage calls
+    in a thread pool and retries failures with exponential backoff.
+    """
+
+    batch_size = 20
+    max_attempts = 6
+    backoff_seconds = 30
+    max_backoff_seconds = 3600
+
+    # A RUNNING task older than this belongs to a dead worker
+    lease = timedelta(minutes=10)
+
+    # ----------------------------------------------------------------------
+    # ENQUEUE
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def spool_dir():
+        path = Path(
+            getattr(settings, "MEDIA_QUEUE_SPOOL_DIR", None)
+            or settings.BASE_DIR / "media_spool"
+        )
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @staticmethod
+    def new_public_id(folder):
+        return f"{folder}/{uuid.uuid4().hex}"
+
+    @staticmethod
+    def enqueue_upload(file, folder):
+        """
+        Spool an uploaded file and queue its upload.
+        Returns the public id to store on the model.
+        """
+        public_id = MediaQueue.new_public_id(folder)
+        source_path = MediaQueue.spool_dir() / uuid.uuid4().hex
+
+        with open(source_path, "wb") as spooled:
+            for chunk in file.chunks():
+                spooled.write(chunk)
+
+        MediaTask.objects.create(
+            action=MediaTask.Action.UPLOAD,
+            public_id=public_id,
+            source_path=str(source_path),
+        )
+        return public_id
+
+    @staticmethod
+    def defer_upload(field, value):
+        """
+        For a CloudinaryField value: an uploaded file is queued and the
+        resource it will become is returned in its place, so saving the
+        model makes no network call. Anything else is returned as is.
+        """
+        if not isinstance(value, UploadedFile):
+            return value
+
+        folder = field.options.get("folder") or field.name
+        return field.to_python(MediaQueue.enqueue_upload(value, folder))
+
+    @staticmethod
+    def enqueue_delete(public_ids):
+        public_ids = [public_id for public_id in public_ids if public_id]
+        if public_ids:
+            MediaTask.objects.bulk_create(
+                MediaTask(action=MediaTask.Action.DELETE, public_id=public_id)
+                for public_id in public_ids
+            )
+
+    # ----------------------------------------------------------------------
+    # WORKER
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def claim(batch_size=None):
+        """
+        Mark up to batch_size due tasks RUNNING and return them.
+        SKIP LOCKED lets several workers share the table.
+        """
+        now = timezone.now()
+
+        due = MediaTask.objects.filter(
+            Q(status=MediaTask.Status.PENDING, next_attempt_at__lte=now)
+            | Q(status=MediaTask.Status.RUNNING, claimed_at__lt=now - MediaQueue.lease)
+        )
+
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+
+            tasks = list(due[:batch_size or MediaQueue.batch_size])
+
+            MediaTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                status=MediaTask.Status.RUNNING,
+                claimed_at=now,
+                attempts=F("attempts") + 1,
+            )
+
+        for task in tasks:
+            task.attempts += 1
+
+        return tasks
+
+    @staticmethod
+    def execute(task):
+        """
+        The storage call of one task; runs in a pool thread, so it
+        never touches the database.
+        """
+        storage = get_media_storage()
+
+        if task.action == MediaTask.Action.DELETE:
+            storage.destroy(task.public_id)
+            return
+
+        if not Path(task.source_path).is_file():
+            raise PermanentMediaError(f"spooled file {task.source_path} is missing")
+
+        storage.upload(task.source_path, task.public_id)
+
+    @staticmethod
+    def backoff(attempts):
+        return min(
+            MediaQueue.backoff_seconds * 2 ** (attempts - 1),
+            MediaQueue.max_backoff_seconds,
+        )
+
+    @staticmethod
+    def _record(outcomes):
+        done = [task for task, error in outcomes if error is None]
+
+        MediaTask.objects.filter(pk__in=[task.pk for task in done]).delete()
+        for task in done:
+            if task.source_path:
+                Path(task.source_path).unlink(missing_ok=True)
+
+        now = timezone.now()
+
+        for task, error in outcomes:
+            if error is None:
+                continue
+
+            logger.warning(
+                "Media %s of %s failed (attempt %s): %s",
+                task.action, task.public_id, task.attempts, error,
+            )
+
+            permanent = (
+                isinstance(error, PermanentMediaError)
+                or task.attempts >= MediaQueue.max_attempts
+            )
+
+            MediaTask.objects.filter(pk=task.pk).update(
+                status=MediaTask.Status.FAILED if permanent else MediaTask.Status.PENDING,
+                next_attempt_at=now + timedelta(seconds=MediaQueue.backoff(task.attempts)),
+                claimed_at=None,
+                last_error=str(error)[:2000],
+            )
+
+        return len(done)
+
+    @staticmethod
+    def process(executor, batch_size=None):
+        """
+        Claim one batch and run it on the executor.
+        Returns (claimed, succeeded).
+        """
+        tasks = MediaQueue.claim(batch_size)
+        if not tasks:
+            return 0, 0
+
+        futures = [(task, executor.submit(MediaQueue.execute, task)) for task in tasks]
+
+        outcomes = []
+        for task, future in futures:
+            try:
+                future.result()
+                outcomes.append((task, None))
+            except Exception as exc:
+                outcomes.append((task, exc))
+
+        return len(tasks), MediaQueue._record(outcomes)
+
+    @staticmethod
+    def run(workers=4, batch_size=None, once=False, poll_interval=2.0, progress=None):
+        """
+        Process the queue until it is empty (once=True) or forever.
+        progress(claimed, succeeded) is called after every batch.
+        """
+        total_claimed = total_succeeded = 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                claimed, succeeded = MediaQueue.process(
+                    executor, batch_size or workers * 5
+                )
+                total_claimed += claimed
+                total_succeeded += succeeded
+
+                if claimed and progress:
+                    progress(claimed, succeeded)
+
+                if not claimed:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+
+        return total_claimed, total_succeeded
+
+    # ----------------------------------------------------------------------
+    # MAINTENANCE
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def retry_failed():
+        return MediaTask.objects.filter(status=MediaTask.Status.FAILED).update(
+            status=MediaTask.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+
+    @staticmethod
+    def sweep_spool(older_than=timedelta(days=1)):
+        """
+        Remove spooled files no task refers to, i.e. those of requests
+        whose transaction rolled back after the file was written.
+        """
+        cutoff = time.time() - older_than.total_seconds()
+
+        referenced = set(
+            MediaTask.objects.exclude(source_path="").values_list("source_path", flat=True)
+        )
+
+        removed = 0
+        for path in MediaQueue.spool_dir().iterdir():
+            if (
+                path.is_file()
+                and str(path) not in referenced
+                and path.stat().st_mtime < cutoff
+            ):
+                path.unlink(missing_ok=True)
+                removed += 1
+
+        return removed
+
+
+class MediaUploader:
+    """
+    Uploads the files of one request concurrently through a bounded
+    thread pool, before its DB transaction opens, for callers that need
+    the files in the store right away rather than queued.
+
+    If any upload fails the ones already done are queued for deletion
+    and MediaUploadError is raised, so nothing is left half-attached.
+    """
+
+    max_workers = 8
+
+    @staticmethod
+    def _upload_one(storage, file, public_id):
+        if hasattr(file, "seek"):
+            file.seek(0)
+        storage.upload(file, public_id)
+
+    @staticmethod
+    def upload(field, values, max_workers=None, storage=None):
+        """
+        values: CloudinaryField values, uploaded files among them.
+        Returns them in the same order with every file replaced by the
+        resource of its upload.
+        """
+        results = list(values)
+        folder = field.options.get("folder") or field.name
+
+        jobs = {
+            index: MediaQueue.new_public_id(folder)
+            for index, value in enumerate(results)
+            if isinstance(value, UploadedFile)
+        }
+        if not jobs:
+            return results
+
+        storage = storage or get_media_storage()
+        uploaded, errors = [], []
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(jobs), max_workers or MediaUploader.max_workers)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    MediaUploader._upload_one, storage, results[index], public_id
+                ): index
+                for index, public_id in jobs.items()
+            }
+
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+
+                index = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    errors.append(exc)
+                    # Don't start the rest, they would be thrown away
+                    for pending in futures:
+                        pending.cancel()
+                    continue
+
+                uploaded.append(jobs[index])
+                results[index] = field.to_python(jobs[index])
+
+        if errors:
+            MediaUploader.discard(uploaded)
+            raise MediaUploadError(
+                f"{len(errors)} of {len(jobs)} uploads failed: {errors[0]}"
+            )
+
+        return results
+
+    @staticmethod
+    def discard(public_ids):
+        """
+        Undo uploads whose rows were never saved. Queued rather than
+        deleted inline, so it also survives a store outage.
+        """
+        MediaQueue.enqueue_delete(public_ids)
+
+
+class DirectUpload:
+    """
+    Signed direct-to-store uploads: the API only signs the upload and
+    checks the store's response, the image bytes never pass through it.
+
+    sign() picks the public id and returns the store's form fields plus
+    an upload token binding that public id to the caller's claims (user,
+    target, ...). confirm() accepts the store's response only with a
+    fresh token issued for the same claims and public id.
+    """
+
+    salt = "apps.media.direct_upload"
+
+    @staticmethod
+    def ttl():
+        return getattr(settings, "MEDIA_UPLOAD_TTL", 600)
+
+    @staticmethod
+    def sign(field, claims):
+        storage = get_media_storage()
+
+        folder = field.options.get("folder") or field.name
+        public_id = MediaQueue.new_public_id(folder)
+
+        return {
+            "upload_url": storage.upload_url(),
+            "fields": storage.sign_upload(public_id, int(time.time())),
+            "public_id": public_id,
+            "upload_token": signing.dumps(
+                {**claims, "public_id": public_id}, salt=DirectUpload.salt
+            ),
+            "expires_in": DirectUpload.ttl(),
+        }
+
+    @staticmethod
+    def confirm(field, upload_token, claims, public_id, version, signature):
+        """
+        Returns (resource to store on the field, claims of the token).
+        """
+        try:
+            signed = signing.loads(
+                upload_token, salt=DirectUpload.salt, max_age=DirectUpload.ttl()
+            )
+        except signing.SignatureExpired:
+            raise DirectUploadError("Upload token has expired.")
+        except signing.BadSignature:
+            raise DirectUploadError("Invalid upload token.")
+
+        if signed.get("public_id") != public_id or any(
+            signed.get(key) != value for key, value in claims.items()
+        ):
+            raise DirectUploadError("Upload token does not match this upload.")
+
+        if not get_media_storage().verify_upload(public_id, version, signature):
+            raise DirectUploadError("Upload signature is invalid.")
+
+        return field.to_python(f"image/upload/v{version}/{public_id}"), signed
@@ -0,0 +1,166 @@
+import shutil
+from pathlib import Path
+
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.module_loading import import_string
+
+
+class MediaStorageError(Exception):
+    pass
+
+
+class BaseMediaStorage:
+    """
+    The two calls the media queue makes against the media store.
+    Both must be idempotent: a task may run again after a crash.
+    source is a file path or an open file object.
+    """
+
+    def upload(self, source, public_id):
+        raise NotImplementedError
+
+    def destroy(self, public_id):
+        raise NotImplementedError
+
+    # Direct uploads: the browser posts the file straight to the store
+    # with fields signed here, then hands back the store's response
+
+    ALLOWED_FORMATS = "jpg,jpeg,png,webp"
+
+    def upload_url(self):
+        raise NotImplementedError
+
+    def sign_upload(self, public_id, timestamp):
+        """
+        Form fields for a direct upload of exactly this public id.
+        """
+        raise NotImplementedError
+
+    def verify_upload(self, public_id, version, signature):
+        """
+        True if (public_id, version) was signed by the store,
+        i.e. the upload really happened.
+        """
+        raise NotImplementedError
+
+
+class CloudinaryMediaStorage(BaseMediaStorage):
+
+    def upload(self, source, public_id):
+        result = cloudinary.uploader.upload(
+            source,
+            public_id=public_id,
+            overwrite=True,
+            resource_type="image",
+        )
+        return result["public_id"]
+
+    def destroy(self, public_id):
+        result = cloudinary.uploader.destroy(public_id)
+        # "not found" means an earlier attempt already removed it
+        if result.get("result") not in ("ok", "not found"):
+            raise MediaStorageError(f"destroy failed: {result}")
+
+    def upload_url(self):
+        return cloudinary.utils.cloudinary_api_url("upload", resource_type="image")
+
+    def sign_upload(self, public_id, timestamp):
+        params = {
+            "public_id": public_id,
+            "timestamp": timestamp,
+            "allowed_formats": self.ALLOWED_FORMATS,
+        }
+        config = cloudinary.config()
+        params["signature"] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params["api_key"] = config.api_key
+        return params
+
+    def verify_upload(self, public_id, version, signature):
+        return cloudinary.utils.verify_api_response_signature(
+            public_id, version, signature
+        )
+
+
+class LocalMediaStorage(BaseMediaStorage):
+    """
+    Filesystem stand-in for tests and offline environments:
+    public ids become paths under settings.MEDIA_LOCAL_ROOT.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(
+            root
+            or getattr(settings, "MEDIA_LOCAL_ROOT", None)
+            or settings.BASE_DIR / "media_local"
+        )
+
+    def path(self, public_id):
+        path = (self.root / public_id).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise MediaStorageError(f"invalid public id '{public_id}'")
+        return path
+
+    def upload(self, source, public_id):
+        target = self.path(public_id)
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        if hasattr(source, "read"):
+            with open(target, "wb") as out:
+                shutil.copyfileobj(source, out)
+        else:
+            shutil.copyfile(source, target)
+
+        return public_id
+
+    def destroy(self, public_id):
+        self.path(public_id).unlink(missing_ok=True)
+
+    # Signing stand-in: HMACs over SECRET_KEY in place of the store's
+    # API secret. sign_response() is what the store would return after
+    # an upload, so tests can complete the flow without the network.
+
+    SIGNING_SALT = "apps.media.storage.LocalMediaStorage"
+
+    def _sign(self, *values):
+        return salted_hmac(
+            self.SIGNING_SALT, "|".join(str(value) for value in values)
+        ).hexdigest()
+
+    def upload_url(self):
+        return self.root.resolve().as_uri()
+
+    def sign_upload(self, public_id, timestamp):
+        return {
+            "public_id": public_id,
+            "timestamp": timestamp,
+            "allowed_formats": self.ALLOWED_FORMATS,
+            "signature": self._sign("upload", public_id, timestamp),
+        }
+
+    def sign_response(self, public_id, version):
+        return self._sign("response", public_id, version)
+
+    def verify_upload(self, public_id, version, signature):
+        return constant_time_compare(
+            self.sign_response(public_id, version), signature or ""
+        )
+
+
+_storage = None
+
+
+def get_media_storage():
+    """
+    settings.MEDIA_STORAGE_BACKEND (dotted path) if set, Cloudinary otherwise.
+    """
+    global _storage
+
+    if _storage is None:
+        path = getattr(settings, "MEDIA_STORAGE_BACKEND", None)
+        _storage = import_string(path)() if path else CloudinaryMediaStorage()
+
+    return _storage
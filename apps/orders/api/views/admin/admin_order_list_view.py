@@ -7,11 +7,12 @@ from drf_spectacular.utils import (
     OpenApiTypes,
 )
 
+from apps.common.pagination import CursorOptInMixin
 from apps.orders.models import Order
 from apps.orders.api.serializers import OrderSerializer
 
 
-class AdminOrderListView(generics.ListAPIView):
+class AdminOrderListView(CursorOptInMixin, generics.ListAPIView):
     permission_classes = [IsAdminUser]
     serializer_class = OrderSerializer
 
@@ -62,6 +63,19 @@ class AdminOrderListView(generics.ListAPIView):
                 location=OpenApiParameter.QUERY,
                 description="Order by placed_at or total_amount. Prefix with '-' for descending.",
             ),
+            OpenApiParameter(
+                name="pagination",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=["cursor"],
+                description="Use cursor pagination (no total count) instead of page numbers.",
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Opaque cursor from a previous next/previous link.",
+            ),
         ],
         responses={200: OrderSerializer(many=True)},
     )
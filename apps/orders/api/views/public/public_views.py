@@ -5,7 +5,9 @@ from rest_framework import status
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+
+from apps.common.pagination import KeysetPagination, is_cursor_request
 
 from ....services import OrderService
 from ....models import Order
@@ -82,14 +84,28 @@ class OrderListView(APIView):
     @extend_schema(
         tags=["Orders"],
         responses={200: OrderSerializer(many=True)},
-        description="Retrieve all orders for the authenticated user.",
+        parameters=[
+            OpenApiParameter(name="pagination", type=str, enum=["cursor"]),
+            OpenApiParameter(name="cursor", type=str),
+        ],
+        description=(
+            "Retrieve all orders for the authenticated user. "
+            "Pass `pagination=cursor` to page through them with cursor links."
+        ),
     )
     def get(self, request):
         orders = (
             request.user.orders
             .prefetch_related("items")
-            .order_by("-placed_at")
+            .order_by("-placed_at", "-id")
         )
+
+        if is_cursor_request(request):
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(orders, request, view=self)
+            serializer = OrderSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data)
 
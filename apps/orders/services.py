@@ -6,7 +6,8 @@ from datetime import timedelta
 from rest_framework.exceptions import ValidationError
 
 from apps.cart.models import CartItem
-from apps.products.models import ProductVariant
+from apps.cart.store import get_cart_store
+from apps.products.models import Inventory, ProductVariant
 from .models import (
     Order,
     OrderItem,
@@ -53,13 +54,14 @@ class OrderService:
 
     @staticmethod
     def _get_primary_image(product):
+        # Orders only ever show a thumbnail, snapshot that rendition
         primary = product.images.filter(is_primary=True).first()
         if primary:
-            return primary.image.url if primary.image else ""
+            return primary.url_for("thumb") if primary.image else ""
 
         first_image = product.images.first()
         if first_image:
-            return first_image.image.url if first_image.image else ""
+            return first_image.url_for("thumb") if first_image.image else ""
 
         return ""
 
@@ -74,12 +76,29 @@ class OrderService:
         subtotal = Decimal("0.00")
         order_items_data = []
 
+        variant_ids = [entry["variant"].id for entry in items]
+
+        # Variants, then inventories, each in id order: the same order as
+        # ValidateCartView and the batch cart endpoint, so concurrent
+        # checkouts and validations on overlapping variants can't deadlock
+        variants = {
+            variant.id: variant
+            for variant in ProductVariant.objects.select_for_update(of=("self",))
+            .select_related("product")
+            .filter(id__in=variant_ids)
+            .order_by("pk")
+        }
+        inventories = {
+            inventory.variant_id: inventory
+            for inventory in Inventory.objects.select_for_update()
+            .filter(variant_id__in=variant_ids)
+            .order_by("pk")
+        }
+
         for entry in items:
-            variant = ProductVariant.objects.select_for_update().get(
-                id=entry["variant"].id
-            )
+            variant = variants[entry["variant"].id]
 
-            inventory = variant.inventory
+            inventory = inventories[variant.id]
             product = variant.product
             quantity = entry["quantity"]
 
@@ -159,6 +178,10 @@ class OrderService:
     @transaction.atomic
     def create_order(user, shipping_address, billing_address, payment_method):
 
+        # A cache-backed cart store may hold changes not written yet
+        cart_store = get_cart_store()
+        cart_store.flush(user)
+
         cart_items = (
             CartItem.objects
             .select_related("variant", "variant__product")
@@ -185,6 +208,8 @@ class OrderService:
         )
 
         cart_items.delete()
+        transaction.on_commit(lambda: cart_store.invalidate(user))
+
         return order
 
     # ----------------------------------------------------------------------
@@ -128,4 +128,4 @@ class ProductMetricsAdmin(admin.ModelAdmin):
         "avg_rating",
         "rating_count",
     )
-    readonly_fields = ("avg_rating", "rating_count")
+    readonly_fields = ("avg_rating", "rating_count", "rating_sum")
@@ -75,7 +75,7 @@ class AdminProductImageSerializer(serializers.ModelSerializer):
 
     def get_image(self, obj):
         if obj.image:
-            return obj.image.url
+            return obj.url_for()
         return None
 
 
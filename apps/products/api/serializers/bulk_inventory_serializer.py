@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+
+class BulkInventorySerializer(serializers.Serializer):
+    """
+    Items are {"sku", "stock"} or {"sku", "delta"}; per-item checks
+    happen in BulkInventoryService so one bad SKU never fails the batch.
+    """
+
+    items = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=100_000,
+    )
@@ -1,30 +1,32 @@
 from rest_framework import serializers
-from apps.products.models import Product
+from apps.products.models import ProductListing
 
 class FeaturedProductSerializer(serializers.ModelSerializer):
-    primary_image = serializers.SerializerMethodField()
-    secondary_image = serializers.SerializerMethodField()
+    id = serializers.IntegerField(source="product_id", read_only=True)
+    primary_image = serializers.CharField(
+        source="primary_image_url",
+        read_only=True
+    )
+    secondary_image = serializers.CharField(
+        source="secondary_image_url",
+        read_only=True
+    )
+    primary_image_urls = serializers.JSONField(read_only=True)
+    secondary_image_urls = serializers.JSONField(read_only=True)
     avg_rating = serializers.DecimalField(
-        source="metrics.avg_rating",
         max_digits=2,
         decimal_places=1,
         read_only=True
     )
 
     class Meta:
-        model = Product
+        model = ProductListing
         fields = [
             "id",
             "slug",
             "primary_image",
             "secondary_image",
+            "primary_image_urls",
+            "secondary_image_urls",
             "avg_rating",
         ]
-
-    def get_primary_image(self, obj):
-        image = next((img for img in obj.images.all() if img.is_primary), None)
-        return image.image.url if image and image.image else None
-
-    def get_secondary_image(self, obj):
-        image = next((img for img in obj.images.all() if img.is_secondary), None)
-        return image.image.url if image and image.image else None
\ No newline at end of file
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.db import transaction
 
+from apps.media.services import MediaQueue
 from apps.products.models import (
     Product,
     ProductImage,
@@ -106,10 +107,14 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         ProductMetrics.objects.create(product=product)
 
 
+        # Files are spooled and uploaded by the media worker,
+        # never inside this transaction
+        image_field = ProductImage._meta.get_field("image")
+
         for index, images_data in enumerate(images_data):
             ProductImage.objects.create(
                 product=product,
-                image=images_data["image"],
+                image=MediaQueue.defer_upload(image_field, images_data["image"]),
                 alt_text=images_data.get("alt_text", ""),
                 is_primary=images_data.get("is_primary", False),
                 is_secondary=images_data.get("is_secondary", False),
@@ -5,16 +5,18 @@ from apps.products.models import ProductImage
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    urls = serializers.JSONField(read_only=True)
 
     class Meta:
         model = ProductImage
         fields = (
             "id",
             "image_url",
+            "urls",
             "is_primary",
             "is_secondary",
             "order",
         )
 
     def get_image_url(self, obj):
-        return obj.image.url if obj.image else None
+        return obj.url_for() if obj.image else None
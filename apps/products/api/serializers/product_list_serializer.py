@@ -10,6 +10,8 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     primary_image = serializers.SerializerMethodField()
     secondary_image = serializers.SerializerMethodField()
+    primary_image_urls = serializers.SerializerMethodField()
+    secondary_image_urls = serializers.SerializerMethodField()
 
     price = serializers.SerializerMethodField()
     variant_id = serializers.SerializerMethodField()
@@ -27,6 +29,8 @@ class ProductListSerializer(serializers.ModelSerializer):
             "product_type",
             "primary_image",
             "secondary_image",
+            "primary_image_urls",
+            "secondary_image_urls",
             "price",
             "variant_id",
             "is_new_arrival",
@@ -37,95 +41,117 @@ class ProductListSerializer(serializers.ModelSerializer):
         )
 
     # -------------------------
-    # Helper Method
+    # Fast path
     # -------------------------
-    def _get_default_variant(self, obj):
-        active_variants = [
-            v for v in obj.variants.all()
-            if v.is_active
-        ]
-
-        if not active_variants:
-            return None
-
-        # Variants with stock
-        in_stock_variants = [
-            v for v in active_variants
-            if hasattr(v, "inventory") and v.inventory.available_stock > 0
-        ]
+    def _summarize(self, obj):
+        """
+        Everything derived from variants / images, computed in one pass
+        and memoized on the instance (it does not depend on context).
+        """
+        summary = getattr(obj, "_list_summary", None)
+        if summary is not None:
+            return summary
+
+        active_ids = []
+        default = default_in_stock = None
+
+        for v in obj.variants.all():
+            if not v.is_active:
+                continue
+
+            active_ids.append(v.id)
+
+            if default is None or v.selling_price < default.selling_price:
+                default = v
+
+            in_stock = hasattr(v, "inventory") and v.inventory.available_stock > 0
+            if in_stock and (
+                default_in_stock is None
+                or v.selling_price < default_in_stock.selling_price
+            ):
+                default_in_stock = v
 
         # Prefer in-stock variants
-        variants_to_consider = in_stock_variants if in_stock_variants else active_variants
+        variant = default_in_stock or default
+
+        primary = secondary = None
+        for img in obj.images.all():
+            if primary is None and img.is_primary:
+                primary = img
+            if secondary is None and img.is_secondary:
+                secondary = img
+            if primary is not None and secondary is not None:
+                break
+
+        summary = obj._list_summary = {
+            "active_variant_ids": active_ids,
+            "primary_image": primary.url_for() if primary and primary.image else None,
+            "secondary_image": secondary.url_for() if secondary and secondary.image else None,
+            "primary_image_urls": primary.urls if primary and primary.image else {},
+            "secondary_image_urls": secondary.urls if secondary and secondary.image else {},
+            "price": variant.selling_price if variant else None,
+            "variant_id": variant.id if variant else None,
+            "in_stock": variant is default_in_stock if variant else False,
+        }
+        return summary
+
+    def _has_any(self, obj, context_key):
+        ids = self.context.get(context_key)
+        if not ids:
+            return False
+        return any(
+            variant_id in ids
+            for variant_id in self._summarize(obj)["active_variant_ids"]
+        )
 
-        return min(variants_to_consider, key=lambda v: v.selling_price)
+    def to_representation(self, obj):
+        summary = self._summarize(obj)
+
+        return {
+            "id": obj.id,
+            "name": obj.name,
+            "slug": obj.slug,
+            "description": obj.description,
+            "product_type": str(obj.product_type.name),
+            "primary_image": summary["primary_image"],
+            "secondary_image": summary["secondary_image"],
+            "primary_image_urls": summary["primary_image_urls"],
+            "secondary_image_urls": summary["secondary_image_urls"],
+            "price": summary["price"],
+            "variant_id": summary["variant_id"],
+            "is_new_arrival": obj.is_new_arrival,
+            "is_top_selling": obj.is_top_selling,
+            "in_stock": summary["in_stock"],
+            "is_in_wishlist": self._has_any(obj, "wishlist_variant_ids"),
+            "is_in_cart": self._has_any(obj, "cart_variant_ids"),
+        }
 
     # -------------------------
-    # Images
+    # Method fields (schema / generic path)
     # -------------------------
     def get_primary_image(self, obj):
-        image = next(
-            (img for img in obj.images.all() if img.is_primary),
-            None
-        )
-        return image.image.url if image and image.image else None
+        return self._summarize(obj)["primary_image"]
 
     def get_secondary_image(self, obj):
-        image = next(
-            (img for img in obj.images.all() if img.is_secondary),
-            None
-        )
-        return image.image.url if image and image.image else None
+        return self._summarize(obj)["secondary_image"]
+
+    def get_primary_image_urls(self, obj):
+        return self._summarize(obj)["primary_image_urls"]
+
+    def get_secondary_image_urls(self, obj):
+        return self._summarize(obj)["secondary_image_urls"]
 
-    # -------------------------
-    # Price
-    # -------------------------
     def get_price(self, obj):
-        variant = self._get_default_variant(obj)
-        return variant.selling_price if variant else None
+        return self._summarize(obj)["price"]
 
-    # -------------------------
-    # Variant ID (Default Variant)
-    # -------------------------
     def get_variant_id(self, obj):
-        variant = self._get_default_variant(obj)
-        return variant.id if variant else None
+        return self._summarize(obj)["variant_id"]
 
-    # -------------------------
-    # Stock
-    # -------------------------
     def get_in_stock(self, obj):
-        variant = self._get_default_variant(obj)
-        return (
-            hasattr(variant, "inventory") and
-            variant.inventory.available_stock > 0
-        ) if variant else False
+        return self._summarize(obj)["in_stock"]
 
-    # -------------------------
-    # Wishlist
-    # -------------------------
     def get_is_in_wishlist(self, obj):
-        wishlist_variant_ids = self.context.get("wishlist_variant_ids", set())
-        active_variants = [
-            v for v in obj.variants.all()
-            if v.is_active
-        ]
+        return self._has_any(obj, "wishlist_variant_ids")
 
-        return any(
-            v.id in wishlist_variant_ids
-            for v in active_variants
-        )
-
-    # -------------------------
-    # Cart
-    # -------------------------
     def get_is_in_cart(self, obj):
-        cart_variant_ids = self.context.get("cart_variant_ids", set())
-        active_variants = [
-            v for v in obj.variants.all()
-            if v.is_active
-        ]
-
-        return any(
-            v.id in cart_variant_ids
-            for v in active_variants
-        )
\ No newline at end of file
+        return self._has_any(obj, "cart_variant_ids")
@@ -0,0 +1,90 @@
+from rest_framework import serializers
+from apps.products.models import ProductListing
+
+
+class ProductListingSerializer(serializers.ModelSerializer):
+    """
+    Same payload as ProductListSerializer, read from the
+    denormalized ProductListing table instead of the product graph.
+    """
+
+    id = serializers.IntegerField(source="product_id", read_only=True)
+    primary_image = serializers.CharField(
+        source="primary_image_url",
+        read_only=True
+    )
+    secondary_image = serializers.CharField(
+        source="secondary_image_url",
+        read_only=True
+    )
+    primary_image_urls = serializers.JSONField(read_only=True)
+    secondary_image_urls = serializers.JSONField(read_only=True)
+    product_type = serializers.CharField(
+        source="product_type_name",
+        read_only=True
+    )
+    variant_id = serializers.IntegerField(
+        source="default_variant_id",
+        read_only=True
+    )
+
+    price = serializers.SerializerMethodField()
+    is_in_wishlist = serializers.SerializerMethodField()
+    is_in_cart = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductListing
+        fields = (
+            "id",
+            "name",
+            "slug",
+            "description",
+            "product_type",
+            "primary_image",
+            "secondary_image",
+            "primary_image_urls",
+            "secondary_image_urls",
+            "price",
+            "variant_id",
+            "is_new_arrival",
+            "is_top_selling",
+            "in_stock",
+            "is_in_wishlist",
+            "is_in_cart",
+        )
+
+    def to_representation(self, obj):
+        """
+        The row is flat: the payload is built in one dict instead of
+        field by field (the fields stay for the schema). See
+        benchmark_product_list_serializer.
+        """
+        context = self.context
+
+        return {
+            "id": obj.product_id,
+            "name": obj.name,
+            "slug": obj.slug,
+            "description": obj.description,
+            "product_type": obj.product_type_name,
+            "primary_image": obj.primary_image_url,
+            "secondary_image": obj.secondary_image_url,
+            "primary_image_urls": obj.primary_image_urls,
+            "secondary_image_urls": obj.secondary_image_urls,
+            "price": obj.price,
+            "variant_id": obj.default_variant_id,
+            "is_new_arrival": obj.is_new_arrival,
+            "is_top_selling": obj.is_top_selling,
+            "in_stock": obj.in_stock,
+            "is_in_wishlist": obj.product_id in context.get("wishlist_product_ids", ()),
+            "is_in_cart": obj.product_id in context.get("cart_product_ids", ()),
+        }
+
+    def get_price(self, obj):
+        return obj.price
+
+    def get_is_in_wishlist(self, obj):
+        return obj.product_id in self.context.get("wishlist_product_ids", set())
+
+    def get_is_in_cart(self, obj):
+        return obj.product_id in self.context.get("cart_product_ids", set())
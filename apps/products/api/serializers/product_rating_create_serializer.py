@@ -1,7 +1,6 @@
 from rest_framework import serializers
 from django.db import transaction
-from django.db.models import Avg, Count
-from apps.products.models import ProductRating, ProductMetrics
+from apps.products.models import ProductRating
 
 
 class ProductRatingCreateSerializer(serializers.ModelSerializer):
@@ -16,21 +15,12 @@ class ProductRatingCreateSerializer(serializers.ModelSerializer):
         user = self.context["request"].user
         product = self.context["product"]
 
+        # ProductMetrics follows through the ProductRating signals,
+        # as a delta on the running totals
         ProductRating.objects.update_or_create(
             product=product,
             user=user,
             defaults={"rating": validated_data["rating"]}
         )
 
-        metrics, _ = ProductMetrics.objects.get_or_create(product=product)
-
-        data = product.ratings.aggregate(
-            avg=Avg("rating"),
-            count=Count("id")
-        )
-
-        metrics.avg_rating = round(data["avg"] or 0, 1)
-        metrics.rating_count = data["count"]
-        metrics.save(update_fields=["avg_rating", "rating_count"])
-
         return product
@@ -0,0 +1,8 @@
+from rest_framework import serializers
+
+
+class ProductSuggestionSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=["product", "category", "product_type"])
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    slug = serializers.CharField()
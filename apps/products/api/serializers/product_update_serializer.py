@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.db import transaction
 
+from apps.media.services import MediaQueue
 from apps.products.models import (
     Product,
     ProductImage,
@@ -98,115 +99,241 @@ class ProductFullUpdateSerializer(serializers.ModelSerializer):
         features_data = validated_data.pop("features", None)
         variants_data = validated_data.pop("variants", None)
 
-        # Update product fields
+        changed = False
         for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+            if getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                changed = True
 
-        instance.save()
-
-        # -------------------------
-        # UPDATE IMAGES
-        # -------------------------
+        # Each section loads the current rows once and writes only the
+        # difference, so the query count does not grow with the payload.
+        # They report whether they wrote anything.
 
         if images_data is not None:
-            # We want to keep existing images if they have an ID and no new 'image' file
-            # and delete those not sent + create new ones
-            
-            existing_image_ids = [img["id"] for img in images_data if img.get("id")]
-            instance.images.exclude(id__in=existing_image_ids).delete()
-
-            for index, img_data in enumerate(images_data):
-                if img_data.get("id"):
-                    # Update existing image layout
-                    try:
-                        img_obj = instance.images.get(id=img_data["id"])
-                        img_obj.is_primary = img_data.get("is_primary", False)
-                        img_obj.is_secondary = img_data.get("is_secondary", False)
-                        img_obj.order = index
-                        if img_data.get("image"):
-                            img_obj.image = img_data["image"]
-                        img_obj.save()
-                    except ProductImage.DoesNotExist:
-                        pass
-                else:
-                    # Create new image
-                    if img_data.get("image"):
-                        ProductImage.objects.create(
-                            product=instance,
-                            image=img_data["image"],
-                            is_primary=img_data.get("is_primary", False),
-                            is_secondary=img_data.get("is_secondary", False),
-                            order=index
-                        )
-
-        # -------------------------
-        # UPDATE FEATURES
-        # -------------------------
+            changed |= self._update_images(instance, images_data)
 
         if features_data is not None:
-            instance.features.all().delete()
+            changed |= self._update_features(instance, features_data)
+
+        if variants_data is not None:
+            changed |= self._update_variants(instance, variants_data)
+
+        # The product's signals also queue the listing refresh and drop
+        # the cached detail body, which covers the bulk writes above
+        # (bulk_create / bulk_update send no signals). Only the editable
+        # columns: the variant writes set min_active_selling_price in
+        # the row, not on instance. An unchanged payload writes nothing.
+        if changed:
+            instance.save(update_fields=[
+                field for field in self.Meta.fields
+                if field not in ("images", "features", "variants")
+            ])
+
+        return instance
 
-            for feature in features_data:
-                ProductFeature.objects.create(
+    # -------------------------
+    # UPDATE IMAGES
+    # -------------------------
+
+    def _update_images(self, instance, images_data):
+        # Keep existing images sent with an ID, delete those not sent
+        # and create the new ones
+        existing = {image.pk: image for image in instance.images.all()}
+
+        kept_ids = {img["id"] for img in images_data if img.get("id") in existing}
+        removed_ids = existing.keys() - kept_ids
+
+        if removed_ids:
+            # pre_delete still runs per image and queues the file delete
+            ProductImage.objects.filter(pk__in=removed_ids).delete()
+
+        # Files are spooled and uploaded by the media worker,
+        # never inside this transaction
+        image_field = ProductImage._meta.get_field("image")
+
+        changed, created, replaced_ids = [], [], []
+        unflagged_ids = []
+
+        for index, img_data in enumerate(images_data):
+            is_primary = img_data.get("is_primary", False)
+            is_secondary = img_data.get("is_secondary", False)
+
+            image_id = img_data.get("id")
+
+            if image_id:
+                img_obj = existing.get(image_id)
+                if img_obj is None:
+                    # Not an image of this product
+                    continue
+
+                if (
+                    (img_obj.is_primary and not is_primary)
+                    or (img_obj.is_secondary and not is_secondary)
+                ):
+                    unflagged_ids.append(img_obj.pk)
+
+                layout = (is_primary, is_secondary, index)
+                if layout != (img_obj.is_primary, img_obj.is_secondary, img_obj.order):
+                    img_obj.is_primary, img_obj.is_secondary, img_obj.order = layout
+                    changed.append(img_obj)
+
+                if img_data.get("image"):
+                    if img_obj.image:
+                        replaced_ids.append(img_obj.image.public_id)
+                    img_obj.image = MediaQueue.defer_upload(image_field, img_data["image"])
+                    if img_obj not in changed:
+                        changed.append(img_obj)
+
+            elif img_data.get("image"):
+                created.append(ProductImage(
                     product=instance,
-                    text=feature
-                )
+                    image=MediaQueue.defer_upload(image_field, img_data["image"]),
+                    is_primary=is_primary,
+                    is_secondary=is_secondary,
+                    order=index,
+                ))
+
+        # Unique indexes are checked row by row, so the images losing the
+        # primary / secondary flag are cleared first; moving a flag from
+        # one image to another inside a single UPDATE could collide
+        if unflagged_ids:
+            ProductImage.objects.filter(pk__in=unflagged_ids).update(
+                is_primary=False, is_secondary=False
+            )
 
-        # -------------------------
-        # UPDATE VARIANTS
-        # -------------------------
+        if changed:
+            ProductImage.objects.bulk_update(
+                changed, ["image", "is_primary", "is_secondary", "order"]
+            )
 
-        if variants_data is not None:
+        # The files replaced above are removed from the store as well
+        MediaQueue.enqueue_delete(replaced_ids)
+
+        if created:
+            ProductImage.objects.bulk_create(created)
+
+        return bool(removed_ids or unflagged_ids or changed or created)
+
+    # -------------------------
+    # UPDATE FEATURES
+    # -------------------------
 
-            existing_variants = {
-                variant.size: variant
-                for variant in instance.variants.all()
-            }
+    def _update_features(self, instance, features_data):
+        # Matched by position: rewrite the texts that changed, append the
+        # extra ones, delete the leftovers
+        existing = list(instance.features.order_by("pk"))
+
+        changed = []
+        for feature, text in zip(existing, features_data):
+            if feature.text != text:
+                feature.text = text
+                changed.append(feature)
+
+        if changed:
+            ProductFeature.objects.bulk_update(changed, ["text"])
+
+        leftovers = existing[len(features_data):]
+        if leftovers:
+            ProductFeature.objects.filter(
+                pk__in=[feature.pk for feature in leftovers]
+            ).delete()
+
+        extra = features_data[len(existing):]
+        if extra:
+            ProductFeature.objects.bulk_create(
+                ProductFeature(product=instance, text=text)
+                for text in extra
+            )
 
-            submitted_sizes = []
+        return bool(changed or leftovers or extra)
 
-            for variant_data in variants_data:
+    # -------------------------
+    # UPDATE VARIANTS
+    # -------------------------
 
-                size = variant_data["size"]
-                stock = variant_data.pop("stock")
+    def _update_variants(self, instance, variants_data):
 
-                submitted_sizes.append(size)
+        existing_variants = {
+            variant.size: variant
+            for variant in instance.variants.select_related("inventory")
+        }
 
-                if size in existing_variants:
+        changed_variants = []
+        new_variants = []
+        stock_by_size = {}
 
-                    variant = existing_variants[size]
-                    variant.price = variant_data["price"]
-                    variant.discount_percent = variant_data.get(
-                        "discount_percent", 0
-                    )
+        for variant_data in variants_data:
+
+            size = variant_data["size"]
+            stock_by_size[size] = variant_data["stock"]
+
+            price = variant_data["price"]
+            discount_percent = variant_data.get("discount_percent", 0)
+
+            if size in existing_variants:
+
+                variant = existing_variants[size]
+
+                if (
+                    variant.price != price
+                    or variant.discount_percent != discount_percent
+                    or not variant.is_active
+                ):
+                    variant.price = price
+                    variant.discount_percent = discount_percent
                     variant.is_active = True
-                    variant.save()
-
-                    if hasattr(variant, "inventory"):
-                        variant.inventory.stock = stock
-                        variant.inventory.save()
-                    else:
-                        Inventory.objects.create(
-                            variant=variant,
-                            stock=stock
-                        )
-
-                else:
-
-                    new_variant = ProductVariant.objects.create(
-                        product=instance,
-                        **variant_data
-                    )
-
-                    Inventory.objects.update_or_create(
-                        variant=new_variant,
-                        defaults={"stock": stock}
-                    )
-
-            # deactivate removed variants
-            for size, variant in existing_variants.items():
-                if size not in submitted_sizes:
-                    variant.is_active = False
-                    variant.save(update_fields=["is_active"])
-
-        return instance
\ No newline at end of file
+                    changed_variants.append(variant)
+
+            else:
+
+                new_variants.append(ProductVariant(
+                    product=instance,
+                    size=size,
+                    sku=ProductVariant.generate_sku(),
+                    price=price,
+                    discount_percent=discount_percent,
+                ))
+
+        # deactivate removed variants
+        for size, variant in existing_variants.items():
+            if size not in stock_by_size and variant.is_active:
+                variant.is_active = False
+                changed_variants.append(variant)
+
+        # The queryset keeps selling_price and the product's
+        # min_active_selling_price in sync on bulk writes
+        if changed_variants:
+            ProductVariant.objects.bulk_update(
+                changed_variants, ["price", "discount_percent", "is_active"]
+            )
+
+        if new_variants:
+            new_variants = ProductVariant.objects.bulk_create(new_variants)
+
+        changed_inventory = []
+        new_inventory = []
+
+        for size, variant in existing_variants.items():
+            if size not in stock_by_size:
+                continue
+
+            stock = stock_by_size[size]
+
+            if not hasattr(variant, "inventory"):
+                new_inventory.append(Inventory(variant=variant, stock=stock))
+            elif variant.inventory.stock != stock:
+                variant.inventory.stock = stock
+                changed_inventory.append(variant.inventory)
+
+        new_inventory.extend(
+            Inventory(variant=variant, stock=stock_by_size[variant.size])
+            for variant in new_variants
+        )
+
+        if changed_inventory:
+            Inventory.objects.bulk_update(changed_inventory, ["stock"])
+
+        if new_inventory:
+            Inventory.objects.bulk_create(new_inventory)
+
+        return bool(changed_variants or new_variants or changed_inventory or new_inventory)
@@ -8,9 +8,14 @@ from .views.admin.admin_product_retrieve_update_delete_view import AdminProductR
 from .views.admin.admin_product_search_view import AdminProductSearchAPIView
 from apps.products.api.views.admin.admin_variant_list_create_view import AdminVariantListCreateAPIView
 from apps.products.api.views.admin.admin_variant_retrieve_update_delete_view import AdminVariantRetrieveUpdateDeleteAPIView
+from .views.admin.admin_bulk_inventory_view import AdminBulkInventoryAPIView
+from .views.admin.admin_view_counter_metrics_view import AdminViewCounterMetricsAPIView
 from .views.public.product_rating_view import ProductRatingAPIView
 from .views.public.featured_product_list_view import FeaturedProductListView
 from .views.public.product_search_view import ProductSearchAPIView
+from .views.public.product_suggest_view import ProductSuggestAPIView
+from .views.public.product_facets_view import ProductFacetsAPIView
+from .views.public.product_related_view import ProductRelatedAPIView
 
 app_name = "products"
 
@@ -21,13 +26,18 @@ urlpatterns = [
     path("admin/search/", AdminProductSearchAPIView.as_view(), name="admin-product-search"),
     path("admin/variants/", AdminVariantListCreateAPIView.as_view(), name="admin-variant-list-create"),
     path("admin/variants/<int:id>/", AdminVariantRetrieveUpdateDeleteAPIView.as_view(), name="admin-variant-detail"),
+    path("admin/inventory/bulk/", AdminBulkInventoryAPIView.as_view(), name="admin-inventory-bulk"),
+    path("admin/view-counters/", AdminViewCounterMetricsAPIView.as_view(), name="admin-view-counters"),
     path("admin/", AdminProductListCreateAPIView.as_view(), name="admin-product-list-create"),
     path("admin/<int:pk>/", AdminProductRetrieveUpdateDeleteAPIView.as_view(), name="admin-product-detail"),
     
     path("", ProductListAPIView.as_view(), name="product-list"),
     path("search/", ProductSearchAPIView.as_view(), name="product-search"),
+    path("suggest/", ProductSuggestAPIView.as_view(), name="product-suggest"),
+    path("facets/", ProductFacetsAPIView.as_view(), name="product-facets"),
     path("<slug:slug>/", ProductDetailAPIView.as_view(), name="product-detail"),
     path("<slug:slug>/rate/",ProductRatingAPIView.as_view(),name="product-rate",),
+    path("<slug:slug>/related/", ProductRelatedAPIView.as_view(), name="product-related"),
     path("home/featured/",FeaturedProductListView.as_view(),name="home-featured-products",),
 
 ]
@@ -0,0 +1,40 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+
+from apps.products.services import BulkInventoryService
+from apps.products.api.serializers.bulk_inventory_serializer import BulkInventorySerializer
+
+
+class AdminBulkInventoryAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        tags=["inventory-admin"],
+        summary="Bulk stock update by SKU",
+        description=(
+            "Set (`stock`) or adjust (`delta`) the stock of many SKUs at once. "
+            "Items are applied in chunks that commit independently; each "
+            "item gets its own result (`updated`, `not_found`, `invalid`, "
+            "or `failed` if its chunk hit a database error)."
+        ),
+        request=BulkInventorySerializer,
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def post(self, request):
+        serializer = BulkInventorySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = BulkInventoryService.apply(serializer.validated_data["items"])
+
+        updated = sum(1 for result in results if result["status"] == "updated")
+
+        return Response({
+            "success": True,
+            "updated": updated,
+            "failed": len(results) - updated,
+            "results": results,
+        }, status=status.HTTP_200_OK)
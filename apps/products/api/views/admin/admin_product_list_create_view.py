@@ -6,7 +6,8 @@ from django.db.models import Q
 
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 
-from apps.products.models import Product
+from apps.media.services import MediaUploadError, MediaUploader
+from apps.products.models import Product, ProductImage
 from apps.products.api.serializers.product_create_serializer import ProductCreateSerializer
 from apps.products.api.serializers.admin_product_list_serializer import AdminProductListSerializer
 from apps.products.api.serializers.admin_product_detail_serializer import AdminProductDetailSerializer
@@ -81,7 +82,34 @@ class AdminProductListCreateAPIView(ListCreateAPIView):
         
         serializer = self.get_serializer(data=parsed_data)
         serializer.is_valid(raise_exception=True)
-        product = serializer.save()
+
+        # Upload every image of the request at once, before the create
+        # transaction opens; only the resulting public ids are saved
+        images = serializer.validated_data["images"]
+        values = [image["image"] for image in images]
+        try:
+            resources = MediaUploader.upload(
+                ProductImage._meta.get_field("image"), values
+            )
+        except MediaUploadError as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+
+        for image, resource in zip(images, resources):
+            image["image"] = resource
+
+        try:
+            product = serializer.save()
+        except Exception:
+            MediaUploader.discard([
+                resource.public_id
+                for value, resource in zip(values, resources)
+                if value is not resource
+            ])
+            raise
+
         response_serializer = AdminProductDetailSerializer(product)
 
         return Response(
@@ -110,6 +138,7 @@ class AdminProductListCreateAPIView(ListCreateAPIView):
         responses={
             201: AdminProductDetailSerializer,
             400: OpenApiResponse(description="Validation error"),
+            502: OpenApiResponse(description="Image upload failed"),
         },
     )
     def post(self, request, *args, **kwargs):
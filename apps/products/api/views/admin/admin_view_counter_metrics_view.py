@@ -0,0 +1,27 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+
+from apps.products.view_counter import view_counter_metrics
+
+
+class AdminViewCounterMetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        tags=["product-admin"],
+        summary="Product view counter metrics",
+        description=(
+            "Views flushed to ProductViewStats and views dropped, totalled "
+            "in the cache, plus the buffer of the process serving the request."
+        ),
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        return Response(
+            {"success": True, **view_counter_metrics()},
+            status=status.HTTP_200_OK
+        )
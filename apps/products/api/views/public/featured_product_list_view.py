@@ -1,11 +1,9 @@
-
-from django.db.models import Prefetch, Q
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import AllowAny
 # from django.utils.decorators import method_decorator
 # from django.views.decorators.cache import cache_page
 
-from apps.products.models import Product, ProductImage
+from apps.products.models import ProductListing
 from apps.products.api.serializers.featured_product_serializer import (
     FeaturedProductSerializer,
 )
@@ -17,16 +15,7 @@ class FeaturedProductListView(ListAPIView):
 
     def get_queryset(self):
         return (
-            Product.objects
-            .filter(is_featured=True, is_active=True)
-            .prefetch_related(
-                Prefetch(
-                    "images",
-                    queryset=ProductImage.objects.filter(
-                        Q(is_primary=True) | Q(is_secondary=True)
-                    ),
-                )
-            )
-            .select_related("metrics")
+            ProductListing.objects
+            .filter(is_featured=True)
             .order_by("-created_at")[:4]   
-        )
\ No newline at end of file
+        )
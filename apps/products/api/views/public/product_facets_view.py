@@ -0,0 +1,41 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+
+from apps.products.filters import ProductListFilters
+from apps.products.services import ProductFacetService
+
+
+class ProductFacetsAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        tags=["products"],
+        summary="Facet counts (categories, sizes, price ranges) for the product list",
+        description=(
+            "Accepts the same filters as the product list. Each facet is "
+            "counted with every filter applied except its own."
+        ),
+        parameters=[
+            OpenApiParameter(name="category", type=str),
+            OpenApiParameter(name="size", type=str),
+            OpenApiParameter(name="min_price", type=float),
+            OpenApiParameter(name="max_price", type=float),
+            OpenApiParameter(name="new_arrival", type=bool),
+            OpenApiParameter(name="top_selling", type=bool),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+
+        filters = ProductListFilters(request.query_params)
+
+        facets = ProductFacetService.get_facets(filters)
+
+        return Response(
+            {"success": True, **facets},
+            status=status.HTTP_200_OK
+        )
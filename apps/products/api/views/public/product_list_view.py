@@ -5,158 +5,116 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 
-from apps.common.pagination import StandardResultsPagination
-
-from django.db.models import (
-    Prefetch,
-    OuterRef,
-    Subquery,
-    F,
-    ExpressionWrapper,
-    DecimalField,
+from apps.common.pagination import (
+    StandardResultsPagination,
+    KeysetPagination,
+    is_cursor_request,
 )
 
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from apps.products.models import Product, ProductVariant, ProductImage
-from apps.products.api.serializers.product_list_serializer import ProductListSerializer
+from apps.products.models import ProductListing
+from apps.products.filters import ProductListFilterBackend
+from apps.products.api.serializers.product_listing_serializer import ProductListingSerializer
 from apps.wishlist.models import WishlistItem
 from apps.cart.models import CartItem
 
 
+def get_user_product_flags(user):
+    """
+    Product ids (with an active variant) in the user's wishlist and cart.
+    """
+    if not user.is_authenticated:
+        return set(), set()
+
+    wishlist_product_ids = set(
+        WishlistItem.objects.filter(
+            wishlist__user=user,
+            product_variant__is_active=True,
+        ).values_list("product_variant__product_id", flat=True)
+    )
+
+    cart_product_ids = set(
+        CartItem.objects.filter(
+            cart__user=user,
+            variant__is_active=True,
+        ).values_list("variant__product_id", flat=True)
+    )
+
+    return wishlist_product_ids, cart_product_ids
+
+
 class ProductListAPIView(APIView):
     permission_classes = [AllowAny]
 
     @extend_schema(
         tags=["products"],
         summary="List products with filters, sorting and pagination",
-        responses={200: ProductListSerializer(many=True)},
+        description=(
+            "Page-number pagination by default. Pass `pagination=cursor` "
+            "to page with opaque `cursor` links instead (no total count)."
+        ),
+        parameters=[
+            OpenApiParameter(name="category", type=str),
+            OpenApiParameter(name="size", type=str),
+            OpenApiParameter(name="min_price", type=float),
+            OpenApiParameter(name="max_price", type=float),
+            OpenApiParameter(name="new_arrival", type=bool),
+            OpenApiParameter(name="top_selling", type=bool),
+            OpenApiParameter(name="sort", type=str, enum=["newest", "price_asc", "price_desc", "trending"]),
+            OpenApiParameter(name="pagination", type=str, enum=["cursor"]),
+            OpenApiParameter(name="cursor", type=str),
+        ],
+        responses={200: ProductListingSerializer(many=True)},
     )
     def get(self, request):
 
-        queryset = (
-            Product.objects
-            .filter(is_active=True)
-            .select_related("category", "product_type")
-            .prefetch_related(
-                Prefetch(
-                    "images",
-                    queryset=ProductImage.objects.order_by("order"),
-                ),
-                Prefetch(
-                    "variants",
-                    queryset=ProductVariant.objects
-                    .filter(is_active=True)
-                    .select_related("inventory"),
-                ),
-            )
-        )
-
         params = request.query_params
 
-     
-        if category := params.get("category"):
-            queryset = queryset.filter(category__slug__iexact=category)
-
-       
-        if size := params.get("size"):
-            queryset = queryset.filter(
-                variants__size__iexact=size,
-                variants__is_active=True,
-            ).distinct()
-
-    
-        min_price = params.get("min_price")
-        max_price = params.get("max_price")
-
-        if min_price or max_price:
+        queryset = ProductListFilterBackend().filter_queryset(
+            request,
+            ProductListing.objects.all(),
+            self
+        )
 
-            selling_price_expression = ExpressionWrapper(
-                F("variants__price")
-                - (F("variants__price") * F("variants__discount_percent") / 100),
-                output_field=DecimalField(max_digits=10, decimal_places=2),
-            )
+        sort = params.get("sort")
 
-            queryset = queryset.annotate(
-                calculated_selling_price=selling_price_expression
-            )
+        if sort == "newest":
+            queryset = queryset.order_by("-created_at", "-pk")
 
-            if min_price:
-                queryset = queryset.filter(
-                    calculated_selling_price__gte=min_price,
-                    variants__is_active=True,
-                )
+        elif sort == "price_asc":
+            queryset = queryset.order_by("min_price", "pk")
 
-            if max_price:
-                queryset = queryset.filter(
-                    calculated_selling_price__lte=max_price,
-                    variants__is_active=True,
-                )
+        elif sort == "price_desc":
+            queryset = queryset.order_by("-min_price", "-pk")
 
-            queryset = queryset.distinct()
+        elif sort == "trending":
+            queryset = queryset.order_by("-trending_score", "-pk")
 
-        sort = params.get("sort")
+        wishlist_product_ids, cart_product_ids = get_user_product_flags(
+            request.user
+        )
 
-        if sort == "newest":
-            queryset = queryset.order_by("-created_at")
-
-        elif sort in ["price_asc", "price_desc"]:
-
-            lowest_price_subquery = ProductVariant.objects.filter(
-                product=OuterRef("pk"),
-                is_active=True,
-            ).annotate(
-                selling_price=ExpressionWrapper(
-                    F("price")
-                    - (F("price") * F("discount_percent") / 100),
-                    output_field=DecimalField(max_digits=10, decimal_places=2),
-                )
-            ).order_by("selling_price").values("selling_price")[:1]
-
-            queryset = queryset.annotate(
-                min_price=Subquery(lowest_price_subquery)
-            )
-
-            if sort == "price_asc":
-                queryset = queryset.order_by("min_price")
-            else:
-                queryset = queryset.order_by("-min_price")
-
-        if request.user.is_authenticated:
-
-            wishlist_variant_ids = set(
-                WishlistItem.objects.filter(
-                    wishlist__user=request.user
-                ).values_list("product_variant_id", flat=True)
-            )
-
-            cart_variant_ids = set(
-                CartItem.objects.filter(
-                    cart__user=request.user
-                ).values_list("variant_id", flat=True)
-            )
 
+        if is_cursor_request(request):
+            paginator = KeysetPagination()
         else:
-            wishlist_variant_ids = set()
-            cart_variant_ids = set()
-
-   
-        paginator = StandardResultsPagination()
+            paginator = StandardResultsPagination()
 
         paginated_queryset = paginator.paginate_queryset(
-            queryset.distinct(),
+            queryset,
             request,
             view=self
         )
 
-        serializer = ProductListSerializer(
+        serializer = ProductListingSerializer(
             paginated_queryset,
             many=True,
             context={
                 "request": request,
-                "wishlist_variant_ids": wishlist_variant_ids,
-                "cart_variant_ids": cart_variant_ids,
+                "wishlist_product_ids": wishlist_product_ids,
+                "cart_product_ids": cart_product_ids,
             },
         )
 
-        return paginator.get_paginated_response(serializer.data)
\ No newline at end of file
+        return paginator.get_paginated_response(serializer.data)
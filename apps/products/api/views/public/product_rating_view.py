@@ -22,7 +22,7 @@ class ProductRatingAPIView(APIView):
         description=(
             "Allows an authenticated user to rate a product "
             "(1–5). If the user has already rated, it updates the rating. "
-            "Product metrics are recalculated automatically."
+            "Product metrics are updated automatically."
         ),
         request=ProductRatingCreateSerializer,
         responses={
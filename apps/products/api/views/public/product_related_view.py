@@ -0,0 +1,49 @@
+from django.http import Http404
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema
+
+from apps.products.api.serializers.product_listing_serializer import ProductListingSerializer
+from apps.products.api.views.public.product_list_view import get_user_product_flags
+from apps.products.services import ProductRecommendationService
+
+
+class ProductRelatedAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        tags=["products"],
+        summary="Products frequently bought together with this one",
+        description=(
+            "Best first, from the co-occurrence of products in past orders. "
+            "Rebuilt in batch, so new products have no recommendations yet."
+        ),
+        responses={200: ProductListingSerializer(many=True)},
+    )
+    def get(self, request, slug):
+        body = ProductRecommendationService.get_related(slug)
+
+        if body is None:
+            raise Http404
+
+        wishlist_product_ids, cart_product_ids = get_user_product_flags(
+            request.user
+        )
+
+        results = [
+            {
+                **item,
+                "is_in_wishlist": item["id"] in wishlist_product_ids,
+                "is_in_cart": item["id"] in cart_product_ids,
+            }
+            for item in body
+        ]
+
+        return Response(
+            {"success": True, "results": results},
+            status=status.HTTP_200_OK
+        )
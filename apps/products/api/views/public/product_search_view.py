@@ -1,63 +1,105 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
 from rest_framework import status
 
-from django.db.models import Q
-from django.db.models import Prefetch
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from drf_spectacular.utils import extend_schema
-
-from apps.products.models import Product, ProductVariant, ProductImage
-from apps.products.api.serializers.product_list_serializer import ProductListSerializer
+from apps.common.pagination import (
+    INVALID_CURSOR_MESSAGE,
+    decode_cursor,
+    encode_cursor,
+    is_cursor_request,
+)
+from apps.products.models import ProductListing
+from apps.products.search import get_search_backend
+from apps.products.api.serializers.product_listing_serializer import ProductListingSerializer
 
 
 class ProductSearchAPIView(APIView):
     permission_classes = [AllowAny]
 
+    max_limit = 20
+
+    @staticmethod
+    def _decode_after(cursor):
+        position = decode_cursor(cursor)["p"]
+
+        if (
+            len(position) != 2
+            or not isinstance(position[0], (int, float))
+            or not isinstance(position[1], int)
+        ):
+            raise NotFound(INVALID_CURSOR_MESSAGE)
+
+        return position[0], position[1]
+
     @extend_schema(
         tags=["products"],
         summary="Global product search",
+        description=(
+            "Results are ranked by relevance (name, then category / type, "
+            "then description); the last word matches as a prefix. "
+            "Pass `pagination=cursor` to get an envelope with a `next` "
+            "cursor link and page past the first `limit` results."
+        ),
+        parameters=[
+            OpenApiParameter(name="q", type=str),
+            OpenApiParameter(name="limit", type=int),
+            OpenApiParameter(name="pagination", type=str, enum=["cursor"]),
+            OpenApiParameter(name="cursor", type=str),
+        ],
+        responses={200: ProductListingSerializer(many=True)},
     )
     def get(self, request):
 
         query = request.query_params.get("q", "").strip()
-        limit = int(request.query_params.get("limit", 10))
-
-        if not query:
-            return Response([], status=status.HTTP_200_OK)
-
-        
-        limit = min(limit, 20)
-
-        queryset = (
-            Product.objects
-            .filter(is_active=True)
-            .select_related("category", "product_type")
-            .prefetch_related(
-                Prefetch(
-                    "images",
-                    queryset=ProductImage.objects.order_by("order"),
-                ),
-                Prefetch(
-                    "variants",
-                    queryset=ProductVariant.objects.filter(is_active=True)
-                )
-            )
-            .filter(
-                Q(name__istartswith=query) |
-                Q(category__name__istartswith=query) |
-                Q(product_type__name__istartswith=query) |
-                Q(description__icontains=query)
-            )
-            .distinct()
-            .order_by("name")[:limit]
+
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+
+        limit = max(1, min(limit, self.max_limit))
+
+        cursor = request.query_params.get("cursor")
+        after = self._decode_after(cursor) if cursor else None
+
+        hits = get_search_backend().search(query, limit + 1, after=after) if query else []
+
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+
+        listings = ProductListing.objects.in_bulk(
+            [hit.product_id for hit in hits]
         )
 
-        serializer = ProductListSerializer(
-            queryset,
+        # Keep the ranking order; skip products whose listing row is gone
+        rows = [listings[hit.product_id] for hit in hits if hit.product_id in listings]
+
+        serializer = ProductListingSerializer(
+            rows,
             many=True,
             context={"request": request}
         )
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        if not is_cursor_request(request):
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        next_link = None
+        if has_more:
+            last = hits[-1]
+            next_link = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                encode_cursor({"p": [last.score, last.product_id]}),
+            )
+
+        return Response({
+            "success": True,
+            "page_size": limit,
+            "next": next_link,
+            "results": serializer.data
+        }, status=status.HTTP_200_OK)
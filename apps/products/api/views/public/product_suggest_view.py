@@ -0,0 +1,47 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from apps.products.suggest import get_suggest_index
+from apps.products.api.serializers.product_suggestion_serializer import ProductSuggestionSerializer
+
+
+class ProductSuggestAPIView(APIView):
+    """
+    Search-box typeahead. Answered from the in-process prefix
+    index, no database query once the index is loaded.
+    """
+
+    permission_classes = [AllowAny]
+    # Suggestions are the same for everyone, skip the JWT user lookup
+    authentication_classes = []
+
+    max_limit = 10
+
+    @extend_schema(
+        tags=["products"],
+        summary="Typeahead suggestions for products, categories and product types",
+        parameters=[
+            OpenApiParameter(name="q", type=str),
+            OpenApiParameter(name="limit", type=int),
+        ],
+        responses={200: ProductSuggestionSerializer(many=True)},
+    )
+    def get(self, request):
+
+        query = request.query_params.get("q", "")
+
+        try:
+            limit = int(request.query_params.get("limit", 8))
+        except ValueError:
+            limit = 8
+
+        limit = max(1, min(limit, self.max_limit))
+
+        # Plain dicts already match ProductSuggestionSerializer
+        suggestions = get_suggest_index().suggest(query, limit=limit)
+
+        return Response(suggestions, status=status.HTTP_200_OK)
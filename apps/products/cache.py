@@ -0,0 +1,88 @@
+import time
+
+from django.core.cache import cache
+
+
+CATALOG_VERSION_KEY = "products:catalog_version"
+
+
+def get_catalog_version():
+    """
+    Version of what the facets count: which products are listed, their
+    category and flags, the sizes and selling prices of their active
+    variants, the categories. Stock, image, rating and text changes
+    leave it alone.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """
+    Invalidates every cache entry keyed on the catalog version.
+    """
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+
+
+# --------------------------------------------------------------------------
+# PER-PRODUCT VERSIONS
+# --------------------------------------------------------------------------
+
+def product_version_key(product_id):
+    return f"products:version:{product_id}"
+
+
+def get_product_version(product_id):
+    """
+    A missing version starts from the current time in microseconds,
+    so it never repeats a value an older cache entry was keyed with.
+    """
+    key = product_version_key(product_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_product_versions(product_ids):
+    cache.delete_many([product_version_key(pk) for pk in product_ids])
+
+
+# --------------------------------------------------------------------------
+# IN-PROCESS INDEX VERSIONS
+# --------------------------------------------------------------------------
+
+def index_version_key(name):
+    return f"products:index_version:{name}"
+
+
+def get_index_version(name):
+    """
+    Version of the in-process index `name` (search, suggest), shared by
+    every process through the cache. Starts from the current time in
+    microseconds, like the per-product versions.
+    """
+    key = index_version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_index_version(name):
+    """
+    Marks every process's copy of index `name` stale. Returns the new
+    version.
+    """
+    try:
+        return cache.incr(index_version_key(name))
+    except ValueError:
+        return get_index_version(name)
@@ -0,0 +1,155 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Category, ProductVariant
+
+
+# Sidebar price buckets, [min, max) on the selling price of any active variant
+PRICE_BUCKETS = [
+    (Decimal("0"), Decimal("500")),
+    (Decimal("500"), Decimal("1000")),
+    (Decimal("1000"), Decimal("2000")),
+    (Decimal("2000"), Decimal("5000")),
+    (Decimal("5000"), None),
+]
+
+
+def active_variant_exists(**lookups):
+    """
+    EXISTS over the product's active variants, for ProductListing rows.
+    """
+    return Exists(
+        ProductVariant.objects.filter(
+            product_id=OuterRef("product_id"),
+            is_active=True,
+            **lookups,
+        )
+    )
+
+
+def category_exists(slug):
+    """
+    Slugs are stored lowercase (slugify), so an exact match on the
+    unique index replaces the old UPPER(slug) = UPPER(%s) scan.
+    """
+    return Exists(
+        Category.objects.filter(pk=OuterRef("category_id"), slug=slug.lower())
+    )
+
+
+def price_range_exists(min_price=None, max_price=None, upper_inclusive=True):
+    lookups = {}
+    if min_price is not None:
+        lookups["selling_price__gte"] = min_price
+    if max_price is not None:
+        lookups["selling_price__lte" if upper_inclusive else "selling_price__lt"] = max_price
+    return active_variant_exists(**lookups)
+
+
+class ProductListFilters:
+    """
+    Query params of the product list, parsed once and turned into one
+    condition per dimension, shared by the list and facets endpoints.
+    """
+
+    DIMENSIONS = ("category", "size", "price", "new_arrival", "top_selling")
+
+    TRUE_VALUES = {"1", "true", "yes"}
+    FALSE_VALUES = {"0", "false", "no"}
+
+    def __init__(self, params):
+        self.category = (params.get("category") or "").strip() or None
+        self.size = (params.get("size") or "").strip().upper() or None
+        self.min_price = self._decimal(params, "min_price")
+        self.max_price = self._decimal(params, "max_price")
+        self.new_arrival = self._boolean(params, "new_arrival")
+        self.top_selling = self._boolean(params, "top_selling")
+
+    @classmethod
+    def _boolean(cls, params, name):
+        value = (params.get(name) or "").strip().lower()
+        if not value:
+            return None
+        if value in cls.TRUE_VALUES:
+            return True
+        if value in cls.FALSE_VALUES:
+            return False
+        raise ValidationError({name: "Enter true or false."})
+
+    @staticmethod
+    def _decimal(params, name):
+        value = (params.get(name) or "").strip()
+        if not value:
+            return None
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            raise ValidationError({name: "Enter a valid number."})
+        if not number.is_finite():
+            raise ValidationError({name: "Enter a valid number."})
+        return number
+
+    def normalized(self):
+        """
+        Canonical form of the active filters, e.g. for cache keys.
+        """
+        return {
+            "category": self.category.lower() if self.category else None,
+            "size": self.size,
+            "min_price": str(self.min_price) if self.min_price is not None else None,
+            "max_price": str(self.max_price) if self.max_price is not None else None,
+            "new_arrival": self.new_arrival,
+            "top_selling": self.top_selling,
+        }
+
+    def conditions(self):
+        """
+        Never joins a to-many relation, so the listing rows are not
+        multiplied and no DISTINCT is needed.
+        """
+        conditions = {}
+
+        if self.category:
+            conditions["category"] = Q(category_exists(self.category))
+
+        if self.size:
+            conditions["size"] = Q(active_variant_exists(size=self.size))
+
+        if self.min_price is not None or self.max_price is not None:
+            # One EXISTS, so both bounds apply to the same variant
+            conditions["price"] = Q(
+                price_range_exists(self.min_price, self.max_price)
+            )
+
+        # Flags are columns of the listing row itself, no subquery needed
+        if self.new_arrival is not None:
+            conditions["new_arrival"] = Q(is_new_arrival=self.new_arrival)
+
+        if self.top_selling is not None:
+            conditions["top_selling"] = Q(is_top_selling=self.top_selling)
+
+        return conditions
+
+    def q(self, exclude=None):
+        """
+        All conditions ANDed, optionally leaving one dimension out
+        (facet counts ignore their own dimension).
+        """
+        q = Q()
+        for dimension, condition in self.conditions().items():
+            if dimension != exclude:
+                q &= condition
+        return q
+
+
+class ProductListFilterBackend(BaseFilterBackend):
+    """
+    DRF filter backend applying ProductListFilters to a ProductListing
+    queryset, usable as a filter_backends entry or called directly.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset.filter(ProductListFilters(request.query_params).q())
@@ -0,0 +1,405 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.utils.text import slugify
+
+from .models import (
+    Category,
+    Inventory,
+    Product,
+    ProductFeature,
+    ProductImage,
+    ProductMetrics,
+    ProductType,
+    ProductVariant,
+)
+from .search import get_search_backend
+from .services import ProductListingService
+from .suggest import PRODUCT, get_suggest_index
+
+
+class ImportRowError(Exception):
+    pass
+
+
+# --------------------------------------------------------------------------
+# READERS
+# --------------------------------------------------------------------------
+
+def _split(value):
+    if isinstance(value, list):
+        return value
+    return [part.strip() for part in (value or "").split("|") if part.strip()]
+
+
+def read_jsonl(stream):
+    """
+    One product per line:
+    {"name", "description", "category", "product_type", "features": [...],
+     "images": [public ids], "variants": [{"size", "price", ...}], ...}
+    """
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, ImportRowError(f"invalid JSON: {exc}")
+
+
+PRODUCT_COLUMNS = (
+    "name",
+    "description",
+    "category",
+    "product_type",
+    "is_new_arrival",
+    "is_top_selling",
+)
+
+VARIANT_COLUMNS = ("size", "price", "discount_percent", "stock", "sku")
+
+
+def read_csv(stream):
+    """
+    One row per variant; consecutive rows with the same name are one
+    product. features / images are "|" separated on the first row.
+    """
+    product = None
+    start_line = None
+
+    for line_number, row in enumerate(csv.DictReader(stream), start=2):
+        name = (row.get("name") or "").strip()
+
+        if product is None or name != product["name"]:
+            if product is not None:
+                yield start_line, product
+
+            product = {column: row.get(column) for column in PRODUCT_COLUMNS}
+            product["name"] = name
+            product["features"] = _split(row.get("features"))
+            product["images"] = _split(row.get("images"))
+            product["variants"] = []
+            start_line = line_number
+
+        if row.get("size"):
+            product["variants"].append(
+                {column: row.get(column) for column in VARIANT_COLUMNS}
+            )
+
+    if product is not None:
+        yield start_line, product
+
+
+# --------------------------------------------------------------------------
+# IMPORTER
+# --------------------------------------------------------------------------
+
+class CatalogImporter:
+    """
+    Bulk-creates products with their metrics, features, images, variants
+    and inventory, one transaction per chunk and a fixed number of
+    queries per chunk. Rows are validated up front; a bad row is
+    reported and skipped, it never aborts the chunk.
+
+    With create_missing, unknown categories / product types are created
+    by the first chunk that uses them, in its transaction: a chunk that
+    fails leaves none behind.
+    """
+
+    TRUE_VALUES = {"1", "true", "yes", "y"}
+
+    def __init__(self, chunk_size=1000, create_missing=False):
+        self.chunk_size = chunk_size
+        self.create_missing = create_missing
+
+        self.created = 0
+        self.errors = []
+
+        self._categories = self._lookup(Category)
+        self._product_types = self._lookup(ProductType)
+
+        # Every slug in use, so slugs are allocated in memory per chunk
+        # instead of one exists() query per collision
+        self._taken_slugs = set(
+            Product.objects.values_list("slug", flat=True).iterator()
+        )
+
+    @staticmethod
+    def _lookup(model):
+        lookup = {}
+        for obj in model.objects.all():
+            lookup[obj.slug.lower()] = obj
+            lookup[obj.name.lower()] = obj
+        return lookup
+
+    # ----------------------------------------------------------------------
+    # VALIDATION
+    # ----------------------------------------------------------------------
+
+    def _boolean(self, value):
+        if isinstance(value, bool):
+            return value
+        return str(value or "").strip().lower() in self.TRUE_VALUES
+
+    @staticmethod
+    def _decimal(value, field, minimum=None, maximum=None, default=None):
+        if value in (None, ""):
+            if default is not None:
+                return default
+            raise ImportRowError(f"{field} is required")
+        try:
+            number = Decimal(str(value))
+        except InvalidOperation:
+            raise ImportRowError(f"{field} is not a number")
+        if not number.is_finite():
+            raise ImportRowError(f"{field} is not a number")
+        if minimum is not None and number < minimum:
+            raise ImportRowError(f"{field} must be at least {minimum}")
+        if maximum is not None and number > maximum:
+            raise ImportRowError(f"{field} must be at most {maximum}")
+        return number
+
+    def _resolve(self, lookup, value, field):
+        """
+        The existing object, or with create_missing the name to create
+        it from when its chunk is written (see _create_missing).
+        """
+        key = str(value or "").strip()
+        if not key:
+            raise ImportRowError(f"{field} is required")
+
+        obj = lookup.get(key.lower())
+        if obj is None:
+            if not self.create_missing:
+                raise ImportRowError(f"unknown {field} '{key}'")
+            return key
+        return obj
+
+    def _clean(self, data):
+        if not isinstance(data, dict):
+            raise ImportRowError("expected an object")
+
+        name = str(data.get("name") or "").strip()
+        if not name:
+            raise ImportRowError("name is required")
+
+        sizes = dict(ProductVariant.SIZE_CHOICES)
+        variants = []
+        seen_sizes = set()
+
+        for variant in data.get("variants") or []:
+            size = str(variant.get("size") or "").strip().upper()
+            if size not in sizes:
+                raise ImportRowError(f"invalid size '{size}'")
+            if size in seen_sizes:
+                raise ImportRowError(f"duplicate size '{size}'")
+            seen_sizes.add(size)
+
+            stock = self._decimal(variant.get("stock"), "stock", minimum=0, default=Decimal(0))
+            if stock != stock.to_integral_value():
+                raise ImportRowError("stock must be a whole number")
+
+            variants.append({
+                "size": size,
+                "price": self._decimal(variant.get("price"), "price", minimum=0),
+                "discount_percent": self._decimal(
+                    variant.get("discount_percent"), "discount_percent",
+                    minimum=0, maximum=100, default=Decimal(0),
+                ),
+                "stock": int(stock),
+                "sku": str(variant.get("sku") or "").strip() or None,
+            })
+
+        return {
+            "name": name,
+            "description": str(data.get("description") or ""),
+            "category": self._resolve(self._categories, data.get("category"), "category"),
+            "product_type": self._resolve(
+                self._product_types, data.get("product_type"), "product_type"
+            ),
+            "is_new_arrival": self._boolean(data.get("is_new_arrival")),
+            "is_top_selling": self._boolean(data.get("is_top_selling")),
+            "features": [str(f)[:255] for f in _split(data.get("features"))],
+            "images": _split(data.get("images")),
+            "variants": variants,
+        }
+
+    # ----------------------------------------------------------------------
+    # SLUGS
+    # ----------------------------------------------------------------------
+
+    def _allocate_slug(self, name):
+        base = slugify(name) or "product"
+        slug = base
+        counter = 1
+        while slug in self._taken_slugs:
+            slug = f"{base}-{counter}"
+            counter += 1
+        self._taken_slugs.add(slug)
+        return slug
+
+    # ----------------------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------------------
+
+    def _create_missing(self, lookup, model, value, created):
+        if isinstance(value, model):
+            return value
+
+        # Created by an earlier row of this chunk, or of an earlier chunk
+        obj = lookup.get(value.lower())
+        if obj is None:
+            obj = model.objects.create(name=value)
+            for key in (obj.slug.lower(), obj.name.lower()):
+                lookup[key] = obj
+                created.append((lookup, key))
+        return obj
+
+    def _write_chunk(self, rows):
+        allocated = []
+        created = []
+
+        try:
+            with transaction.atomic():
+                return self._write_rows(rows, allocated, created)
+        except DatabaseError:
+            # Rolled back with the chunk: the next chunk using them
+            # creates them again
+            for lookup, key in created:
+                lookup.pop(key, None)
+            raise
+
+    def _write_rows(self, rows, allocated, created):
+        products = []
+        for row in rows:
+            slug = self._allocate_slug(row["name"])
+            allocated.append(slug)
+            products.append(Product(
+                name=row["name"],
+                slug=slug,
+                description=row["description"],
+                category=self._create_missing(
+                    self._categories, Category, row["category"], created
+                ),
+                product_type=self._create_missing(
+                    self._product_types, ProductType, row["product_type"], created
+                ),
+                is_new_arrival=row["is_new_arrival"],
+                is_top_selling=row["is_top_selling"],
+            ))
+
+        products = Product.objects.bulk_create(products)
+
+        # bulk_create sends no post_save: queue the listing rows here,
+        # products without variants included
+        for product in products:
+            ProductListingService.schedule_refresh(product.pk)
+
+        metrics, features, images, variants = [], [], [], []
+
+        for product, row in zip(products, rows):
+            metrics.append(ProductMetrics(product=product))
+
+            features.extend(
+                ProductFeature(product=product, text=text)
+                for text in row["features"]
+            )
+
+            images.extend(
+                ProductImage(
+                    product=product,
+                    image=public_id,
+                    is_primary=index == 0,
+                    is_secondary=index == 1,
+                    order=index,
+                )
+                for index, public_id in enumerate(row["images"])
+            )
+
+            variants.extend(
+                ProductVariant(
+                    product=product,
+                    size=variant["size"],
+                    sku=variant["sku"] or ProductVariant.generate_sku(),
+                    price=variant["price"],
+                    discount_percent=variant["discount_percent"],
+                )
+                for variant in row["variants"]
+            )
+
+        ProductMetrics.objects.bulk_create(metrics)
+        ProductFeature.objects.bulk_create(features)
+        ProductImage.objects.bulk_create(images)
+
+        # Fills selling_price and min_active_selling_price (see
+        # ProductVariantQuerySet)
+        variants = ProductVariant.objects.bulk_create(variants)
+
+        stock_by_key = {
+            (product.pk, variant["size"]): variant["stock"]
+            for product, row in zip(products, rows)
+            for variant in row["variants"]
+        }
+        Inventory.objects.bulk_create(
+            Inventory(
+                variant=variant,
+                stock=stock_by_key[(variant.product_id, variant.size)],
+            )
+            for variant in variants
+        )
+
+        product_ids = [product.pk for product in products]
+        transaction.on_commit(
+            lambda: get_search_backend().index_products(product_ids)
+        )
+        transaction.on_commit(
+            lambda: get_suggest_index().update(PRODUCT, product_ids)
+        )
+
+        return len(products), allocated
+
+    def flush(self, chunk):
+        if not chunk:
+            return
+
+        try:
+            created, _ = self._write_chunk([row for _, row in chunk])
+        except DatabaseError as exc:
+            # e.g. an IntegrityError, a SKU or slug taken concurrently:
+            # report the whole chunk
+            for line_number, _ in chunk:
+                self.errors.append((line_number, f"chunk failed: {exc}"))
+            return
+
+        self.created += created
+
+    def run(self, records, progress=None):
+        """
+        records: iterable of (line_number, data) from read_csv / read_jsonl.
+        progress(created, errors) is called after every chunk.
+        """
+        chunk = []
+
+        for line_number, data in records:
+            try:
+                if isinstance(data, ImportRowError):
+                    raise data
+                chunk.append((line_number, self._clean(data)))
+            except ImportRowError as exc:
+                self.errors.append((line_number, str(exc)))
+                continue
+
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+                if progress:
+                    progress(self.created, len(self.errors))
+
+        self.flush(chunk)
+        if progress:
+            progress(self.created, len(self.errors))
+
+        return self.created
@@ -0,0 +1,142 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.products.api.serializers.product_listing_serializer import ProductListingSerializer
+from apps.products.models import (
+    Category,
+    Product,
+    ProductImage,
+    ProductListing,
+    ProductType,
+    ProductVariant,
+)
+from apps.products.services import ProductListingService
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time ProductListingSerializer (the product list, search and "
+        "related payloads) per item on 12 and 100 item pages, fast path "
+        "vs the generic field-by-field path, and check that both render "
+        "byte-identical JSON. Test rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=int,
+            nargs="+",
+            default=[12, 100],
+            help="Page sizes to time",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=200,
+            help="Serializations timed per page size",
+        )
+
+    def _create_listings(self, count):
+        category = Category.objects.create(name="Benchmark")
+        product_type = ProductType.objects.create(name="Benchmark")
+
+        product_ids = []
+        for i in range(count):
+            product = Product.objects.create(
+                name=f"Benchmark Product {i}",
+                description="Benchmark",
+                category=category,
+                product_type=product_type,
+            )
+            ProductImage.objects.create(product=product, image=f"bench/{i}", is_primary=True)
+            ProductImage.objects.create(product=product, image=f"bench/{i}b", is_secondary=True, order=1)
+
+            for j, size in enumerate(("S", "M", "L", "XL")):
+                variant = ProductVariant.objects.create(
+                    product=product,
+                    size=size,
+                    price=Decimal(500 + 10 * j),
+                    discount_percent=Decimal("10"),
+                )
+                variant.inventory.stock = j
+                variant.inventory.save()
+
+            product_ids.append(product.pk)
+
+        # The listing refresh runs on commit, and this transaction never commits
+        ProductListingService.refresh(product_ids)
+
+        return list(
+            ProductListing.objects
+            .filter(category=category)
+            .order_by("product_id")
+        )
+
+    @staticmethod
+    def _render(listings, generic):
+        serializer = ProductListingSerializer(
+            listings,
+            many=True,
+            context={
+                "wishlist_product_ids": {listings[0].product_id},
+                "cart_product_ids": {listings[-1].product_id},
+            },
+        )
+
+        if generic:
+            child = serializer.child
+            data = [
+                serializers.ModelSerializer.to_representation(child, listing)
+                for listing in listings
+            ]
+        else:
+            data = serializer.data
+
+        return json.dumps(data, cls=JSONEncoder).encode()
+
+    def _time(self, listings, rounds, generic):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            self._render(listings, generic)
+        elapsed = time.perf_counter() - start
+        return elapsed / (rounds * len(listings)) * 1_000_000
+
+    def handle(self, *args, **options):
+
+        pages = options["pages"]
+
+        try:
+            with transaction.atomic():
+                listings = self._create_listings(max(pages))
+
+                for size in pages:
+                    page = listings[:size]
+
+                    if self._render(page, generic=False) != self._render(page, generic=True):
+                        self.stderr.write(self.style.ERROR(
+                            f"{size} items: fast path output differs"
+                        ))
+
+                    fast = self._time(page, options["rounds"], generic=False)
+                    generic = self._time(page, options["rounds"], generic=True)
+
+                    self.stdout.write(
+                        f"{size:>4} items: fast {fast:7.1f} us/item, "
+                        f"generic {generic:7.1f} us/item"
+                    )
+
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,136 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.products.cache import get_index_version
+from apps.products.models import ProductListing
+from apps.products.suggest import (
+    PrefixIndex,
+    SuggestIndex,
+    PRODUCT,
+    CATEGORY,
+    PRODUCT_TYPE,
+)
+
+
+WORDS = (
+    "compression", "running", "training", "trail", "yoga", "gym", "seamless",
+    "thermal", "breathable", "lightweight", "performance", "studio", "track",
+    "tee", "shorts", "leggings", "hoodie", "jacket", "tank", "bra", "joggers",
+    "socks", "cap", "vest", "pullover", "crew", "mesh", "dry", "fit", "pro",
+    "core", "flex", "active", "sprint", "marathon", "hiit", "zip", "long",
+    "sleeve", "black", "white", "navy", "olive", "grey", "mens", "womens",
+)
+
+
+def synthetic_entities(size, seed=7):
+    rng = random.Random(seed)
+
+    for pk in range(1, 21):
+        yield CATEGORY, pk, f"{rng.choice(WORDS).title()} Wear", f"category-{pk}"
+    for pk in range(1, 41):
+        yield PRODUCT_TYPE, pk, rng.choice(WORDS).title(), f"type-{pk}"
+
+    for pk in range(1, size + 1):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title()
+        yield PRODUCT, pk, f"{name} {pk}", f"{name.lower().replace(' ', '-')}-{pk}"
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the typeahead prefix index on synthetic catalogs, "
+        "optionally against the ORM prefix query on the current database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Synthetic catalog sizes (number of products)",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=5000,
+            help="Queries timed per run",
+        )
+        parser.add_argument(
+            "--orm",
+            action="store_true",
+            help="Also time the ORM istartswith query on the current catalog",
+        )
+
+    def _queries(self, count):
+        rng = random.Random(11)
+        return [
+            rng.choice(WORDS)[:rng.randint(1, 6)]
+            for _ in range(count)
+        ]
+
+    def _time(self, function, queries):
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            function(query)
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        return samples
+
+    def _report(self, label, samples):
+        self.stdout.write(
+            f"  {label:<8} p50 {percentile(samples, 0.50):9.1f} us"
+            f"   p99 {percentile(samples, 0.99):9.1f} us"
+        )
+
+    def handle(self, *args, **options):
+
+        queries = self._queries(options["queries"])
+
+        for size in options["sizes"]:
+
+            start = time.perf_counter()
+            index = SuggestIndex()
+            index._base = PrefixIndex(synthetic_entities(size))
+            # Current, or the first query would reload it from the catalog
+            index._version = get_index_version(SuggestIndex.version_name)
+            build_seconds = time.perf_counter() - start
+
+            entries = len(index._base)
+
+            self.stdout.write(
+                f"{size:,} products: {entries:,} keys, "
+                f"{index._base.nbytes / entries:.1f} bytes/key, "
+                f"built in {build_seconds:.2f}s"
+            )
+            self._report("index", self._time(index.suggest, queries))
+
+        if options["orm"]:
+            count = ProductListing.objects.count()
+
+            def orm_query(query):
+                list(
+                    ProductListing.objects
+                    .filter(
+                        Q(name__istartswith=query) |
+                        Q(category_name__istartswith=query) |
+                        Q(product_type_name__istartswith=query)
+                    )
+                    .order_by("name")
+                    .values_list("product_id", "name", "slug")[:8]
+                )
+
+            # Far fewer round trips, the ORM is orders of magnitude slower
+            orm_queries = queries[:max(1, len(queries) // 10)]
+
+            self.stdout.write(f"ORM on current catalog ({count:,} listings):")
+            self._report("orm", self._time(orm_query, orm_queries))
+
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,89 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.services import BulkInventoryService
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply a warehouse stock sync: CSV with sku,stock or sku,delta "
+        "columns, or JSONL with one {sku, stock|delta} object per line"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="CSV / JSONL file, or - for stdin",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of SKUs updated per transaction",
+        )
+
+    @staticmethod
+    def _read_csv(stream):
+        for row in csv.DictReader(stream):
+            # Empty cells mean "column not used on this row"
+            yield {key: value for key, value in row.items() if value not in (None, "")}
+
+    @staticmethod
+    def _read_jsonl(stream):
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield {}
+
+    def handle(self, *args, **options):
+
+        path = options["path"]
+        fmt = options["format"] or (
+            "csv" if path.endswith(".csv")
+            else "jsonl" if path.endswith((".jsonl", ".ndjson"))
+            else None
+        )
+        if fmt is None:
+            raise CommandError("Cannot tell the format, pass --format.")
+
+        reader = self._read_csv if fmt == "csv" else self._read_jsonl
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+
+        with stream:
+            results = BulkInventoryService.apply(
+                list(reader(stream)),
+                chunk_size=options["chunk_size"],
+            )
+
+        elapsed = time.perf_counter() - started
+
+        failed = [result for result in results if result["status"] != "updated"]
+        for result in failed:
+            self.stderr.write(
+                f"{result['sku']}: {result['status']} {result.get('error', '')}".rstrip()
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {len(results) - len(failed)} SKUs in {elapsed:.1f}s, "
+                f"{len(failed)} failed"
+            )
+        )
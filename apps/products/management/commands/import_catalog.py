@@ -0,0 +1,92 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.importers import CatalogImporter, read_csv, read_jsonl
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a supplier catalog (CSV or JSONL) into the database "
+        "with bulk inserts, chunk by chunk"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="CSV / JSONL file, or - for stdin",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of products written per transaction",
+        )
+        parser.add_argument(
+            "--create-missing",
+            action="store_true",
+            help="Create unknown categories / product types instead of rejecting the row",
+        )
+        parser.add_argument(
+            "--max-errors-shown",
+            type=int,
+            default=20,
+            help="Number of rejected rows printed at the end",
+        )
+
+    def handle(self, *args, **options):
+
+        path = options["path"]
+        fmt = options["format"]
+
+        if fmt is None:
+            if path.endswith(".csv"):
+                fmt = "csv"
+            elif path.endswith((".jsonl", ".ndjson")):
+                fmt = "jsonl"
+            else:
+                raise CommandError("Cannot tell the format, pass --format.")
+
+        reader = read_csv if fmt == "csv" else read_jsonl
+
+        importer = CatalogImporter(
+            chunk_size=options["chunk_size"],
+            create_missing=options["create_missing"],
+        )
+
+        started = time.perf_counter()
+
+        def progress(created, errors):
+            elapsed = time.perf_counter() - started
+            rate = created / elapsed if elapsed else 0
+            self.stdout.write(
+                f"{created} products imported, {errors} rejected "
+                f"({rate:.0f} rows/s)"
+            )
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with stream:
+            created = importer.run(reader(stream), progress=progress)
+
+        elapsed = time.perf_counter() - started
+
+        for line_number, message in importer.errors[:options["max_errors_shown"]]:
+            self.stderr.write(f"line {line_number}: {message}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {created} products in {elapsed:.1f}s "
+                f"({created / elapsed if elapsed else 0:.0f} rows/s), "
+                f"{len(importer.errors)} rejected"
+            )
+        )
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.db import bulk_update_values
+from apps.products.cache import bump_product_versions
+from apps.products.models import ProductImage
+from apps.products.services import ProductListingService
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill the stored rendition URLs of product images "
+        "(ProductImage.urls) and the listing rows that copy them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only images without stored URLs",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of images updated per batch",
+        )
+
+    def handle(self, *args, **options):
+
+        images = ProductImage.objects.only("id", "product_id", "image", "urls").order_by("pk")
+        if options["missing"]:
+            images = images.filter(urls={})
+
+        updated = 0
+        last_pk = 0
+
+        while True:
+            chunk = list(images.filter(pk__gt=last_pk)[:options["chunk_size"]])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            rows = []
+            for image in chunk:
+                urls = image.build_urls()
+                if urls != image.urls:
+                    rows.append((image.pk, urls))
+
+            if rows:
+                bulk_update_values(ProductImage, rows, ["urls"])
+
+                product_ids = {image.product_id for image in chunk}
+                ProductListingService.refresh(product_ids)
+                bump_product_versions(product_ids)
+
+                updated += len(rows)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt URLs of {updated} product images")
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.products.services import ProductListingService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized product listing table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of products refreshed per batch",
+        )
+
+    def handle(self, *args, **options):
+
+        refreshed = ProductListingService.rebuild(
+            chunk_size=options["chunk_size"]
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {refreshed} product listings")
+        )
@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.products.services import ProductMetricsService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the rating totals of every product (ProductMetrics) "
+        "from its ratings, in parallel chunks, and repair the rows that drifted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (1 runs in this process)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of product ids aggregated per task",
+        )
+
+    def handle(self, *args, **options):
+
+        started = time.perf_counter()
+
+        def progress(checked, repaired):
+            self.stdout.write(f"{checked} products checked, {repaired} repaired")
+
+        checked, repaired = ProductMetricsService.rebuild(
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            progress=progress,
+        )
+
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} products in {elapsed:.1f}s, "
+                f"repaired {repaired}"
+            )
+        )
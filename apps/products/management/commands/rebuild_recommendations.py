@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.products.services import ProductRecommendationService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the frequently-bought-together table from the "
+        "co-occurrence of products in orders"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=ProductRecommendationService.top_k,
+            help="Neighbours kept per product",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Only orders placed in the last N days (0 for all)",
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            default=1,
+            help="Split the counting into N passes over the orders to bound memory",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=ProductRecommendationService.chunk_size,
+            help="Order items fetched per round trip",
+        )
+
+    def handle(self, *args, **options):
+
+        started = time.perf_counter()
+        since = (
+            timezone.now() - timedelta(days=options["days"])
+            if options["days"] else None
+        )
+
+        def progress(partition, anchors):
+            self.stdout.write(
+                f"pass {partition + 1}/{options['partitions']}: "
+                f"{anchors} products with neighbours"
+            )
+
+        rows = ProductRecommendationService.build(
+            top_k=options["top_k"],
+            since=since,
+            partitions=options["partitions"],
+            chunk_size=options["chunk_size"],
+            progress=progress,
+        )
+
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {rows} recommendations in {elapsed:.1f}s")
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index"
+
+    def handle(self, *args, **options):
+
+        indexed = get_search_backend().rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {indexed} products for search")
+        )
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.products.services import ProductTrendingService
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the trending score of every product from recent order items "
+        "and update the top selling / new arrival flags"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-selling",
+            type=int,
+            default=ProductTrendingService.top_selling_count,
+            help="Number of products flagged as top selling",
+        )
+        parser.add_argument(
+            "--new-arrival-days",
+            type=int,
+            default=ProductTrendingService.new_arrival_days,
+            help="Products created within this many days are new arrivals",
+        )
+
+    def handle(self, *args, **options):
+
+        started = time.perf_counter()
+
+        result = ProductTrendingService.rollup(
+            top_selling_count=options["top_selling"],
+            new_arrival_days=options["new_arrival_days"],
+        )
+
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scored {result['scored']} products, updated {result['updated']} "
+                f"in {elapsed:.1f}s"
+            )
+        )
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_remove_productimage_image_not_both_primary_and_secondary_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField()),
+                ('description', models.TextField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('product_type_name', models.CharField(max_length=50)),
+                ('primary_image_url', models.CharField(blank=True, max_length=500, null=True)),
+                ('secondary_image_url', models.CharField(blank=True, max_length=500, null=True)),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('in_stock', models.BooleanField(default=False)),
+                ('avg_rating', models.DecimalField(decimal_places=1, default=0, max_digits=2)),
+                ('is_new_arrival', models.BooleanField(default=False)),
+                ('is_top_selling', models.BooleanField(default=False)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category')),
+                ('default_variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.productvariant')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='products_pr_created_818a10_idx'), models.Index(fields=['min_price'], name='products_pr_min_pri_e68722_idx'), models.Index(fields=['category', '-created_at'], name='products_pr_categor_d507bc_idx'), models.Index(fields=['is_featured', '-created_at'], name='products_pr_is_feat_6f4c47_idx')],
+            },
+        ),
+    ]
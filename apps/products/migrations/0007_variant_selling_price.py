@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:05
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Round
+
+
+def backfill_selling_prices(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductVariant = apps.get_model("products", "ProductVariant")
+
+    ProductVariant.objects.update(
+        selling_price=Round(
+            F("price") - (F("price") * F("discount_percent") / 100),
+            2,
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        )
+    )
+
+    lowest = ProductVariant.objects.filter(
+        product=OuterRef("pk"),
+        is_active=True,
+    ).order_by("selling_price").values("selling_price")[:1]
+
+    Product.objects.update(min_active_selling_price=Subquery(lowest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_productlisting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='min_active_selling_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='selling_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_selling_prices, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['min_active_selling_price'], name='products_pr_min_act_213558_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(fields=['selling_price'], name='products_pr_selling_4a176e_idx'),
+        ),
+    ]
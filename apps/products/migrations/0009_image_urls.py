@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='primary_image_urls',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='secondary_image_urls',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-18 01:10
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_totals(apps, schema_editor):
+    ProductMetrics = apps.get_model("products", "ProductMetrics")
+    ProductRating = apps.get_model("products", "ProductRating")
+
+    totals = {
+        row["product_id"]: (row["total"], row["count"])
+        for row in ProductRating.objects.values("product_id")
+        .annotate(total=Sum("rating"), count=Count("id"))
+        .order_by()
+    }
+
+    changed = []
+    for metrics in ProductMetrics.objects.filter(product_id__in=totals.keys()).iterator():
+        total, count = totals[metrics.product_id]
+        metrics.rating_sum = total
+        metrics.rating_count = count
+        metrics.avg_rating = (Decimal(total) / count).quantize(
+            Decimal("0.1"), rounding=ROUND_HALF_UP
+        )
+        changed.append(metrics)
+
+    ProductMetrics.objects.bulk_update(
+        changed, ["rating_sum", "rating_count", "avg_rating"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_image_urls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productmetrics',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
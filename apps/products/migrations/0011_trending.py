@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-18 01:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_productmetrics_rating_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesScore',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_score', serialize=False, to='products.product')),
+                ('units_1d', models.PositiveIntegerField(default=0)),
+                ('units_7d', models.PositiveIntegerField(default=0)),
+                ('units_30d', models.PositiveIntegerField(default=0)),
+                ('score', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='trending_score',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='trending_score',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='productlisting',
+            index=models.Index(fields=['-trending_score', '-product'], name='products_pr_trendin_633fb5_idx'),
+        ),
+    ]
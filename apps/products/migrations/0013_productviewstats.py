@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_productrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductViewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveBigIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_stats', to='products.product')),
+            ],
+            options={
+                'unique_together': {('product', 'day')},
+            },
+        ),
+    ]
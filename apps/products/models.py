@@ -1,9 +1,16 @@
-from django.db import models
-from .mixins import SlugMixin
 import uuid
-from django.db.models import Q
+from decimal import Decimal, ROUND_HALF_UP
+
 from cloudinary.models import CloudinaryField
-from django.db.models import Q
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from .mixins import SlugMixin
 
 
 class Category(SlugMixin):
@@ -47,6 +54,26 @@ class Product(SlugMixin):
     is_top_selling = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False, db_index=True)
 
+    # Lowest selling price among active variants, kept in sync by ProductVariant
+    min_active_selling_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    # Weighted name / category + type / description, see products.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Decayed sales velocity, set by the trending rollup (see ProductSalesScore)
+    trending_score = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=0,
+        editable=False
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -54,6 +81,8 @@ class Product(SlugMixin):
             models.Index(fields=["is_active"]),
             models.Index(fields=["is_top_selling"]),
             models.Index(fields=["created_at"]),
+            models.Index(fields=["min_active_selling_price"]),
+            GinIndex(fields=["search_vector"], name="product_search_vector_gin"),
         ]
 
     def save(self, *args, **kwargs):
@@ -63,6 +92,21 @@ class Product(SlugMixin):
 
     def __str__(self):
         return self.name
+
+    @staticmethod
+    def refresh_min_selling_price(product_ids):
+        """
+        Recompute min_active_selling_price for the given products
+        in a single UPDATE.
+        """
+        lowest = ProductVariant.objects.filter(
+            product=OuterRef("pk"),
+            is_active=True,
+        ).order_by("selling_price").values("selling_price")[:1]
+
+        Product.objects.filter(pk__in=product_ids).update(
+            min_active_selling_price=Subquery(lowest)
+        )
     
 
 #-----------------------------------------------------------------------
@@ -84,6 +128,53 @@ class ProductFeature(models.Model):
 
 
 
+# Renditions stored on ProductImage.urls, so serializers never build
+# Cloudinary URLs per request. The *_2x entries are for srcset.
+IMAGE_VARIANTS = {
+    "thumb": {"width": 150, "height": 150, "crop": "fill", "gravity": "auto"},
+    "card": {"width": 400, "height": 533, "crop": "fill", "gravity": "auto"},
+    "card_2x": {"width": 800, "height": 1066, "crop": "fill", "gravity": "auto"},
+    "detail": {"width": 1000, "crop": "limit"},
+    "detail_2x": {"width": 2000, "crop": "limit"},
+}
+
+IMAGE_VARIANT_OPTIONS = {"fetch_format": "auto", "quality": "auto"}
+
+
+class ProductImageQuerySet(models.QuerySet):
+    """
+    Keeps the stored rendition URLs in sync on bulk writes, like save().
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.urls = obj.build_urls()
+
+        created = super().bulk_create(objs, *args, **kwargs)
+
+        # Files uploaded by the field itself during the insert
+        uploaded = [obj for obj in created if not obj.urls and obj.image]
+        for obj in uploaded:
+            obj.urls = obj.build_urls()
+        if uploaded:
+            super().bulk_update(uploaded, ["urls"])
+
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+
+        if "image" in fields:
+            for obj in objs:
+                obj.urls = obj.build_urls()
+            if "urls" not in fields:
+                fields.append("urls")
+
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
 class ProductImage(models.Model):
 
     product = models.ForeignKey(
@@ -107,8 +198,13 @@ class ProductImage(models.Model):
 
     order = models.PositiveSmallIntegerField(default=0)
 
+    # {"original": url, "thumb": url, ...}, see IMAGE_VARIANTS
+    urls = models.JSONField(default=dict, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProductImageQuerySet.as_manager()
+
     class Meta:
         ordering = ["order"]
 
@@ -134,10 +230,139 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"{self.product.name} image"
 
+    def build_urls(self):
+        image = self.image
+        if isinstance(image, str):
+            image = self._meta.get_field("image").to_python(image)
+
+        # Empty, or a file not uploaded yet
+        if not hasattr(image, "build_url"):
+            return {}
+
+        urls = {"original": image.build_url()}
+        for name, transformation in IMAGE_VARIANTS.items():
+            urls[name] = image.build_url(**transformation, **IMAGE_VARIANT_OPTIONS)
+        return urls
+
+    def url_for(self, variant="original"):
+        """
+        Stored URL of a rendition, built on the fly for rows not backfilled yet.
+        """
+        url = self.urls.get(variant) if self.urls else None
+        if url is None:
+            url = self.build_urls().get(variant)
+        return url
+
+    def save(self, *args, **kwargs):
+        self.urls = self.build_urls()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "image" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"urls"}
+
+        super().save(*args, **kwargs)
+
+        # The field uploaded a file during the save
+        if not self.urls and self.image:
+            self.urls = self.build_urls()
+            ProductImage.objects.filter(pk=self.pk).update(urls=self.urls)
+
 #--------------------------------------------------------------
 
-from decimal import Decimal
-from django.core.validators import MinValueValidator, MaxValueValidator
+
+def selling_price_expression(price=None, discount_percent=None):
+    """
+    SQL expression for the stored selling_price. UPDATE reads the old
+    column values, so new price / discount values are passed in directly.
+    """
+    decimal = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def _value(value, field):
+        if value is None:
+            return F(field)
+        if hasattr(value, "resolve_expression"):
+            return value
+        return Value(Decimal(value), output_field=decimal)
+
+    price = _value(price, "price")
+    discount_percent = _value(discount_percent, "discount_percent")
+
+    return Round(
+        price - (price * discount_percent / 100),
+        2,
+        output_field=decimal,
+    )
+
+PRICE_FIELDS = {"price", "discount_percent", "is_active"}
+
+
+class ProductVariantQuerySet(models.QuerySet):
+    """
+    Keeps the stored selling_price (and the parent product's
+    min_active_selling_price) in sync on bulk writes.
+    """
+
+    def _refresh_products(self, product_ids):
+        from .cache import bump_catalog_version, bump_product_versions
+        from .services import ProductListingService
+
+        if not product_ids:
+            return
+
+        Product.refresh_min_selling_price(product_ids)
+        for product_id in product_ids:
+            ProductListingService.schedule_refresh(product_id)
+
+        # Bulk writes send no signals, drop the cached detail bodies and
+        # facet counts here
+        def invalidate():
+            bump_catalog_version()
+            bump_product_versions(product_ids)
+
+        transaction.on_commit(invalidate)
+
+    def update(self, **kwargs):
+        if not PRICE_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+
+        if {"price", "discount_percent"} & kwargs.keys():
+            kwargs.setdefault("selling_price", selling_price_expression(
+                kwargs.get("price"),
+                kwargs.get("discount_percent"),
+            ))
+
+        product_ids = set(self.values_list("product_id", flat=True))
+        rows = super().update(**kwargs)
+        self._refresh_products(product_ids)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.selling_price = obj.compute_selling_price()
+
+        created = super().bulk_create(objs, *args, **kwargs)
+        self._refresh_products({obj.product_id for obj in objs})
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+
+        if {"price", "discount_percent"} & set(fields):
+            for obj in objs:
+                obj.selling_price = obj.compute_selling_price()
+            if "selling_price" not in fields:
+                fields.append("selling_price")
+
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+
+        if PRICE_FIELDS & set(fields):
+            self._refresh_products({obj.product_id for obj in objs})
+        return rows
+
 
 class ProductVariant(models.Model):
 
@@ -170,8 +395,18 @@ class ProductVariant(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
 
+    # price - discount, rounded to paise; kept in sync in save() and bulk writes
+    selling_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False
+    )
+
     is_active = models.BooleanField(default=True)
 
+    objects = ProductVariantQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -179,30 +414,53 @@ class ProductVariant(models.Model):
                 name="unique_variant_size_per_product"
             )
         ]
+        indexes = [
+            models.Index(fields=["selling_price"]),
+        ]
 
-    @property
-    def selling_price(self):
+    def compute_selling_price(self):
         if self.price is None or self.discount_percent is None:
             return Decimal("0.00")
-        discount = (self.price * self.discount_percent) / Decimal("100")
-        return self.price - discount
+        price = Decimal(self.price)
+        discount = (price * Decimal(self.discount_percent)) / Decimal("100")
+        return (price - discount).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
     def __str__(self):
         return f"{self.product.name} - {self.size}"
     
+    @staticmethod
+    def generate_sku():
+        return f"SKU-{uuid.uuid4().hex[:8].upper()}"
+
     def save(self, *args, **kwargs):
         if not self.sku:
-            self.sku = f"SKU-{uuid.uuid4().hex[:8].upper()}"
+            self.sku = self.generate_sku()
+
+        self.selling_price = self.compute_selling_price()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {"price", "discount_percent"} & update_fields:
+                update_fields.add("selling_price")
+            kwargs["update_fields"] = update_fields
+
         super().save(*args, **kwargs)
 
+        if update_fields is None or PRICE_FIELDS & update_fields:
+            Product.refresh_min_selling_price([self.product_id])
 
+    def delete(self, *args, **kwargs):
+        product_id = self.product_id
+        result = super().delete(*args, **kwargs)
+        Product.refresh_min_selling_price([product_id])
+        return result
 
 
-#----------------------------------------------------------------
 
 
-from django.db import models
-from django.db.models import F, Q
+#----------------------------------------------------------------
+
 
 class Inventory(models.Model):
     variant = models.OneToOneField(
@@ -229,9 +487,12 @@ class Inventory(models.Model):
 
 #-----------------------------------------------------------------------------------------
 
-from django.db.models import Avg, Count
-
 class ProductMetrics(models.Model):
+    """
+    Running rating totals. Ratings are applied as deltas (see the
+    ProductRating signals); rebuild_product_metrics repairs drift.
+    """
+
     product = models.OneToOneField(
         Product,
         related_name="metrics",
@@ -243,21 +504,68 @@ class ProductMetrics(models.Model):
         default=0
     )
     rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    @staticmethod
+    def average(rating_sum, rating_count):
+        if not rating_count:
+            return Decimal("0.0")
+        return (Decimal(rating_sum) / rating_count).quantize(
+            Decimal("0.1"), rounding=ROUND_HALF_UP
+        )
+
+    @staticmethod
+    def average_expression(rating_sum, rating_count):
+        """
+        SQL counterpart of average(), for UPDATEs.
+        """
+        return Coalesce(
+            Round(
+                Cast(rating_sum, models.FloatField()) / NullIf(rating_count, Value(0)),
+                1,
+            ),
+            Value(Decimal("0.0")),
+            output_field=models.DecimalField(max_digits=2, decimal_places=1),
+        )
+
+    @staticmethod
+    def apply_rating_delta(product_id, sum_delta, count_delta):
+        """
+        Add a rating change to the running totals with a single
+        UPDATE, whatever the number of ratings. Returns False if the
+        product has no metrics row.
+        """
+        from .cache import bump_product_versions
+        from .services import ProductListingService
+
+        rating_sum = F("rating_sum") + sum_delta
+        rating_count = F("rating_count") + count_delta
+
+        updated = ProductMetrics.objects.filter(product_id=product_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            avg_rating=ProductMetrics.average_expression(rating_sum, rating_count),
+        )
+
+        if updated:
+            # update() sends no signals
+            ProductListingService.schedule_refresh(product_id)
+            transaction.on_commit(lambda: bump_product_versions([product_id]))
+
+        return bool(updated)
 
     def recalculate(self):
         data = self.product.ratings.aggregate(
-            avg=Avg("rating"),
+            total=Sum("rating"),
             count=Count("id")
         )
 
-        self.avg_rating = round(data["avg"] or 0, 1)
+        self.rating_sum = data["total"] or 0
         self.rating_count = data["count"]
-        self.save(update_fields=["avg_rating", "rating_count"])
+        self.avg_rating = self.average(self.rating_sum, self.rating_count)
+        self.save(update_fields=["avg_rating", "rating_count", "rating_sum"])
 
 
-from django.conf import settings
-from django.core.validators import MinValueValidator, MaxValueValidator
-
 class ProductRating(models.Model):
     product = models.ForeignKey(
         Product,
@@ -276,6 +584,157 @@ class ProductRating(models.Model):
     class Meta:
         unique_together = ("product", "user")  
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What ProductMetrics holds for this rating, so an edit is
+        # applied as the difference (see signals)
+        instance._stored_rating = instance.__dict__.get("rating")
+        return instance
+
+
+#-----------------------------------------------------------------------------------------
+
+class ProductSalesScore(models.Model):
+    """
+    Output of the trending rollup (ProductTrendingService): units sold
+    in each sliding window and the decayed velocity built from them.
+    One row per product that sold anything in the longest window.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        related_name="sales_score",
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    units_1d = models.PositiveIntegerField(default=0)
+    units_7d = models.PositiveIntegerField(default=0)
+    units_30d = models.PositiveIntegerField(default=0)
+    score = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product_id}: {self.score}"
+
+
+class ProductViewStats(models.Model):
+    """
+    Product detail views per day. Written only in bulk, by the
+    per-process view counters (see products.view_counter).
+    """
+
+    product = models.ForeignKey(
+        Product,
+        related_name="view_stats",
+        on_delete=models.CASCADE
+    )
+    day = models.DateField()
+    views = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("product", "day")
+
+    def __str__(self):
+        return f"{self.product_id} {self.day}: {self.views}"
+
+
+class ProductRecommendation(models.Model):
+    """
+    Top-K "frequently bought together" neighbours of a product, rebuilt
+    in batch by ProductRecommendationService from order co-occurrence.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        related_name="recommendations",
+        on_delete=models.CASCADE
+    )
+    related = models.ForeignKey(
+        Product,
+        related_name="+",
+        on_delete=models.CASCADE
+    )
+    # Orders that contain both products
+    orders = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["product", "rank"]
+        unique_together = ("product", "rank")
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.orders})"
+
+
+#-----------------------------------------------------------------------------------------
+
+class ProductListing(models.Model):
+    """
+    Denormalized read model for the storefront listing.
+    One row per active product, kept in sync by signals
+    (see apps.products.services.ProductListingService).
+    """
+
+    product = models.OneToOneField(
+        Product,
+        related_name="listing",
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    category = models.ForeignKey(
+        Category,
+        related_name="+",
+        on_delete=models.CASCADE
+    )
+
+    name = models.CharField(max_length=255)
+    slug = models.SlugField()
+    description = models.TextField()
+    category_name = models.CharField(max_length=100)
+    product_type_name = models.CharField(max_length=50)
+
+    primary_image_url = models.CharField(max_length=500, null=True, blank=True)
+    secondary_image_url = models.CharField(max_length=500, null=True, blank=True)
+    primary_image_urls = models.JSONField(default=dict, blank=True)
+    secondary_image_urls = models.JSONField(default=dict, blank=True)
+
+    # Default variant: cheapest in-stock active variant, else cheapest active one
+    default_variant = models.ForeignKey(
+        ProductVariant,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    in_stock = models.BooleanField(default=False)
+
+    avg_rating = models.DecimalField(max_digits=2, decimal_places=1, default=0)
+
+    is_new_arrival = models.BooleanField(default=False)
+    is_top_selling = models.BooleanField(default=False)
+    is_featured = models.BooleanField(default=False)
+    trending_score = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"]),
+            models.Index(fields=["min_price"]),
+            models.Index(fields=["category", "-created_at"]),
+            models.Index(fields=["is_featured", "-created_at"]),
+            # sort=trending: most products score 0, so the key carries the tie-breaker
+            models.Index(fields=["-trending_score", "-product"]),
+        ]
+
+    def __str__(self):
+        return self.name
+
 
 
 # Category
@@ -287,3 +746,7 @@ class ProductRating(models.Model):
 # Inventory
 # ProductMetrics
 # ProductRating
+# ProductSalesScore
+# ProductViewStats
+# ProductRecommendation
+# ProductListing
@@ -0,0 +1,320 @@
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+
+from .cache import bump_index_version, get_index_version
+from .models import Category, Product, ProductType
+
+
+SearchHit = namedtuple("SearchHit", ["product_id", "score"])
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Longer queries are cut, nobody types more than this in a search box
+MAX_QUERY_TERMS = 8
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def query_terms(query):
+    return tokenize(query)[:MAX_QUERY_TERMS]
+
+
+class BaseSearchBackend:
+    """
+    Ranks active products for a free-text query.
+
+    Results are ordered by (score desc, product_id asc); `after` is the
+    (score, product_id) of the last hit of the previous page.
+    """
+
+    def search(self, query, limit, after=None):
+        raise NotImplementedError
+
+    def index_products(self, product_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+
+# --------------------------------------------------------------------------
+# POSTGRESQL
+# --------------------------------------------------------------------------
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Weighted tsvector stored on Product.search_vector (GIN indexed):
+    A = name, B = category + product type, C = description.
+    """
+
+    config = "english"
+
+    def _vector(self):
+        category_name = Subquery(
+            Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1]
+        )
+        product_type_name = Subquery(
+            ProductType.objects.filter(pk=OuterRef("product_type_id")).values("name")[:1]
+        )
+
+        return (
+            SearchVector("name", weight="A", config=self.config)
+            + SearchVector(
+                category_name, product_type_name, weight="B", config=self.config
+            )
+            + SearchVector("description", weight="C", config=self.config)
+        )
+
+    def index_products(self, product_ids):
+        Product.objects.filter(pk__in=product_ids).update(
+            search_vector=self._vector()
+        )
+
+    def rebuild(self):
+        return Product.objects.update(search_vector=self._vector())
+
+    def search(self, query, limit, after=None):
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        # Every term must match, the last one as a prefix (typeahead)
+        tsquery = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+        search_query = SearchQuery(tsquery, search_type="raw", config=self.config)
+
+        queryset = (
+            Product.objects
+            .filter(is_active=True, search_vector=search_query)
+            # ts_rank is a float4, widen it so the cursor value compares exactly
+            .annotate(rank=Cast(
+                SearchRank(F("search_vector"), search_query),
+                FloatField(),
+            ))
+        )
+
+        if after is not None:
+            score, product_id = after
+            queryset = queryset.filter(
+                Q(rank__lt=score) | Q(rank=score, pk__gt=product_id)
+            )
+
+        rows = queryset.order_by("-rank", "pk").values_list("pk", "rank")[:limit]
+
+        return [SearchHit(pk, rank) for pk, rank in rows]
+
+
+# --------------------------------------------------------------------------
+# IN-MEMORY (SQLITE / TESTS)
+# --------------------------------------------------------------------------
+
+class InMemorySearchBackend(BaseSearchBackend):
+    """
+    Per-process inverted index with the same weighting as the
+    PostgreSQL backend. Built lazily on the first search and kept
+    current by the product signals; a process that missed another
+    process's update (the shared index version moved past its own)
+    reloads on its next search.
+    """
+
+    weights = {"A": 1.0, "B": 0.4, "C": 0.2}
+    version_name = "search"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = None
+        self._postings = defaultdict(dict)   # token -> {product_id: weight}
+        self._documents = {}                 # product_id -> tokens
+        self._vocabulary = []                # sorted tokens, for prefixes
+
+    # ----------------------------------------------------------------------
+    # INDEX
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def _rows(product_ids=None):
+        queryset = Product.objects.filter(is_active=True)
+        if product_ids is not None:
+            queryset = queryset.filter(pk__in=product_ids)
+
+        return queryset.values_list(
+            "pk",
+            "name",
+            "category__name",
+            "product_type__name",
+            "description",
+        )
+
+    def _remove(self, product_id):
+        for token in self._documents.pop(product_id, ()):
+            postings = self._postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _add(self, row):
+        product_id, name, category_name, product_type_name, description = row
+
+        fields = (
+            (name, "A"),
+            (category_name, "B"),
+            (product_type_name, "B"),
+            (description, "C"),
+        )
+
+        for text, weight in fields:
+            for token in tokenize(text):
+                if token not in self._postings:
+                    insort(self._vocabulary, token)
+                postings = self._postings[token]
+                postings[product_id] = postings.get(product_id, 0) + self.weights[weight]
+
+        self._documents[product_id] = {
+            token for text, _ in fields for token in tokenize(text)
+        }
+
+    def _ensure_loaded(self):
+        # Read first: an update committed during the load reloads again
+        version = get_index_version(self.version_name)
+        if self._loaded and version == self._version:
+            return
+
+        self._postings.clear()
+        self._documents.clear()
+        self._vocabulary.clear()
+
+        for row in self._rows().iterator():
+            self._add(row)
+        self._loaded = True
+        self._version = version
+
+    def index_products(self, product_ids):
+        product_ids = set(product_ids)
+
+        with self._lock:
+            version = bump_index_version(self.version_name)
+
+            # Not loaded yet, or another process updated it meanwhile:
+            # the next search reads everything anyway
+            if not self._loaded or version != self._version + 1:
+                return
+            self._version = version
+
+            for product_id in product_ids:
+                self._remove(product_id)
+            for row in self._rows(product_ids):
+                self._add(row)
+
+    def rebuild(self):
+        with self._lock:
+            bump_index_version(self.version_name)
+            self._loaded = False
+            self._ensure_loaded()
+            return len(self._documents)
+
+    # ----------------------------------------------------------------------
+    # SEARCH
+    # ----------------------------------------------------------------------
+
+    def _prefix_tokens(self, prefix):
+        start = bisect_left(self._vocabulary, prefix)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    @staticmethod
+    def _saturate(weight):
+        # Repeats count, but with diminishing returns (like ts_rank)
+        return math.log1p(weight)
+
+    def search(self, query, limit, after=None):
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            self._ensure_loaded()
+
+            scores = None
+            for index, term in enumerate(terms):
+                tokens = (
+                    self._prefix_tokens(term) if index == len(terms) - 1
+                    else [term] if term in self._postings
+                    else []
+                )
+
+                matched = defaultdict(float)
+                for token in tokens:
+                    for product_id, weight in self._postings[token].items():
+                        matched[product_id] += weight
+
+                if scores is None:
+                    scores = {
+                        pid: self._saturate(weight) for pid, weight in matched.items()
+                    }
+                else:
+                    scores = {
+                        pid: score + self._saturate(matched[pid])
+                        for pid, score in scores.items()
+                        if pid in matched
+                    }
+
+                if not scores:
+                    return []
+
+        hits = sorted(
+            (SearchHit(pid, score) for pid, score in scores.items()),
+            key=lambda hit: (-hit.score, hit.product_id),
+        )
+
+        if after is not None:
+            score, product_id = after
+            hits = [
+                hit for hit in hits
+                if hit.score < score
+                or (hit.score == score and hit.product_id > product_id)
+            ]
+
+        return hits[:limit]
+
+
+# --------------------------------------------------------------------------
+# BACKEND SELECTION
+# --------------------------------------------------------------------------
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    settings.PRODUCT_SEARCH_BACKEND (dotted path) if set, otherwise
+    PostgreSQL full-text search on PostgreSQL and the in-memory index
+    everywhere else.
+    """
+    global _backend
+
+    if _backend is None:
+        path = getattr(settings, "PRODUCT_SEARCH_BACKEND", None)
+
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == "postgresql":
+            _backend = PostgresSearchBackend()
+        else:
+            _backend = InMemorySearchBackend()
+
+    return _backend
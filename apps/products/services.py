@@ -0,0 +1,1161 @@
+import hashlib
+import heapq
+import json
+import logging
+import threading
+import weakref
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+import django
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Count, Max, Min, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import (
+    bump_catalog_version,
+    bump_product_versions,
+    get_catalog_version,
+    get_product_version,
+)
+from .filters import PRICE_BUCKETS, active_variant_exists, price_range_exists
+from apps.cart.models import CartItem
+from apps.common.db import bulk_insert_values, bulk_update_values
+from apps.orders.models import OrderItem, OrderStatus
+from apps.wishlist.models import WishlistItem
+
+from .api.serializers.product_detail_serializer import ProductDetailSerializer
+from .api.serializers.product_listing_serializer import ProductListingSerializer
+from .models import (
+    Category,
+    Inventory,
+    Product,
+    ProductImage,
+    ProductMetrics,
+    ProductRating,
+    ProductRecommendation,
+    ProductSalesScore,
+    ProductVariant,
+    ProductListing,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------------
+# PRODUCT LISTING (READ MODEL)
+# --------------------------------------------------------------------------
+
+LISTING_UPDATE_FIELDS = [
+    "category",
+    "name",
+    "slug",
+    "description",
+    "category_name",
+    "product_type_name",
+    "primary_image_url",
+    "secondary_image_url",
+    "primary_image_urls",
+    "secondary_image_urls",
+    "default_variant",
+    "price",
+    "min_price",
+    "in_stock",
+    "avg_rating",
+    "is_new_arrival",
+    "is_top_selling",
+    "is_featured",
+    "trending_score",
+    "created_at",
+    "updated_at",
+]
+
+
+class _ListingRefresh:
+    """
+    on_commit callback that collects product ids, so one transaction
+    touching many images / variants refreshes each product only once.
+    """
+
+    def __init__(self):
+        self.product_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        product_ids, self.product_ids = self.product_ids, set()
+        ProductListingService.refresh(product_ids)
+
+
+# The refresh queued for this thread's transaction (connections are per
+# thread), see schedule_refresh
+_pending_refresh = threading.local()
+
+
+class ProductListingService:
+
+    # ----------------------------------------------------------------------
+    # SCHEDULE (USED BY SIGNALS)
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def schedule_refresh(product_id):
+        if not transaction.get_connection().in_atomic_block:
+            ProductListingService.refresh([product_id])
+            return
+
+        # Reuse the callback already queued for this transaction. Only
+        # Django holds it: when it drops the callbacks of a rolled back
+        # transaction or savepoint the weak reference dies with them,
+        # so a stale one is never picked up here.
+        ref = getattr(_pending_refresh, "callback", None)
+        callback = ref() if ref is not None else None
+
+        if callback is None or callback.done:
+            callback = _ListingRefresh()
+            _pending_refresh.callback = weakref.ref(callback)
+            transaction.on_commit(callback)
+
+        callback.product_ids.add(product_id)
+
+    # ----------------------------------------------------------------------
+    # BUILD ROWS
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def _image_url(image):
+        return image.url_for() if image and image.image else None
+
+    @staticmethod
+    def _image_urls(image):
+        return image.urls if image and image.image else {}
+
+    @staticmethod
+    def _money(value):
+        return value.quantize(Decimal("0.01")) if value is not None else None
+
+    @staticmethod
+    def build(product):
+        """
+        Build an unsaved ProductListing row from a product fetched with
+        images, active variants (+ inventory) and metrics prefetched.
+        """
+        variants = list(product.variants.all())
+
+        in_stock_variants = [
+            v for v in variants
+            if hasattr(v, "inventory") and v.inventory.available_stock > 0
+        ]
+
+        # Prefer in-stock variants
+        candidates = in_stock_variants or variants
+        default_variant = (
+            min(candidates, key=lambda v: v.selling_price)
+            if candidates else None
+        )
+
+        min_price = (
+            min(v.selling_price for v in variants)
+            if variants else None
+        )
+
+        images = list(product.images.all())
+        primary = next((img for img in images if img.is_primary), None)
+        secondary = next((img for img in images if img.is_secondary), None)
+
+        metrics = getattr(product, "metrics", None)
+
+        return ProductListing(
+            product=product,
+            category_id=product.category_id,
+            name=product.name,
+            slug=product.slug,
+            description=product.description,
+            category_name=product.category.name,
+            product_type_name=product.product_type.name,
+            primary_image_url=ProductListingService._image_url(primary),
+            secondary_image_url=ProductListingService._image_url(secondary),
+            primary_image_urls=ProductListingService._image_urls(primary),
+            secondary_image_urls=ProductListingService._image_urls(secondary),
+            default_variant=default_variant,
+            price=ProductListingService._money(
+                default_variant.selling_price if default_variant else None
+            ),
+            min_price=ProductListingService._money(min_price),
+            in_stock=bool(in_stock_variants),
+            avg_rating=metrics.avg_rating if metrics else 0,
+            is_new_arrival=product.is_new_arrival,
+            is_top_selling=product.is_top_selling,
+            is_featured=product.is_featured,
+            trending_score=product.trending_score,
+            created_at=product.created_at,
+        )
+
+    # ----------------------------------------------------------------------
+    # REFRESH
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def refresh(product_ids):
+        """
+        Upsert listing rows for the given products and drop the rows
+        of products that are inactive or no longer exist.
+        """
+        product_ids = set(product_ids)
+
+        if not product_ids:
+            return 0
+
+        products = (
+            Product.objects
+            .filter(pk__in=product_ids, is_active=True)
+            .select_related("category", "product_type", "metrics")
+            .prefetch_related(
+                Prefetch(
+                    "images",
+                    queryset=ProductImage.objects.filter(
+                        Q(is_primary=True) | Q(is_secondary=True)
+                    ),
+                ),
+                Prefetch(
+                    "variants",
+                    queryset=ProductVariant.objects
+                    .filter(is_active=True)
+                    .select_related("inventory"),
+                ),
+            )
+        )
+
+        rows = [ProductListingService.build(product) for product in products]
+
+        faceted = {
+            product_id: (category_id, is_new_arrival, is_top_selling)
+            for product_id, category_id, is_new_arrival, is_top_selling in (
+                ProductListing.objects
+                .filter(product_id__in=product_ids)
+                .values_list("product_id", "category_id", "is_new_arrival", "is_top_selling")
+            )
+        }
+
+        with transaction.atomic():
+            ProductListing.objects.filter(
+                product_id__in=product_ids
+            ).exclude(
+                product_id__in=[row.product_id for row in rows]
+            ).delete()
+
+            ProductListing.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=LISTING_UPDATE_FIELDS,
+            )
+
+        # Variant sizes / prices bump it where they are written
+        if faceted != {
+            row.product_id: (row.category_id, row.is_new_arrival, row.is_top_selling)
+            for row in rows
+        }:
+            bump_catalog_version()
+
+        return len(rows)
+
+    @staticmethod
+    def refresh_stock(product_ids):
+        """
+        Narrow refresh after stock-only changes: recomputes just
+        default_variant / price / in_stock, with the same rules as
+        build(), without touching images or names.
+        """
+        product_ids = set(product_ids)
+
+        if not product_ids:
+            return 0
+
+        variants = {}
+        for product_id, variant_id, selling_price, stock, reserved in (
+            ProductVariant.objects
+            .filter(product_id__in=product_ids, is_active=True)
+            .order_by("pk")
+            .values_list(
+                "product_id", "pk", "selling_price",
+                "inventory__stock", "inventory__reserved",
+            )
+        ):
+            in_stock = stock is not None and stock - reserved > 0
+            variants.setdefault(product_id, []).append(
+                (selling_price, variant_id, in_stock)
+            )
+
+        updates = []
+        for product_id in product_ids:
+            rows = variants.get(product_id, [])
+            in_stock_rows = [row for row in rows if row[2]]
+            candidates = in_stock_rows or rows
+
+            default = min(candidates, key=lambda row: row[0]) if candidates else None
+
+            updates.append((
+                product_id,
+                default[1] if default else None,
+                ProductListingService._money(default[0] if default else None),
+                bool(in_stock_rows),
+            ))
+
+        # Products without a listing row (inactive) simply match nothing
+        updated = bulk_update_values(
+            ProductListing,
+            updates,
+            ["default_variant", "price", "in_stock"],
+        )
+
+        return updated
+
+    @staticmethod
+    def rebuild(chunk_size=500):
+        """
+        Rebuild the whole listing table in chunks of product ids.
+        """
+        product_ids = list(
+            Product.objects.order_by("pk").values_list("pk", flat=True)
+        )
+
+        deleted, _ = ProductListing.objects.filter(product__is_active=False).delete()
+        if deleted:
+            bump_catalog_version()
+
+        refreshed = 0
+        for start in range(0, len(product_ids), chunk_size):
+            refreshed += ProductListingService.refresh(
+                product_ids[start:start + chunk_size]
+            )
+
+        return refreshed
+
+
+# --------------------------------------------------------------------------
+# FACETS
+# --------------------------------------------------------------------------
+
+class ProductFacetService:
+
+    cache_timeout = 60 * 5
+
+    @staticmethod
+    def _cache_key(filters):
+        raw = json.dumps(filters.normalized(), sort_keys=True)
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f"products:facets:{get_catalog_version()}:{digest}"
+
+    @staticmethod
+    def get_facets(filters):
+        key = ProductFacetService._cache_key(filters)
+        facets = cache.get(key)
+
+        if facets is None:
+            facets = ProductFacetService.compute(filters)
+            cache.set(key, facets, ProductFacetService.cache_timeout)
+
+        return facets
+
+    @staticmethod
+    def compute(filters):
+        """
+        Every facet count in one aggregate over the listing table.
+        Each facet applies all filters except its own dimension.
+        """
+        categories = list(
+            Category.objects.order_by("name").values_list("pk", "slug", "name")
+        )
+        sizes = ProductVariant.SIZE_CHOICES
+
+        aggregates = {"total": Count("pk", filter=filters.q())}
+
+        without_category = filters.q(exclude="category")
+        for pk, _, _ in categories:
+            aggregates[f"category_{pk}"] = Count(
+                "pk", filter=without_category & Q(category_id=pk)
+            )
+
+        without_size = filters.q(exclude="size")
+        for value, _ in sizes:
+            aggregates[f"size_{value}"] = Count(
+                "pk", filter=without_size & Q(active_variant_exists(size=value))
+            )
+
+        without_price = filters.q(exclude="price")
+        for index, (low, high) in enumerate(PRICE_BUCKETS):
+            aggregates[f"price_{index}"] = Count(
+                "pk",
+                filter=without_price & Q(
+                    price_range_exists(low, high, upper_inclusive=False)
+                ),
+            )
+
+        counts = ProductListing.objects.aggregate(**aggregates)
+
+        return {
+            "total": counts["total"],
+            "categories": [
+                {"slug": slug, "name": name, "count": counts[f"category_{pk}"]}
+                for pk, slug, name in categories
+            ],
+            "sizes": [
+                {"value": value, "label": label, "count": counts[f"size_{value}"]}
+                for value, label in sizes
+            ],
+            "price_ranges": [
+                {
+                    "min": str(low),
+                    "max": str(high) if high is not None else None,
+                    "count": counts[f"price_{index}"],
+                }
+                for index, (low, high) in enumerate(PRICE_BUCKETS)
+            ],
+        }
+
+
+# --------------------------------------------------------------------------
+# PRODUCT DETAIL (CACHED ANONYMOUS BODY)
+# --------------------------------------------------------------------------
+
+class ProductDetailService:
+
+    cache_timeout = 60 * 60
+
+    @staticmethod
+    def _slug_key(slug):
+        return f"products:slug:{slug}"
+
+    @staticmethod
+    def _body_key(slug, product_id, version):
+        return f"products:detail:{slug}:{product_id}:{version}"
+
+    @staticmethod
+    def _serialize(slug):
+        product = (
+            Product.objects
+            .select_related("category", "product_type", "metrics")
+            .prefetch_related("images", "features", "variants__inventory")
+            .filter(slug=slug, is_active=True)
+            .first()
+        )
+
+        if product is None:
+            return None
+
+        # No flags in context: the cached body is the anonymous one
+        return product.pk, ProductDetailSerializer(product).data
+
+    @staticmethod
+    def get_body(slug):
+        """
+        Anonymous detail payload for an active product, or None.
+        Keyed on slug + the product's version, which signals bump
+        on any product / variant / inventory / image / feature /
+        metrics change.
+
+        The version is read before the product is: a write landing
+        while the body is serialized bumps it, so the stale body is
+        stored under a version nobody asks for again.
+        """
+        product_id = cache.get(ProductDetailService._slug_key(slug))
+
+        if product_id is None:
+            product_id = (
+                Product.objects
+                .filter(slug=slug, is_active=True)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if product_id is None:
+                return None
+
+        version = get_product_version(product_id)
+
+        body = cache.get(ProductDetailService._body_key(slug, product_id, version))
+        if body is not None:
+            return body
+
+        serialized = ProductDetailService._serialize(slug)
+        if serialized is None:
+            cache.delete(ProductDetailService._slug_key(slug))
+            return None
+
+        serialized_id, body = serialized
+
+        # The slug moved to another product in between: serve, don't cache
+        if serialized_id != product_id:
+            cache.delete(ProductDetailService._slug_key(slug))
+            return body
+
+        cache.set_many({
+            ProductDetailService._slug_key(slug): product_id,
+            ProductDetailService._body_key(slug, product_id, version): body,
+        }, ProductDetailService.cache_timeout)
+
+        return body
+
+    @staticmethod
+    def personalize(body, user):
+        """
+        Copy of the cached body with the per-user wishlist / cart flags.
+        """
+        body = dict(body)
+
+        if not user.is_authenticated:
+            return body
+
+        variant_ids = [variant["id"] for variant in body["variants"]]
+
+        body["is_in_wishlist"] = WishlistItem.objects.filter(
+            wishlist__user=user,
+            product_variant_id__in=variant_ids,
+        ).exists()
+
+        body["is_in_cart"] = CartItem.objects.filter(
+            cart__user=user,
+            variant_id__in=variant_ids,
+        ).exists()
+
+        return body
+
+
+# --------------------------------------------------------------------------
+# BULK INVENTORY
+# --------------------------------------------------------------------------
+
+class BulkInventoryService:
+    """
+    Applies SKU -> stock changes ({"sku", "stock"} absolute or
+    {"sku", "delta"} relative) chunk by chunk. Each chunk locks its
+    inventory rows, checks reserved <= stock for every item in Python,
+    then writes all valid rows with one UPDATE ... FROM (VALUES ...).
+
+    Chunks commit independently: a chunk failing in the database is
+    rolled back and its items reported as `failed`, while the chunks
+    before and after it still apply.
+    """
+
+    chunk_size = 1000
+
+    @staticmethod
+    def _invalid(sku, position, error):
+        return {"sku": sku, "status": "invalid", "error": error, "position": position}
+
+    @staticmethod
+    def parse_items(items):
+        """
+        Splits raw items into valid changes and per-item errors,
+        both tagged with the item's position in the payload.
+        """
+        changes, errors = [], []
+        seen = set()
+
+        for position, item in enumerate(items):
+            sku = str(item.get("sku") or "").strip() if isinstance(item, dict) else ""
+
+            if not sku:
+                errors.append(BulkInventoryService._invalid(None, position, "sku is required."))
+                continue
+
+            if sku in seen:
+                errors.append(BulkInventoryService._invalid(sku, position, "Duplicate sku."))
+                continue
+            seen.add(sku)
+
+            has_stock, has_delta = "stock" in item, "delta" in item
+            if has_stock == has_delta:
+                errors.append(BulkInventoryService._invalid(
+                    sku, position, "Send exactly one of stock or delta."
+                ))
+                continue
+
+            value = item["stock"] if has_stock else item["delta"]
+            try:
+                if isinstance(value, (bool, float)):
+                    raise TypeError
+                value = int(value)
+            except (TypeError, ValueError):
+                errors.append(BulkInventoryService._invalid(sku, position, "Must be an integer."))
+                continue
+
+            changes.append({
+                "sku": sku,
+                "stock": value if has_stock else None,
+                "delta": value if has_delta else None,
+                "position": position,
+            })
+
+        return changes, errors
+
+    @staticmethod
+    def _apply_chunk(changes):
+        results = []
+        new_stock = {}
+        product_ids = set()
+
+        with transaction.atomic():
+            # Only the inventory rows, in id order like checkout, cart
+            # batches and validation, so a sync can't deadlock them
+            rows = {
+                sku: (inventory_id, stock, reserved, product_id)
+                for sku, inventory_id, stock, reserved, product_id in (
+                    Inventory.objects
+                    .select_for_update(of=("self",))
+                    .filter(variant__sku__in=[c["sku"] for c in changes])
+                    .order_by("pk")
+                    .values_list(
+                        "variant__sku", "pk", "stock", "reserved", "variant__product_id"
+                    )
+                )
+            }
+
+            for change in changes:
+                sku, position = change["sku"], change["position"]
+                row = rows.get(sku)
+
+                if row is None:
+                    results.append({"sku": sku, "status": "not_found", "position": position})
+                    continue
+
+                inventory_id, stock, reserved, product_id = row
+                target = (
+                    change["stock"] if change["stock"] is not None
+                    else stock + change["delta"]
+                )
+
+                if target < 0:
+                    results.append(BulkInventoryService._invalid(
+                        sku, position, "Stock cannot be negative."
+                    ))
+                    continue
+
+                # reserved_lte_stock, checked before anything is written
+                if target < reserved:
+                    results.append(BulkInventoryService._invalid(
+                        sku, position, f"Stock {target} is below reserved {reserved}."
+                    ))
+                    continue
+
+                new_stock[inventory_id] = target
+                product_ids.add(product_id)
+                results.append({
+                    "sku": sku, "status": "updated", "stock": target, "position": position,
+                })
+
+            if new_stock:
+                bulk_update_values(Inventory, new_stock.items(), ["stock"])
+
+                # The raw UPDATE sends no signals: refresh listings / detail cache here
+                def refresh():
+                    ProductListingService.refresh_stock(product_ids)
+                    bump_product_versions(product_ids)
+
+                transaction.on_commit(refresh)
+
+        return results
+
+    @staticmethod
+    def apply(items, chunk_size=None):
+        chunk_size = chunk_size or BulkInventoryService.chunk_size
+
+        changes, results = BulkInventoryService.parse_items(items)
+
+        for start in range(0, len(changes), chunk_size):
+            chunk = changes[start:start + chunk_size]
+            try:
+                results.extend(BulkInventoryService._apply_chunk(chunk))
+            except DatabaseError:
+                logger.exception("Bulk inventory chunk of %s SKUs failed", len(chunk))
+                results.extend(
+                    {
+                        "sku": change["sku"],
+                        "status": "failed",
+                        "error": "Database error, not applied.",
+                        "position": change["position"],
+                    }
+                    for change in chunk
+                )
+
+        # Back to input order, one result per submitted item
+        results.sort(key=lambda result: result.pop("position"))
+        return results
+
+
+# --------------------------------------------------------------------------
+# PRODUCT METRICS
+# --------------------------------------------------------------------------
+
+class ProductMetricsService:
+    """
+    Full recount of the running rating totals, for repairing drift
+    (ratings written with bulk queries, manual edits, ...).
+
+    Products are split into ranges of ids; each range is one grouped
+    aggregate over its ratings, compared with the stored totals, and
+    only the rows that differ are rewritten. Ranges run in a process
+    pool, each process with its own DB connection.
+    """
+
+    chunk_size = 5000
+
+    @staticmethod
+    def rebuild_range(first_id, last_id):
+        """
+        Returns (metrics rows checked, ids of the repaired products).
+        """
+        totals = {
+            row["product_id"]: (row["total"], row["count"])
+            for row in (
+                ProductRating.objects
+                .filter(product__gte=first_id, product__lte=last_id)
+                .values("product_id")
+                .annotate(total=Sum("rating"), count=Count("id"))
+                .order_by()
+            )
+        }
+
+        stored = ProductMetrics.objects.filter(
+            product__gte=first_id, product__lte=last_id
+        ).values_list("pk", "product_id", "rating_sum", "rating_count", "avg_rating")
+
+        rows, repaired = [], []
+        checked = 0
+
+        for pk, product_id, rating_sum, rating_count, avg_rating in stored:
+            checked += 1
+            total, count = totals.get(product_id, (0, 0))
+            average = ProductMetrics.average(total, count)
+
+            if (rating_sum, rating_count, avg_rating) != (total, count, average):
+                rows.append((pk, total, count, average))
+                repaired.append(product_id)
+
+        bulk_update_values(
+            ProductMetrics, rows, ["rating_sum", "rating_count", "avg_rating"]
+        )
+
+        return checked, repaired
+
+    @staticmethod
+    def rebuild(workers=None, chunk_size=None, progress=None):
+        """
+        Recount every product. workers=1 runs in this process.
+        progress(checked, repaired) is called after every range.
+        Returns (checked, repaired).
+        """
+        chunk_size = chunk_size or ProductMetricsService.chunk_size
+
+        # Products created without a metrics row get one to recount
+        ProductMetrics.objects.bulk_create(
+            (
+                ProductMetrics(product_id=product_id)
+                for product_id in Product.objects.filter(
+                    metrics__isnull=True
+                ).values_list("pk", flat=True)
+            ),
+            ignore_conflicts=True,
+        )
+
+        bounds = Product.objects.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            return 0, 0
+
+        ranges = [
+            (start, min(start + chunk_size - 1, bounds["last"]))
+            for start in range(bounds["first"], bounds["last"] + 1, chunk_size)
+        ]
+
+        checked, repaired = 0, []
+
+        def collect(result):
+            nonlocal checked
+            checked += result[0]
+            repaired.extend(result[1])
+            if progress:
+                progress(checked, len(repaired))
+
+        if workers == 1:
+            for first_id, last_id in ranges:
+                collect(ProductMetricsService.rebuild_range(first_id, last_id))
+        else:
+            # Child processes must not share this process's connections;
+            # nothing below touches the database until the pool is done
+            connections.close_all()
+
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=django.setup
+            ) as executor:
+                futures = [
+                    executor.submit(ProductMetricsService.rebuild_range, first_id, last_id)
+                    for first_id, last_id in ranges
+                ]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+        # bulk_update_values sends no signals
+        for start in range(0, len(repaired), ProductMetricsService.chunk_size):
+            chunk = repaired[start:start + ProductMetricsService.chunk_size]
+            ProductListingService.refresh(chunk)
+            bump_product_versions(chunk)
+
+        return checked, len(repaired)
+
+
+# --------------------------------------------------------------------------
+# TRENDING / TOP SELLING
+# --------------------------------------------------------------------------
+
+class ProductTrendingService:
+    """
+    Scheduled rollup of OrderItem into per-product sales velocity.
+
+    One grouped query counts the units sold per product in each sliding
+    window; the trending score is the weighted sum of the per-day
+    velocities, recent windows weighing more, so a burst fades out as
+    it slides through the 1 / 7 / 30 day windows. Scores go to
+    ProductSalesScore; Product.trending_score and the is_top_selling /
+    is_new_arrival flags are rewritten in bulk, along with their
+    listing copies, only where they changed.
+    """
+
+    # (ProductSalesScore field, days, weight)
+    WINDOWS = (
+        ("units_1d", 1, Decimal("0.5")),
+        ("units_7d", 7, Decimal("0.3")),
+        ("units_30d", 30, Decimal("0.2")),
+    )
+
+    # Orders that never turned into a sale
+    EXCLUDED_STATUSES = (
+        OrderStatus.PENDING,
+        OrderStatus.CANCELLED,
+        OrderStatus.FAILED,
+        OrderStatus.REFUNDED,
+    )
+
+    top_selling_count = 20
+    new_arrival_days = 30
+
+    FLAG_FIELDS = ["trending_score", "is_top_selling", "is_new_arrival"]
+
+    @staticmethod
+    def compute(now):
+        """
+        {product pk: {window field: units}} for products sold in the
+        longest window.
+        """
+        longest = max(days for _, days, _ in ProductTrendingService.WINDOWS)
+
+        rows = (
+            OrderItem.objects
+            .filter(order__placed_at__gte=now - timedelta(days=longest))
+            .exclude(order__status__in=ProductTrendingService.EXCLUDED_STATUSES)
+            .values("product_id")
+            .annotate(**{
+                field: Coalesce(
+                    Sum(
+                        "quantity",
+                        filter=Q(order__placed_at__gte=now - timedelta(days=days)),
+                    ),
+                    0,
+                )
+                for field, days, _ in ProductTrendingService.WINDOWS
+            })
+            .order_by()
+        )
+
+        # OrderItem.product_id is the product pk as a UUID
+        return {
+            row.pop("product_id").int: row
+            for row in rows
+        }
+
+    @staticmethod
+    def score(units):
+        return sum(
+            (weight * units[field] / days for field, days, weight in ProductTrendingService.WINDOWS),
+            Decimal(0),
+        ).quantize(Decimal("0.0001"))
+
+    @staticmethod
+    def rollup(now=None, top_selling_count=None, new_arrival_days=None):
+        """
+        Returns {"scored": products with sales, "updated": products whose
+        score or flags changed}.
+        """
+        now = now or timezone.now()
+        top_selling_count = (
+            ProductTrendingService.top_selling_count
+            if top_selling_count is None else top_selling_count
+        )
+        new_arrival_since = now - timedelta(
+            days=new_arrival_days or ProductTrendingService.new_arrival_days
+        )
+
+        sales = ProductTrendingService.compute(now)
+
+        # Order items outlive deleted products
+        existing = set(
+            Product.objects.filter(pk__in=list(sales)).values_list("pk", flat=True)
+        )
+        sales = {pk: units for pk, units in sales.items() if pk in existing}
+
+        scores = [
+            ProductSalesScore(
+                product_id=pk,
+                score=ProductTrendingService.score(units),
+                computed_at=now,
+                **units,
+            )
+            for pk, units in sales.items()
+        ]
+
+        top_selling = {
+            score.product_id
+            for score in sorted(
+                (score for score in scores if score.units_30d),
+                key=lambda score: (score.units_30d, score.score),
+                reverse=True,
+            )[:top_selling_count]
+        }
+        score_by_product = {score.product_id: score.score for score in scores}
+
+        changed = []
+        for pk, trending_score, is_top_selling, is_new_arrival, created_at in (
+            Product.objects.values_list(
+                "pk", "trending_score", "is_top_selling", "is_new_arrival", "created_at"
+            ).iterator(chunk_size=5000)
+        ):
+            row = (
+                pk,
+                score_by_product.get(pk, Decimal("0.0000")),
+                pk in top_selling,
+                created_at >= new_arrival_since,
+            )
+            if (trending_score, is_top_selling, is_new_arrival) != row[1:]:
+                changed.append(row)
+
+        with transaction.atomic():
+            ProductSalesScore.objects.exclude(product_id__in=list(sales)).delete()
+            ProductSalesScore.objects.bulk_create(
+                scores,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=[field for field, _, _ in ProductTrendingService.WINDOWS]
+                + ["score", "computed_at"],
+            )
+
+            fields = ProductTrendingService.FLAG_FIELDS
+            bulk_update_values(Product, changed, fields)
+            # Listing rows share the product pk; inactive products have none
+            bulk_update_values(ProductListing, changed, fields)
+
+            if changed:
+                product_ids = [row[0] for row in changed]
+
+                def invalidate():
+                    bump_catalog_version()
+                    bump_product_versions(product_ids)
+
+                transaction.on_commit(invalidate)
+
+        return {"scored": len(scores), "updated": len(changed)}
+
+
+# --------------------------------------------------------------------------
+# RECOMMENDATIONS (FREQUENTLY BOUGHT TOGETHER)
+# --------------------------------------------------------------------------
+
+class ProductRecommendationService:
+    """
+    Batch build of the product x product co-occurrence counts of orders,
+    keeping the top-K neighbours of every product in
+    ProductRecommendation.
+
+    Order items are streamed in order id order with iterator(), so one
+    basket at a time is in memory. Pairs are counted in a Counter keyed
+    on a single integer (anchor * stride + neighbour) rather than on
+    tuples, and each anchor keeps a bounded heap of its K best
+    neighbours. With partitions > 1 each pass only counts the anchors
+    of one id residue class, trading extra passes over the order
+    history for a proportionally smaller Counter.
+    """
+
+    top_k = 12
+    chunk_size = 5000
+    # Bigger baskets (bulk / B2B orders) add K^2 pairs of little signal
+    max_basket = 50
+    # Keyed on the catalog version, which stock / image / rating changes
+    # of the neighbours don't bump: those show after at most this long
+    cache_timeout = 60 * 5
+
+    # ----------------------------------------------------------------------
+    # BUILD
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def baskets(product_ids, since=None, chunk_size=None):
+        """
+        Sorted distinct product pks of every sold order, limited to
+        product_ids.
+        """
+        items = (
+            OrderItem.objects
+            .exclude(order__status__in=ProductTrendingService.EXCLUDED_STATUSES)
+            .order_by("order_id")
+            .values_list("order_id", "product_id")
+        )
+        if since is not None:
+            items = items.filter(order__placed_at__gte=since)
+
+        for _, rows in groupby(
+            items.iterator(chunk_size=chunk_size or ProductRecommendationService.chunk_size),
+            key=itemgetter(0),
+        ):
+            # OrderItem.product_id is the product pk as a UUID
+            basket = {product_id.int for _, product_id in rows} & product_ids
+            if 1 < len(basket) <= ProductRecommendationService.max_basket:
+                yield sorted(basket)
+
+    @staticmethod
+    def count_pairs(baskets, stride, partition=0, partitions=1):
+        pairs = Counter()
+        for basket in baskets:
+            pairs.update(
+                anchor * stride + neighbour
+                for anchor in basket
+                if anchor % partitions == partition
+                for neighbour in basket
+                if neighbour != anchor
+            )
+        return pairs
+
+    @staticmethod
+    def top_neighbours(pairs, stride, top_k):
+        """
+        {anchor: [(orders, neighbour), ...] best first}; ties go to the
+        lower neighbour id.
+        """
+        heaps = {}
+        for key, orders in pairs.items():
+            anchor, neighbour = divmod(key, stride)
+            heap = heaps.setdefault(anchor, [])
+            entry = (orders, -neighbour)
+
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+        return {
+            anchor: [(orders, -neighbour) for orders, neighbour in sorted(heap, reverse=True)]
+            for anchor, heap in heaps.items()
+        }
+
+    @staticmethod
+    def build(top_k=None, since=None, partitions=1, chunk_size=None, progress=None):
+        """
+        Recompute the whole table. progress(partition, anchors) is
+        called after every pass. Returns the number of rows written.
+        """
+        top_k = top_k or ProductRecommendationService.top_k
+
+        product_ids = set(
+            Product.objects.filter(is_active=True).values_list("pk", flat=True)
+        )
+        stride = max(product_ids, default=0) + 1
+
+        rows = []
+        for partition in range(partitions):
+            pairs = ProductRecommendationService.count_pairs(
+                ProductRecommendationService.baskets(product_ids, since, chunk_size),
+                stride,
+                partition,
+                partitions,
+            )
+            neighbours = ProductRecommendationService.top_neighbours(pairs, stride, top_k)
+            del pairs
+
+            # Plain tuples, written without a model instance per row
+            for anchor, ranked in neighbours.items():
+                rows.extend(
+                    (anchor, neighbour, orders, rank)
+                    for rank, (orders, neighbour) in enumerate(ranked, start=1)
+                )
+
+            if progress:
+                progress(partition, len(neighbours))
+
+        with transaction.atomic():
+            ProductRecommendation.objects.all().delete()
+
+            bulk_insert_values(
+                ProductRecommendation,
+                rows,
+                ["product", "related", "orders", "rank"],
+            )
+
+            # Cached /related/ responses are keyed on the catalog version
+            transaction.on_commit(bump_catalog_version)
+
+        return len(rows)
+
+    # ----------------------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_key(slug):
+        return f"products:related:{get_catalog_version()}:{slug}"
+
+    @staticmethod
+    def _serialize(slug):
+        product_id = (
+            Product.objects
+            .filter(slug=slug, is_active=True)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if product_id is None:
+            return None
+
+        related_ids = list(
+            ProductRecommendation.objects
+            .filter(product_id=product_id)
+            .order_by("rank")
+            .values_list("related_id", flat=True)
+        )
+
+        # Listing rows exist only for active products
+        listings = ProductListing.objects.in_bulk(related_ids)
+
+        return list(ProductListingSerializer(
+            [listings[pk] for pk in related_ids if pk in listings],
+            many=True,
+        ).data)
+
+    @staticmethod
+    def get_related(slug):
+        """
+        Anonymous listing payloads of the product's neighbours, best
+        first, or None for an unknown / inactive product.
+        """
+        key = ProductRecommendationService._cache_key(slug)
+        body = cache.get(key)
+
+        if body is None:
+            body = ProductRecommendationService._serialize(slug)
+            if body is not None:
+                cache.set(key, body, ProductRecommendationService.cache_timeout)
+
+        return body
@@ -1,10 +1,26 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from .models import ProductVariant, Inventory
-import cloudinary.uploader
-from django.db.models.signals import pre_delete
-from django.dispatch import receiver
-from .models import ProductImage
+
+from apps.media.services import MediaQueue
+
+from .cache import bump_catalog_version, bump_product_versions
+from .models import (
+    Category,
+    Inventory,
+    Product,
+    ProductFeature,
+    ProductImage,
+    ProductListing,
+    ProductMetrics,
+    ProductRating,
+    ProductType,
+    ProductVariant,
+)
+from .search import get_search_backend
+from .services import ProductListingService
+from .suggest import CATEGORY, PRODUCT, PRODUCT_TYPE, get_suggest_index
+
 
 @receiver(post_save, sender=ProductVariant)
 def create_inventory_for_variant(sender, instance, created, **kwargs):
@@ -16,5 +32,190 @@ def create_inventory_for_variant(sender, instance, created, **kwargs):
 
 @receiver(pre_delete, sender=ProductImage)
 def delete_cloudinary_image(sender, instance, **kwargs):
+    # Queued in the same transaction, the worker removes the file
     if instance.image:
-        cloudinary.uploader.destroy(instance.image.public_id)
\ No newline at end of file
+        MediaQueue.enqueue_delete([instance.image.public_id])
+
+
+# -------------------------------------------------------------------
+# Product listing read model
+# -------------------------------------------------------------------
+
+@receiver(post_save, sender=Product)
+def refresh_listing_for_product(sender, instance, **kwargs):
+    ProductListingService.schedule_refresh(instance.pk)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductMetrics)
+def refresh_listing_for_child(sender, instance, **kwargs):
+    ProductListingService.schedule_refresh(instance.product_id)
+
+
+@receiver(post_save, sender=Inventory)
+def refresh_listing_for_inventory(sender, instance, **kwargs):
+    ProductListingService.schedule_refresh(instance.variant.product_id)
+
+
+@receiver(post_save, sender=Category)
+def rename_listing_category(sender, instance, created, **kwargs):
+    if not created:
+        ProductListing.objects.filter(category=instance).update(
+            category_name=instance.name
+        )
+        reindex_search(
+            Product.objects.filter(category=instance).values_list("pk", flat=True)
+        )
+
+
+@receiver(post_save, sender=ProductType)
+def rename_listing_product_type(sender, instance, created, **kwargs):
+    if not created:
+        ProductListing.objects.filter(
+            product__product_type=instance
+        ).update(product_type_name=instance.name)
+        bump_catalog_version()
+        reindex_search(
+            Product.objects.filter(product_type=instance).values_list("pk", flat=True)
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalog_for_category(sender, instance, **kwargs):
+    # New / renamed / deleted categories change the facet list
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def bump_catalog_for_variant(sender, instance, **kwargs):
+    # Sizes and selling prices of active variants are facet dimensions
+    transaction.on_commit(bump_catalog_version)
+
+
+# -------------------------------------------------------------------
+# Search index
+# -------------------------------------------------------------------
+
+def reindex_search(product_ids):
+    product_ids = list(product_ids)
+    transaction.on_commit(
+        lambda: get_search_backend().index_products(product_ids)
+    )
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, **kwargs):
+    reindex_search([instance.pk])
+
+
+# -------------------------------------------------------------------
+# Suggest (typeahead) index
+# -------------------------------------------------------------------
+
+def update_suggestions(kind, ids):
+    ids = list(ids)
+    transaction.on_commit(
+        lambda: get_suggest_index().update(kind, ids)
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_product_suggestions(sender, instance, **kwargs):
+    update_suggestions(PRODUCT, [instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def update_category_suggestions(sender, instance, **kwargs):
+    update_suggestions(CATEGORY, [instance.pk])
+
+
+@receiver(post_save, sender=ProductType)
+@receiver(post_delete, sender=ProductType)
+def update_product_type_suggestions(sender, instance, **kwargs):
+    update_suggestions(PRODUCT_TYPE, [instance.pk])
+
+
+# -------------------------------------------------------------------
+# Product metrics (running rating totals)
+# -------------------------------------------------------------------
+
+@receiver(post_save, sender=ProductRating)
+def apply_rating_to_metrics(sender, instance, created, **kwargs):
+    stored = getattr(instance, "_stored_rating", None)
+    instance._stored_rating = instance.rating
+
+    if created:
+        delta = (instance.rating, 1)
+    elif stored is not None:
+        delta = (instance.rating - stored, 0)
+    else:
+        delta = None
+
+    if delta == (0, 0):
+        return
+
+    # Unknown previous value or no metrics row yet: full recount once
+    if delta is None or not ProductMetrics.apply_rating_delta(instance.product_id, *delta):
+        metrics, _ = ProductMetrics.objects.get_or_create(product_id=instance.product_id)
+        metrics.recalculate()
+
+
+@receiver(post_delete, sender=ProductRating)
+def remove_rating_from_metrics(sender, instance, **kwargs):
+    # No recount fallback: when the product itself is being deleted
+    # its metrics row may already be gone
+    ProductMetrics.apply_rating_delta(instance.product_id, -instance.rating, -1)
+
+
+# -------------------------------------------------------------------
+# Product detail cache versions
+# -------------------------------------------------------------------
+
+def invalidate_product_detail(product_ids):
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: bump_product_versions(product_ids))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_detail_for_product(sender, instance, **kwargs):
+    invalidate_product_detail([instance.pk])
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+@receiver(post_save, sender=ProductMetrics)
+def invalidate_detail_for_child(sender, instance, **kwargs):
+    invalidate_product_detail([instance.product_id])
+
+
+@receiver(post_save, sender=Inventory)
+def invalidate_detail_for_inventory(sender, instance, **kwargs):
+    invalidate_product_detail([instance.variant.product_id])
+
+
+@receiver(post_save, sender=Category)
+def invalidate_detail_for_category(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_product_detail(
+            Product.objects.filter(category=instance).values_list("pk", flat=True)
+        )
+
+
+@receiver(post_save, sender=ProductType)
+def invalidate_detail_for_product_type(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_product_detail(
+            Product.objects.filter(product_type=instance).values_list("pk", flat=True)
+        )
@@ -0,0 +1,285 @@
+import re
+import threading
+import unicodedata
+from array import array
+
+from .cache import bump_index_version, get_index_version
+from .models import Category, Product, ProductType
+
+
+# --------------------------------------------------------------------------
+# NORMALIZATION
+# --------------------------------------------------------------------------
+
+KINDS = ("product", "category", "product_type")
+
+PRODUCT, CATEGORY, PRODUCT_TYPE = range(len(KINDS))
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Keys are cut to this many bytes, longer prefixes still match the head
+MAX_KEY_BYTES = 24
+
+# A name is findable from each of its first few words ("run" -> "Trail Running Shoe")
+MAX_KEY_WORDS = 4
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+def index_keys(name):
+    words = normalize(name).split()
+    return {
+        " ".join(words[start:]).encode()[:MAX_KEY_BYTES]
+        for start in range(min(len(words), MAX_KEY_WORDS))
+    }
+
+
+# --------------------------------------------------------------------------
+# COMPACT PREFIX INDEX
+# --------------------------------------------------------------------------
+
+class PrefixIndex:
+    """
+    Immutable sorted array of keys. All keys live in one bytes blob
+    addressed by an offsets array, entity text ("name\\0slug") in a
+    second blob; no per-entry Python objects.
+    """
+
+    def __init__(self, entities):
+        kinds = array("B")
+        ids = array("I")
+        text_offsets = array("I", [0])
+        text = []
+        entries = []
+        size = 0
+
+        for position, (kind, pk, name, slug) in enumerate(entities):
+            kinds.append(kind)
+            ids.append(pk)
+
+            encoded = f"{name}\0{slug}".encode()
+            text.append(encoded)
+            size += len(encoded)
+            text_offsets.append(size)
+
+            entries.extend((key, position) for key in index_keys(name))
+
+        entries.sort()
+
+        self.kinds = kinds
+        self.ids = ids
+        self.text = b"".join(text)
+        self.text_offsets = text_offsets
+
+        self.keys = b"".join(key for key, _ in entries)
+        self.key_offsets = array("I", [0])
+        self.key_entities = array("I")
+
+        size = 0
+        for key, position in entries:
+            size += len(key)
+            self.key_offsets.append(size)
+            self.key_entities.append(position)
+
+    def __len__(self):
+        return len(self.key_entities)
+
+    @property
+    def nbytes(self):
+        arrays = (
+            self.kinds, self.ids, self.text_offsets,
+            self.key_offsets, self.key_entities,
+        )
+        return (
+            len(self.text) + len(self.keys)
+            + sum(a.itemsize * len(a) for a in arrays)
+        )
+
+    def _key(self, index):
+        return self.keys[self.key_offsets[index]:self.key_offsets[index + 1]]
+
+    def _lower_bound(self, prefix):
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def scan(self, prefix):
+        """
+        Yields (key, entity position) for keys starting with prefix,
+        in key order.
+        """
+        for index in range(self._lower_bound(prefix), len(self)):
+            key = self._key(index)
+            if not key.startswith(prefix):
+                return
+            yield key, self.key_entities[index]
+
+    def entity(self, position):
+        raw = self.text[self.text_offsets[position]:self.text_offsets[position + 1]]
+        name, slug = raw.decode().split("\0")
+        return self.kinds[position], self.ids[position], name, slug
+
+    def entities(self):
+        for position in range(len(self.ids)):
+            yield self.entity(position)
+
+
+# --------------------------------------------------------------------------
+# SUGGEST INDEX (PER PROCESS)
+# --------------------------------------------------------------------------
+
+class SuggestIndex:
+    """
+    PrefixIndex plus a small overlay of entities changed since it was
+    built (None = removed). The overlay is folded into a new PrefixIndex
+    once it grows past overlay_limit, without going back to the database.
+
+    Every update bumps the shared index version (see
+    get_index_version); a process whose copy is behind it, i.e. that
+    missed another process's update, reloads on its next read.
+    """
+
+    overlay_limit = 512
+    version_name = "suggest"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._base = None
+        self._overlay = {}
+        self._version = None
+
+    # ----------------------------------------------------------------------
+    # LOAD
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def _rows(kind, ids=None):
+        if kind == PRODUCT:
+            queryset = Product.objects.filter(is_active=True)
+        elif kind == CATEGORY:
+            queryset = Category.objects.all()
+        else:
+            queryset = ProductType.objects.filter(is_active=True)
+
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+
+        for pk, name, slug in queryset.values_list("pk", "name", "slug").iterator():
+            yield kind, pk, name, slug
+
+    def _ensure_loaded(self):
+        # Read first: an update committed during the load reloads again
+        version = get_index_version(self.version_name)
+        if self._base is not None and version == self._version:
+            return
+
+        def entities():
+            for kind in range(len(KINDS)):
+                yield from self._rows(kind)
+
+        self._base = PrefixIndex(entities())
+        self._overlay = {}
+        self._version = version
+
+    def rebuild(self):
+        with self._lock:
+            bump_index_version(self.version_name)
+            self._base = None
+            self._ensure_loaded()
+            return len(self._base)
+
+    # ----------------------------------------------------------------------
+    # INCREMENTAL UPDATES (SIGNALS)
+    # ----------------------------------------------------------------------
+
+    def update(self, kind, ids):
+        ids = set(ids)
+
+        with self._lock:
+            version = bump_index_version(self.version_name)
+
+            # Not loaded yet, or another process updated it meanwhile:
+            # the next suggest call reads everything anyway
+            if self._base is None or version != self._version + 1:
+                return
+            self._version = version
+
+            for pk in ids:
+                self._overlay[(kind, pk)] = None
+            for _, pk, name, slug in self._rows(kind, ids):
+                self._overlay[(kind, pk)] = (name, slug)
+
+            if len(self._overlay) > self.overlay_limit:
+                self._compact()
+
+    def _compact(self):
+        overlay = self._overlay
+
+        def entities():
+            for kind, pk, name, slug in self._base.entities():
+                if (kind, pk) not in overlay:
+                    yield kind, pk, name, slug
+            for (kind, pk), value in overlay.items():
+                if value is not None:
+                    yield (kind, pk) + value
+
+        self._base = PrefixIndex(entities())
+        self._overlay = {}
+
+    # ----------------------------------------------------------------------
+    # QUERY
+    # ----------------------------------------------------------------------
+
+    def suggest(self, query, limit=8):
+        prefix = normalize(query).encode()[:MAX_KEY_BYTES]
+        if not prefix:
+            return []
+
+        with self._lock:
+            self._ensure_loaded()
+            base, overlay = self._base, self._overlay
+
+            matches = []
+            seen = set()
+
+            for key, position in base.scan(prefix):
+                kind, pk, name, slug = base.entity(position)
+                if (kind, pk) in overlay or (kind, pk) in seen:
+                    continue
+                seen.add((kind, pk))
+                matches.append((key, kind, pk, name, slug))
+                if len(matches) == limit:
+                    break
+
+            for (kind, pk), value in overlay.items():
+                if value is None:
+                    continue
+                keys = [k for k in index_keys(value[0]) if k.startswith(prefix)]
+                if keys:
+                    matches.append((min(keys), kind, pk) + value)
+
+        matches.sort()
+
+        return [
+            {"type": KINDS[kind], "id": pk, "name": name, "slug": slug}
+            for _, kind, pk, name, slug in matches[:limit]
+        ]
+
+
+_index = None
+
+
+def get_suggest_index():
+    global _index
+    if _index is None:
+        _index = SuggestIndex()
+    return _index
@@ -1,3 +1,642 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .api.serializers.product_listing_serializer import ProductListingSerializer
+from .api.serializers.product_update_serializer import ProductFullUpdateSerializer
+from .cache import bump_index_version, get_catalog_version
+from .filters import ProductListFilterBackend, ProductListFilters
+from .importers import CatalogImporter, read_csv, read_jsonl
+from .search import InMemorySearchBackend
+from .services import BulkInventoryService, ProductFacetService
+from .suggest import PRODUCT, SuggestIndex
+from .models import (
+    Category,
+    Inventory,
+    Product,
+    ProductFeature,
+    ProductImage,
+    ProductListing,
+    ProductMetrics,
+    ProductType,
+    ProductVariant,
+)
+
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+def make_product(name, images=2, features=0, sizes=("S", "M", "L"), **fields):
+    category, _ = Category.objects.get_or_create(name="Men", defaults={"slug": "men"})
+    product_type, _ = ProductType.objects.get_or_create(name="Tee", defaults={"slug": "tee"})
+
+    product = Product.objects.create(
+        name=name,
+        description=f"{name} description",
+        category=category,
+        product_type=product_type,
+        **fields,
+    )
+    ProductMetrics.objects.create(product=product)
+
+    for index in range(images):
+        ProductImage.objects.create(
+            product=product,
+            image=f"products/{product.slug}-{index}",
+            is_primary=index == 0,
+            is_secondary=index == 1,
+            order=index,
+        )
+
+    for index in range(features):
+        ProductFeature.objects.create(product=product, text=f"feature {index}")
+
+    for index, size in enumerate(sizes):
+        variant = ProductVariant.objects.create(
+            product=product,
+            size=size,
+            price=Decimal(100 + 10 * index),
+            discount_percent=Decimal("12.50"),
+        )
+        variant.inventory.stock = 5
+        variant.inventory.save()
+
+    return product
+
+
+# --------------------------------------------------------------------------
+# STORED SELLING PRICES
+# --------------------------------------------------------------------------
+
+class SellingPriceSyncTests(TestCase):
+    """
+    selling_price and min_active_selling_price are stored copies of
+    compute_selling_price(); every write path must keep them equal.
+    """
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = make_product("Price Tee")
+
+    def assertInSync(self):
+        variants = list(ProductVariant.objects.filter(product=self.product))
+        for variant in variants:
+            self.assertEqual(variant.selling_price, variant.compute_selling_price(), variant.size)
+
+        self.product.refresh_from_db()
+        active = [variant.compute_selling_price() for variant in variants if variant.is_active]
+        self.assertEqual(self.product.min_active_selling_price, min(active, default=None))
+
+    def test_save(self):
+        self.assertInSync()
+
+        variant = self.product.variants.get(size="S")
+        variant.price = Decimal("101.00")   # 88.375, rounds half up
+        variant.save()
+        self.assertInSync()
+
+        variant.is_active = False
+        variant.save()
+        self.assertInSync()
+
+    def test_update(self):
+        variants = ProductVariant.objects.filter(product=self.product)
+
+        variants.filter(size="S").update(price=Decimal("101.00"))
+        self.assertInSync()
+
+        variants.update(discount_percent=Decimal("33.33"))
+        self.assertInSync()
+
+        variants.filter(size="S").update(is_active=False)
+        self.assertInSync()
+
+        variants.update(is_active=False)
+        self.assertInSync()
+
+    def test_bulk_update(self):
+        variants = list(ProductVariant.objects.filter(product=self.product).order_by("size"))
+        for index, variant in enumerate(variants):
+            variant.price = Decimal("57.00") + index
+            variant.discount_percent = Decimal("7.50")
+
+        ProductVariant.objects.bulk_update(variants, ["price", "discount_percent"])
+        self.assertInSync()
+
+        variants[0].is_active = False
+        ProductVariant.objects.bulk_update(variants[:1], ["is_active"])
+        self.assertInSync()
+
+    def test_bulk_create(self):
+        ProductVariant.objects.bulk_create([
+            ProductVariant(
+                product=self.product,
+                size="XL",
+                sku=ProductVariant.generate_sku(),
+                price=Decimal("20.05"),
+                discount_percent=Decimal("10.00"),
+            ),
+        ])
+        self.assertInSync()
+        self.assertEqual(self.product.min_active_selling_price, Decimal("18.05"))
+
+
+# --------------------------------------------------------------------------
+# ADMIN FULL UPDATE
+# --------------------------------------------------------------------------
+
+class ProductFullUpdateQueryTests(TestCase):
+
+    def payload(self, product):
+        return {
+            "name": product.name,
+            "images": [
+                {"id": image.pk, "is_primary": image.is_primary, "is_secondary": image.is_secondary}
+                for image in product.images.order_by("order")
+            ],
+            "features": [feature.text for feature in product.features.order_by("pk")],
+            "variants": [
+                {
+                    "size": variant.size,
+                    "price": str(variant.price),
+                    "discount_percent": str(variant.discount_percent),
+                    "stock": variant.inventory.stock,
+                }
+                for variant in product.variants.select_related("inventory").order_by("pk")
+            ],
+        }
+
+    def save(self, product, data):
+        serializer = ProductFullUpdateSerializer(product, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                serializer.save()
+
+        return [query["sql"] for query in queries.captured_queries]
+
+    def changed(self, data):
+        # Swap primary and secondary, drop the last image, rewrite every
+        # third feature and drop two, reprice one variant, restock
+        # another and add a new size
+        images = data["images"]
+        images[0]["is_primary"], images[0]["is_secondary"] = False, True
+        images[1]["is_primary"], images[1]["is_secondary"] = True, False
+
+        features = [
+            f"new {text}" if index % 3 == 0 else text
+            for index, text in enumerate(data["features"][:-2])
+        ]
+
+        variants = data["variants"]
+        variants[0]["price"] = "999.00"
+        variants[1]["stock"] = 42
+
+        return {
+            **data,
+            "images": images[:-1],
+            "features": features,
+            "variants": variants + [{"size": "XL", "price": "50.00", "stock": 3}],
+        }
+
+    def test_unchanged_payload_writes_nothing(self):
+        product = make_product("Big Tee", images=20, features=30, sizes=("S", "M", "L", "XL"))
+
+        sql = self.save(product, self.payload(product))
+
+        self.assertEqual([query for query in sql if query.startswith(WRITES)], [])
+
+    def test_query_count_does_not_grow_with_the_payload(self):
+        small = make_product("Small Tee", images=3, features=4)
+        large = make_product("Big Tee", images=20, features=30)
+
+        small_count = len(self.save(small, self.changed(self.payload(small))))
+        large_data = self.changed(self.payload(large))
+
+        with self.assertNumQueries(small_count):
+            self.save(large, large_data)
+
+        large.refresh_from_db()
+
+        images = list(large.images.order_by("order"))
+        self.assertEqual(len(images), 19)
+        self.assertEqual([image.is_primary for image in images].count(True), 1)
+        self.assertTrue(images[1].is_primary)
+        self.assertTrue(images[0].is_secondary)
+
+        features = [feature.text for feature in large.features.order_by("pk")]
+        self.assertEqual(features, large_data["features"])
+
+        variants = {variant.size: variant for variant in large.variants.select_related("inventory")}
+        self.assertEqual(variants["S"].price, Decimal("999.00"))
+        self.assertEqual(variants["M"].inventory.stock, 42)
+        self.assertEqual(variants["XL"].inventory.stock, 3)
+        self.assertEqual(large.min_active_selling_price, Decimal("50.00"))
+
+
+# --------------------------------------------------------------------------
+# LIST FILTERS
+# --------------------------------------------------------------------------
+
+class ProductListFilterTests(TestCase):
+
+    params = {
+        "category": "MEN",
+        "size": "m",
+        "min_price": "50",
+        "max_price": "500",
+        "new_arrival": "true",
+    }
+
+    def setUp(self):
+        # Every variant is in the price range: a join would repeat each
+        # product once per variant
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products = [
+                make_product(f"Tee {index}", sizes=("S", "M", "L", "XL"), is_new_arrival=True)
+                for index in range(3)
+            ]
+            make_product("Old Tee")
+
+    def filtered(self, params):
+        request = Request(APIRequestFactory().get("/api/products/", params))
+        return ProductListFilterBackend().filter_queryset(
+            request, ProductListing.objects.all(), None
+        )
+
+    def test_filters_are_exists_subqueries(self):
+        # Portable check of the SQL itself, the plan is tested below
+        sql = str(self.filtered(self.params).query)
+
+        self.assertIn("EXISTS", sql)
+        self.assertNotIn("DISTINCT", sql)
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn("UPPER", sql)
+
+        self.assertEqual(
+            sorted(self.filtered(self.params).values_list("product_id", flat=True)),
+            sorted(product.pk for product in self.products),
+        )
+
+    @skipUnless(
+        connection.vendor == "sqlite",
+        "plans differ per database; PostgreSQL seq-scans tables this small",
+    )
+    def test_filters_search_indexes(self):
+        plan = self.filtered(self.params).explain()
+
+        # One pass over the listing rows, each filter an index lookup
+        scans = [line for line in plan.splitlines() if " SCAN " in line]
+        self.assertEqual(len(scans), 1, plan)
+        self.assertIn("products_productlisting", scans[0])
+        self.assertIn("CORRELATED SCALAR SUBQUERY", plan)
+        self.assertNotIn("FOR DISTINCT", plan)
+
+    def test_list_query_count(self):
+        # COUNT(*) and the page, whatever the filters and variant count
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/products/", self.params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_invalid_flag_is_rejected(self):
+        response = self.client.get("/api/products/", {"top_selling": "maybe"})
+        self.assertEqual(response.status_code, 400)
+
+
+# --------------------------------------------------------------------------
+# LISTING PAYLOAD
+# --------------------------------------------------------------------------
+
+class ProductListingSerializerTests(TestCase):
+
+    def test_fast_path_matches_the_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            in_stock = make_product("Stock Tee")
+            make_product("Bare Tee", images=0, sizes=())
+
+        listings = list(ProductListing.objects.order_by("product_id"))
+        serializer = ProductListingSerializer(
+            listings,
+            many=True,
+            context={"wishlist_product_ids": {in_stock.pk}, "cart_product_ids": set()},
+        )
+
+        self.assertEqual(
+            serializer.data,
+            [
+                serializers.ModelSerializer.to_representation(serializer.child, listing)
+                for listing in listings
+            ],
+        )
+        self.assertEqual(
+            [(row["is_in_wishlist"], row["in_stock"]) for row in serializer.data],
+            [(True, True), (False, False)],
+        )
+
+
+# --------------------------------------------------------------------------
+# FACET CACHE
+# --------------------------------------------------------------------------
+
+class CatalogVersionTests(TestCase):
+    """
+    Cached facets (and related products) are keyed on the catalog
+    version: facet-relevant writes bump it, the rest of the listing
+    refreshes don't.
+    """
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = make_product("Facet Tee")
+
+    def write(self, change):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        return get_catalog_version() != version
+
+    def test_other_writes_keep_the_cached_facets(self):
+        filters = ProductListFilters({})
+        facets = ProductFacetService.get_facets(filters)
+        self.assertEqual(facets["total"], 1)
+
+        variant = self.product.variants.get(size="S")
+        inventory = variant.inventory
+
+        def restock():
+            inventory.stock = 0
+            inventory.save()
+
+        def rename():
+            self.product.description = "New description"
+            self.product.save()
+
+        def rate():
+            self.product.metrics.save()
+
+        for change in (restock, rename, rate):
+            self.assertFalse(self.write(change), change.__name__)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(ProductFacetService.get_facets(filters), facets)
+
+    def test_facet_writes_bump_it(self):
+        variant = self.product.variants.get(size="S")
+        category = Category.objects.create(name="Women", slug="women")
+
+        def reprice():
+            variant.price = Decimal("9999.00")
+            variant.save()
+
+        def reprice_in_bulk():
+            ProductVariant.objects.filter(product=self.product).update(discount_percent=0)
+
+        def recategorize():
+            self.product.category = category
+            self.product.save()
+
+        def flag():
+            self.product.is_new_arrival = not self.product.is_new_arrival
+            self.product.save()
+
+        def add_product():
+            make_product("Second Tee", sizes=())
+
+        def deactivate():
+            self.product.is_active = False
+            self.product.save()
+
+        for change in (reprice, reprice_in_bulk, recategorize, flag, add_product, deactivate):
+            self.assertTrue(self.write(change), change.__name__)
+
+
+# --------------------------------------------------------------------------
+# BULK INVENTORY SYNC
+# --------------------------------------------------------------------------
+
+class BulkInventoryTests(TestCase):
+
+    def setUp(self):
+        product = make_product("Stock Tee")
+        self.skus = {
+            variant.size: variant.sku
+            for variant in product.variants.all()
+        }
+        # Stock 5 everywhere, 2 of the L reserved
+        Inventory.objects.filter(variant__sku=self.skus["L"]).update(reserved=2)
+
+    def stock(self):
+        return {
+            size: Inventory.objects.get(variant__sku=sku).stock
+            for size, sku in self.skus.items()
+        }
+
+    def test_apply(self):
+        results = BulkInventoryService.apply([
+            {"sku": self.skus["S"], "stock": 12},
+            {"sku": "NOPE"},
+            {"sku": "UNKNOWN", "stock": 3},
+            {"sku": self.skus["M"], "delta": -6},
+            {"sku": self.skus["S"], "stock": 1},
+            {"sku": self.skus["L"], "delta": -4},
+            {"sku": self.skus["M"], "stock": -1},
+            {"sku": self.skus["L"], "stock": 2, "delta": 1},
+        ], chunk_size=2)
+
+        self.assertEqual(
+            [(result["sku"], result["status"], result.get("error")) for result in results],
+            [
+                (self.skus["S"], "updated", None),
+                ("NOPE", "invalid", "Send exactly one of stock or delta."),
+                ("UNKNOWN", "not_found", None),
+                (self.skus["M"], "invalid", "Stock cannot be negative."),
+                (self.skus["S"], "invalid", "Duplicate sku."),
+                (self.skus["L"], "invalid", "Stock 1 is below reserved 2."),
+                (self.skus["M"], "invalid", "Duplicate sku."),
+                (self.skus["L"], "invalid", "Duplicate sku."),
+            ],
+        )
+        self.assertEqual(self.stock(), {"S": 12, "M": 5, "L": 5})
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as stream:
+            stream.write("sku,stock,delta\n")
+            stream.write(f"{self.skus['S']},,3\n")
+            stream.write(f"{self.skus['M']},0,\n")
+            stream.write("UNKNOWN,4,\n")
+            stream.write(f"{self.skus['S']},,1\n")
+        self.addCleanup(os.remove, stream.name)
+
+        out, err = StringIO(), StringIO()
+        call_command("bulk_update_inventory", stream.name, stdout=out, stderr=err)
+
+        self.assertIn("Updated 2 SKUs", out.getvalue())
+        self.assertIn("2 failed", out.getvalue())
+        self.assertIn("UNKNOWN: not_found", err.getvalue())
+        self.assertIn(f"{self.skus['S']}: invalid Duplicate sku.", err.getvalue())
+        self.assertEqual(self.stock(), {"S": 8, "M": 0, "L": 5})
+
+
+# --------------------------------------------------------------------------
+# IN-PROCESS INDEXES
+# --------------------------------------------------------------------------
+
+class InProcessIndexTests(TestCase):
+    """
+    The in-memory search backend and the suggest index apply their own
+    process's updates in place and reload once another process's moved
+    the shared version.
+    """
+
+    def setUp(self):
+        self.product = make_product("Zephyr Tee")
+        self.search = InMemorySearchBackend()
+        self.suggest = SuggestIndex()
+
+    def found(self):
+        return (
+            [hit.product_id for hit in self.search.search("quokka", 10)],
+            [row["id"] for row in self.suggest.suggest("quokka")],
+        )
+
+    def rename(self):
+        # No signals: only the indexes' own update calls below
+        Product.objects.filter(pk=self.product.pk).update(name="Quokka Tee")
+
+    def test_own_update_applies_in_place(self):
+        self.assertEqual(self.found(), ([], []))
+
+        self.rename()
+        self.search.index_products([self.product.pk])
+        self.suggest.update(PRODUCT, [self.product.pk])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.found(), ([self.product.pk], [self.product.pk]))
+
+    def test_other_process_update_reloads(self):
+        self.assertEqual(self.found(), ([], []))
+
+        self.rename()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.found(), ([], []))
+
+        # What another process's index_products / update leave behind
+        bump_index_version(InMemorySearchBackend.version_name)
+        bump_index_version(SuggestIndex.version_name)
+
+        self.assertEqual(self.found(), ([self.product.pk], [self.product.pk]))
+
+
+# --------------------------------------------------------------------------
+# CATALOG IMPORT
+# --------------------------------------------------------------------------
+
+class CatalogImportTests(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product("Existing Tee")
+        self.taken_sku = ProductVariant.objects.values_list("sku", flat=True).first()
+
+    def row(self, name, category="men", sizes=("S",), sku=None, **fields):
+        return {
+            "name": name,
+            "description": f"{name} description",
+            "category": category,
+            "product_type": "Tee",
+            "features": ["cotton"],
+            "images": [f"products/{name}"],
+            "variants": [
+                {"size": size, "price": "50.00", "stock": 3, "sku": sku}
+                for size in sizes
+            ],
+            **fields,
+        }
+
+    def run_import(self, rows, **options):
+        importer = CatalogImporter(**options)
+        stream = StringIO("\n".join(json.dumps(row) for row in rows))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            importer.run(read_jsonl(stream))
+
+        return importer
+
+    def test_import(self):
+        importer = self.run_import([
+            self.row("Plain Tee", sizes=("S", "M")),
+            self.row("Coming Soon Tee", sizes=()),
+            self.row("Bad Tee", sizes=("XXL",)),
+            self.row("Lost Tee", category="Nowhere"),
+        ], chunk_size=2)
+
+        self.assertEqual(importer.created, 2)
+        self.assertEqual(importer.errors, [
+            (3, "invalid size 'XXL'"),
+            (4, "unknown category 'Nowhere'"),
+        ])
+
+        plain = Product.objects.get(name="Plain Tee")
+        self.assertEqual(
+            dict(Inventory.objects.filter(variant__product=plain).values_list("variant__size", "stock")),
+            {"S": 3, "M": 3},
+        )
+
+        # Every product gets its listing row, with or without variants
+        self.assertEqual(
+            set(ProductListing.objects.values_list("name", flat=True)),
+            {"Existing Tee", "Plain Tee", "Coming Soon Tee"},
+        )
+
+    def test_csv(self):
+        stream = StringIO(
+            "name,description,category,product_type,size,price,stock\n"
+            "Csv Tee,d,men,tee,S,10,1\n"
+            "Csv Tee,d,men,tee,M,10,2\n"
+        )
+        importer = CatalogImporter()
+        with self.captureOnCommitCallbacks(execute=True):
+            importer.run(read_csv(stream))
+
+        self.assertEqual(importer.created, 1)
+        self.assertEqual(Product.objects.get(name="Csv Tee").variants.count(), 2)
+
+    def test_failed_chunk_leaves_no_created_category(self):
+        importer = self.run_import([
+            self.row("Taken Tee", category="Kids", sku=self.taken_sku),
+            self.row("Kids Tee", category="Kids"),
+        ], chunk_size=1, create_missing=True)
+
+        self.assertEqual(importer.created, 1)
+        self.assertEqual(len(importer.errors), 1)
+        self.assertEqual(importer.errors[0][0], 1)
+        self.assertTrue(importer.errors[0][1].startswith("chunk failed:"))
+
+        self.assertFalse(Product.objects.filter(name="Taken Tee").exists())
+        kids = Category.objects.get(name="Kids")
+        self.assertEqual(Product.objects.get(name="Kids Tee").category, kids)
+
+    def test_failed_chunk_creates_nothing(self):
+        importer = self.run_import([
+            self.row("Kids Tee", category="Kids"),
+            self.row("Taken Tee", category="Kids", sku=self.taken_sku),
+        ], chunk_size=2, create_missing=True)
 
-# Create your tests here.
+        self.assertEqual(importer.created, 0)
+        self.assertEqual([line for line, _ in importer.errors], [1, 2])
+        self.assertFalse(Category.objects.filter(name="Kids").exists())
+        self.assertFalse(Product.objects.filter(name="Kids Tee").exists())
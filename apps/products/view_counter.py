@@ -0,0 +1,235 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from apps.common.db import bulk_increment_values
+
+from .models import Product, ProductViewStats
+
+
+logger = logging.getLogger(__name__)
+
+
+# Running totals in the cache, i.e. across processes with a shared backend
+METRIC_KEYS = {
+    "flushed": "products:views:flushed",
+    "dropped": "products:views:dropped",
+    "flushes": "products:views:flushes",
+}
+
+
+def _incr_metric(name, amount):
+    if not amount:
+        return
+    key = METRIC_KEYS[name]
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def view_counter_metrics():
+    """
+    Totals from the cache plus the state of this process's buffer.
+    """
+    totals = cache.get_many(METRIC_KEYS.values())
+    return {
+        **{name: totals.get(key, 0) for name, key in METRIC_KEYS.items()},
+        "process": get_view_counter().snapshot(),
+    }
+
+
+# --------------------------------------------------------------------------
+# VIEW COUNTER (PER PROCESS)
+# --------------------------------------------------------------------------
+
+class ViewCounter:
+    """
+    In-process buffer of product view deltas. record() only bumps a
+    dict entry under a lock, so a detail request never writes to the
+    database. A daemon thread drains the buffer every `interval`
+    seconds into ProductViewStats with one additive upsert per batch;
+    with several worker processes each keeps its own buffer and the
+    upserts add up. The last deltas are flushed at interpreter exit.
+
+    A failed flush puts its deltas back for the next one. Deltas are
+    only dropped (and counted) when more than max_pending products are
+    waiting, e.g. while the database is down.
+    """
+
+    def __init__(self, interval=None, max_pending=None):
+        self.interval = (
+            getattr(settings, "PRODUCT_VIEW_FLUSH_INTERVAL", 10)
+            if interval is None else interval
+        )
+        self.max_pending = max_pending or getattr(
+            settings, "PRODUCT_VIEW_MAX_PENDING", 50000
+        )
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._deltas = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = False
+        self.stats = {"recorded": 0, "flushed": 0, "dropped": 0, "flushes": 0, "failures": 0}
+
+    # ----------------------------------------------------------------------
+    # RECORD
+    # ----------------------------------------------------------------------
+
+    def record(self, product_id, count=1):
+        # Forked after the buffer was created: the parent flushes its own
+        if self._pid != os.getpid():
+            self._reset()
+
+        with self._lock:
+            dropped = (
+                product_id not in self._deltas
+                and len(self._deltas) >= self.max_pending
+            )
+            if dropped:
+                self.stats["dropped"] += count
+            else:
+                self._deltas[product_id] = self._deltas.get(product_id, 0) + count
+                self.stats["recorded"] += count
+
+        if dropped:
+            _incr_metric("dropped", count)
+            return
+
+        if not self._started:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+            if self.interval:
+                self._thread = threading.Thread(
+                    target=self._run, name="product-view-flusher", daemon=True
+                )
+                self._thread.start()
+
+        atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    # ----------------------------------------------------------------------
+    # FLUSH
+    # ----------------------------------------------------------------------
+
+    def _drain(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        return deltas
+
+    def _restore(self, deltas):
+        dropped = 0
+        with self._lock:
+            for product_id, count in deltas.items():
+                if product_id in self._deltas:
+                    self._deltas[product_id] += count
+                elif len(self._deltas) < self.max_pending:
+                    self._deltas[product_id] = count
+                else:
+                    dropped += count
+            self.stats["dropped"] += dropped
+        return dropped
+
+    def flush(self):
+        """
+        Write the pending deltas. Returns the number of views written.
+        """
+        with self._flush_lock:
+            deltas = self._drain()
+            if not deltas:
+                return 0
+
+            try:
+                # Products deleted since they were viewed
+                existing = set(
+                    Product.objects.filter(pk__in=list(deltas)).values_list("pk", flat=True)
+                )
+                gone = sum(count for pk, count in deltas.items() if pk not in existing)
+
+                day = timezone.localdate()
+                bulk_increment_values(
+                    ProductViewStats,
+                    [(pk, day, count) for pk, count in deltas.items() if pk in existing],
+                    ["product", "day"],
+                    ["views"],
+                )
+            except Exception:
+                logger.exception("Flushing %s product view counters failed", len(deltas))
+                with self._lock:
+                    self.stats["failures"] += 1
+                _incr_metric("dropped", self._restore(deltas))
+                return 0
+            finally:
+                # Connections are per thread: don't leave the flusher's open
+                if threading.current_thread() is self._thread:
+                    connections.close_all()
+
+            flushed = sum(deltas.values()) - gone
+
+            with self._lock:
+                self.stats["flushed"] += flushed
+                self.stats["dropped"] += gone
+                self.stats["flushes"] += 1
+
+            _incr_metric("flushed", flushed)
+            _incr_metric("dropped", gone)
+            _incr_metric("flushes", 1)
+
+            return flushed
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval or None)
+
+        # A failed flush puts the deltas back: what is left is lost
+        self.flush()
+
+        with self._lock:
+            lost = sum(self._deltas.values())
+            self._deltas = {}
+            self.stats["dropped"] += lost
+
+        if lost:
+            logger.error("Lost %s product views at shutdown", lost)
+            _incr_metric("dropped", lost)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                **self.stats,
+                "pending_products": len(self._deltas),
+                "pending_views": sum(self._deltas.values()),
+                "pid": self._pid,
+            }
+
+
+_counter = None
+
+
+def get_view_counter():
+    global _counter
+    if _counter is None:
+        _counter = ViewCounter()
+    return _counter
@@ -7,6 +7,7 @@ from rest_framework import serializers
 
 from apps.products.models import ProductVariant, Inventory
 from apps.cart.models import Cart, CartItem
+from apps.cart.store import get_cart_store
 from ...models import Wishlist, WishlistItem
 
 
@@ -41,6 +42,11 @@ class MoveAllWishlistToCartView(APIView):
         if not wishlist_items:
             return Response({"detail": "Wishlist is empty."}, status=400)
 
+        # Writes the cart tables directly: the cart store's pending
+        # changes go first, its entry is dropped after
+        cart_store = get_cart_store()
+        cart_store.flush(user)
+
         cart, _ = Cart.objects.get_or_create(user=user)
 
         for item in wishlist_items:
@@ -77,7 +83,7 @@ class MoveAllWishlistToCartView(APIView):
 
         wishlist.items.all().delete()
 
-        cart.recalculate_totals()
+        transaction.on_commit(lambda: cart_store.invalidate(user))
 
         return Response({
             "wishlist_count": 0,
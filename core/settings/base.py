@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     # Local apps
     "apps.notifications",
     "apps.accounts",
+    "apps.media",
     "apps.products",
     "apps.wishlist",
     "apps.cart",
@@ -186,6 +187,34 @@ CLOUDINARY_STORAGE = {
     "API_SECRET": env("CLOUDINARY_API_SECRET"),
 }
 
+# --------------------------------------------------
+# MEDIA QUEUE
+# --------------------------------------------------
+
+# Uploads / deletes run in the process_media_queue worker (apps.media).
+# apps.media.storage.LocalMediaStorage keeps files on disk instead
+# of Cloudinary, for tests and offline environments.
+MEDIA_STORAGE_BACKEND = env("MEDIA_STORAGE_BACKEND", default=None)
+
+MEDIA_LOCAL_ROOT = BASE_DIR / "media_local"
+
+MEDIA_QUEUE_SPOOL_DIR = env("MEDIA_QUEUE_SPOOL_DIR", default=str(BASE_DIR / "media_spool"))
+
+# Lifetime in seconds of a signed direct upload (api/media/uploads/)
+MEDIA_UPLOAD_TTL = 600
+
+# Product detail views are buffered per process and written to
+# ProductViewStats every N seconds (0: only at exit)
+PRODUCT_VIEW_FLUSH_INTERVAL = env.int("PRODUCT_VIEW_FLUSH_INTERVAL", default=10)
+
+# Carts live in the Cart / CartItem tables unless CART_STORE_BACKEND is
+# "apps.cart.store.CacheCartStore": then they are served from the cache
+# (which must be shared between processes) and written back every N
+# seconds. apps.cart.store.LocalMemoryCartStore is its stand-in for tests.
+CART_STORE_BACKEND = env("CART_STORE_BACKEND", default=None)
+
+CART_STORE_FLUSH_INTERVAL = env.int("CART_STORE_FLUSH_INTERVAL", default=2)
+
 # --------------------------------------------------
 # DJANGO REST FRAMEWORK
 # --------------------------------------------------
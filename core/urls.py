@@ -81,6 +81,10 @@ urlpatterns = [
         "api/reports/",
         include(("apps.reports.api.urls", "reports"), namespace="reports"),
     ),
+    path(
+        "api/media/",
+        include(("apps.media.api.urls", "media"), namespace="media"),
+    ),
     path(
         "api/notifications/",
         include(("apps.notifications.api.urls", "notifications"), namespace="notifications"),
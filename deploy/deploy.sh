@@ -16,6 +16,12 @@ pip install -r requirements.txt
 echo "Running migrations..."
 python manage.py migrate
 
+echo "Backfilling product image URLs..."
+python manage.py rebuild_image_urls --missing
+
+echo "Rebuilding product listings..."
+python manage.py rebuild_product_listings
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 